@@ -1,6 +1,10 @@
-from alb.business import BusinessLayerFacade, BusinessProcessError
+from alb.business import BusinessLayerFacade, BusinessProcessError, NodeGroup
+from alb.columnar import ColumnarNodeGroup
 from core.config import Config
+from core.session import get_session_options
 from alb.integration import IntegrationLayer, ProxyError
+from alb.metrics import MetricsRegistry, EventLoopLagMonitor
+from alb.persistence import Journal
 from alb.service import ServiceLayer, BAD_REQUEST, INTERNAL_ERROR, GET, POST, DELETE, PUT
 
 
@@ -13,16 +17,57 @@ class AdvancedLoadbalancer(object):
         __config (Config): Configuration of the alb.
         __integration_layer (IntegrationLayer): Integration layer of the alb.
         __business_layer (BusinessLayerFacade): Facade of the business layer of the alb.
+        __journal (Journal): Durable journal of node groups. None if node groups are kept in memory only.
+        __metrics (MetricsRegistry): Registry of metrics of the alb.
+        __loop_lag_monitor (EventLoopLagMonitor): Monitor of the lag of the event loop.
         __service_layer (ServiceLayer): Service layer of the alb.
 
     """
     def __init__(self):
         """Constructor of the AdvancedLoadbalancer."""
         self.__config = Config()
-        self.__integration_layer = IntegrationLayer(proxy_url=self.__config.get_attribute('proxy_url'))
-        self.__business_layer = BusinessLayerFacade(integration_layer=self.__integration_layer)
+        self.__metrics = MetricsRegistry()
+        self.__loop_lag_monitor = EventLoopLagMonitor(self.__metrics)
+        self.__integration_layer = IntegrationLayer(proxy_url=self.__config.get_attribute('proxy_url'),
+                                                    push_projection=self.__config.get_attribute('push_projection'),
+                                                    session_options=get_session_options(self.__config),
+                                                    retries=int(self.__config.get_attribute('proxy_retries') or 2),
+                                                    backoff=float(self.__config.get_attribute('proxy_backoff') or 0.1),
+                                                    max_backoff=float(self.__config.get_attribute('proxy_max_backoff')
+                                                                      or 2),
+                                                    failure_threshold=int(
+                                                        self.__config.get_attribute('proxy_failure_threshold') or 5),
+                                                    reset_timeout=float(
+                                                        self.__config.get_attribute('proxy_reset_timeout') or 10),
+                                                    metrics=self.__metrics)
+        columnar = self.__config.get_attribute('node_group_backend') == 'columnar'
+        if columnar:
+            ColumnarNodeGroup.check_requirements()
+        node_group_factory = ColumnarNodeGroup if columnar else NodeGroup
+        data_path = self.__config.get_attribute('data_path')
+        journal = None
+        if data_path:
+            journal = Journal(directory=data_path,
+                              snapshot_interval=int(self.__config.get_attribute('snapshot_interval') or 100000))
+        self.__business_layer = BusinessLayerFacade(integration_layer=self.__integration_layer,
+                                                    push_window=float(self.__config.get_attribute('push_window')
+                                                                      or 0.02),
+                                                    push_max_delay=float(self.__config.get_attribute('push_max_delay')
+                                                                         or 0.2),
+                                                    node_group_factory=node_group_factory,
+                                                    change_log_size=int(self.__config.get_attribute('change_log_size')
+                                                                        or 10000),
+                                                    journal=journal,
+                                                    push_mode=self.__config.get_attribute('push_mode'))
+        self.__journal = journal
+        for cardinality in ('node_groups', 'nodes', 'attributes'):
+            self.__metrics.gauge('alb_{}'.format(cardinality), 'Count of {}.'.format(cardinality.replace('_', ' ')),
+                                 lambda cardinality=cardinality: self.__business_layer.get_cardinalities()[cardinality])
         self.__service_layer = ServiceLayer(host=self.__config.get_attribute('host'),
-                                            port=self.__config.get_attribute('port'))
+                                            port=self.__config.get_attribute('port'),
+                                            metrics=self.__metrics,
+                                            response_cache_size=int(
+                                                self.__config.get_attribute('response_cache_size') or 10000))
 
     def main(self):
         """An entry point of the AdvancedLoadbalancer. Initialize layers and interconnects them between each other."""
@@ -31,25 +76,46 @@ class AdvancedLoadbalancer(object):
         node_groups_url = '/node_group'
         self.__service_layer.map_business_process(method=GET,
                                                   url=node_groups_url,
-                                                  business_process=self.__business_layer.get_node_groups)
+                                                  business_process=self.__business_layer.get_node_groups,
+                                                  version=self.__business_layer.get_node_groups_version,
+                                                  query=('watch', 'since', 'timeout'))
+        self.__service_layer.map_business_process(method=POST,
+                                                  url=node_groups_url,
+                                                  business_process=self.__business_layer.import_node_groups,
+                                                  body='node_groups')
+        self.__service_layer.map_business_process(method=POST,
+                                                  url='/flush',
+                                                  business_process=self.__business_layer.flush_node_groups)
+        self.__service_layer.map_business_process(method=GET,
+                                                  url='/push_queue',
+                                                  business_process=self.__business_layer.get_push_queue)
+        self.__service_layer.map_business_process(method=GET,
+                                                  url='/push_stats',
+                                                  business_process=self.__business_layer.get_push_stats)
         node_group_url = '/node_group/{group_name}'
         self.__service_layer.map_business_process(method=GET,
                                                   url=node_group_url,
-                                                  business_process=self.__business_layer.get_node_group)
+                                                  business_process=self.__business_layer.get_node_group,
+                                                  version=self.__business_layer.get_node_group_version)
         self.__service_layer.map_business_process(method=POST,
                                                   url=node_group_url,
                                                   business_process=self.__business_layer.create_node_group)
         self.__service_layer.map_business_process(method=DELETE,
                                                   url=node_group_url,
                                                   business_process=self.__business_layer.remove_node_group)
+        self.__service_layer.map_business_process(method=POST,
+                                                  url='/node_group/{group_name}/flush',
+                                                  business_process=self.__business_layer.flush_node_group)
         nodes_url = '/node_group/{group_name}/node'
         self.__service_layer.map_business_process(method=GET,
                                                   url=nodes_url,
-                                                  business_process=self.__business_layer.get_nodes)
+                                                  business_process=self.__business_layer.get_nodes,
+                                                  version=self.__business_layer.get_node_group_version)
         node_url = '/node_group/{group_name}/node/{node_name}'
         self.__service_layer.map_business_process(method=GET,
                                                   url=node_url,
-                                                  business_process=self.__business_layer.get_node)
+                                                  business_process=self.__business_layer.get_node,
+                                                  version=self.__business_layer.get_node_group_version)
         self.__service_layer.map_business_process(method=POST,
                                                   url=node_url,
                                                   business_process=self.__business_layer.create_node)
@@ -62,11 +128,13 @@ class AdvancedLoadbalancer(object):
         attributes_url = '/node_group/{group_name}/node/{node_name}/attribute'
         self.__service_layer.map_business_process(method=GET,
                                                   url=attributes_url,
-                                                  business_process=self.__business_layer.get_node_attributes)
+                                                  business_process=self.__business_layer.get_node_attributes,
+                                                  version=self.__business_layer.get_node_group_version)
         attribute_url = '/node_group/{group_name}/node/{node_name}/attribute/{attribute_name}'
         self.__service_layer.map_business_process(method=GET,
                                                   url=attribute_url,
-                                                  business_process=self.__business_layer.get_node_attribute)
+                                                  business_process=self.__business_layer.get_node_attribute,
+                                                  version=self.__business_layer.get_node_group_version)
         self.__service_layer.map_business_process(method=POST,
                                                   url=attribute_url,
                                                   business_process=self.__business_layer.create_node_attribute)
@@ -76,4 +144,12 @@ class AdvancedLoadbalancer(object):
         self.__service_layer.map_business_process(method=DELETE,
                                                   url=attribute_url,
                                                   business_process=self.__business_layer.remove_node_attribute)
+        self.__service_layer.map_batch_process(url='/batch', transaction=self.__business_layer.defer_pushes)
+        self.__service_layer.map_metrics(url='/metrics')
+        if self.__config.get_attribute('debug_endpoints'):
+            self.__service_layer.map_debug(url='/debug')
+        self.__service_layer.run_on_startup(self.__loop_lag_monitor.run)
+        if self.__journal is not None:
+            self.__business_layer.restore()
+            self.__service_layer.run_on_startup(self.__business_layer.push_node_groups)
         self.__service_layer.run()
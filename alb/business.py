@@ -1,8 +1,80 @@
+import asyncio
+import gc
+import math
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from functools import partial
+from itertools import chain, islice
+
+
+NODE_GROUP_CREATED = 'node_group_created'
+"""Type of the change, when a node group gets created."""
+NODE_GROUP_REMOVED = 'node_group_removed'
+"""Type of the change, when a node group gets removed."""
+NODE_GROUP_REPLACED = 'node_group_replaced'
+"""Type of the change, when a node group gets replaced as a whole, so watchers should load it anew."""
+NODE_ADDED = 'node_added'
+"""Type of the change, when a node gets added to a node group."""
+NODE_UPDATED = 'node_updated'
+"""Type of the change, when host or port of a node get updated."""
+NODE_REMOVED = 'node_removed'
+"""Type of the change, when a node gets removed from a node group."""
+NODE_WEIGHT_CHANGED = 'node_weight_changed'
+"""Type of the change, when overall weight of a node changes."""
+ATTRIBUTE_ADDED = 'attribute_added'
+"""Type of the change, when an attribute gets added to a node."""
+ATTRIBUTE_UPDATED = 'attribute_updated'
+"""Type of the change, when value or weight of an attribute get updated."""
+ATTRIBUTE_REMOVED = 'attribute_removed'
+"""Type of the change, when an attribute gets removed from a node."""
+
+SYNC_PUSH_MODE = 'sync'
+"""Mode, in which each change of a node group waits until it is pushed to the proxy."""
+ASYNC_PUSH_MODE = 'async'
+"""Mode, in which changes of node groups are pushed to the proxy in background."""
+
+REPLAYED_OPERATIONS = {
+    'create_node': 'add_node',
+    'update_node': 'update_node',
+    'remove_node': 'remove_node',
+    'create_node_attribute': 'add_node_attribute',
+    'update_node_attribute': 'update_node_attribute',
+    'remove_node_attribute': 'remove_node_attribute'
+}
+"""Methods of a node group, that replay journaled operations of the business layer, by names of the operations."""
+
+VERSIONS_PER_SECOND = 1000000
+"""Count of versions, reserved for each second of uptime. Versions of node groups start from the time of the start
+of the application, multiplied by it, so versions and ETags, issued before a restart, are never issued again."""
+INDEX_BUCKET_SIZE = 1000
+"""Count of keys, that a bucket of the WeightIndex keeps after it gets split. A bucket gets split once it has twice as
+many keys, so an insertion or a removal moves a bounded count of keys, regardless of the count of nodes."""
+
+
 class BusinessProcessError(Exception):
     """Base class for an business layer exceptions."""
     pass
 
 
+class InvalidNodeGroupError(BusinessProcessError):
+    """Description of the node group is malformed.
+
+    Error, raised when a node group, that is being imported, has missing or invalid fields.
+
+    """
+    def __init__(self, group_name, reason):
+        """Constructor of the InvalidNodeGroupError.
+
+        Args:
+            group_name (str): Name of the group.
+            reason (str): Description of the problem.
+
+        """
+        message = "Invalid node group '{}': {}".format(group_name, reason)
+        super(InvalidNodeGroupError, self).__init__(message)
+
+
 class UnknownAttributeError(BusinessProcessError):
     """Attribute with the specified name was not found.
 
@@ -58,6 +130,38 @@ class UnknownNodeFromGroupAttributeError(BusinessProcessError):
         super(UnknownNodeFromGroupAttributeError, self).__init__(message)
 
 
+class InvalidNodeFromGroupAttributeError(BusinessProcessError):
+    """Error, that occurs when the value or the weight of an attribute of a node from the group is invalid."""
+    def __init__(self, group_name, node_name, attribute_name, reason):
+        """Constructor of the InvalidNodeFromGroupAttributeError.
+
+        Args:
+            group_name (str): Name of the group.
+            node_name (str): Name of the node.
+            attribute_name (str): Name of the attribute.
+            reason (str): Reason, why the attribute is invalid.
+
+        """
+        message = "Attribute '{}' of the node '{}' from group '{}' is invalid: {}".format(attribute_name, node_name,
+                                                                                         group_name, reason)
+        super(InvalidNodeFromGroupAttributeError, self).__init__(message)
+
+
+class InvalidWatchParameterError(BusinessProcessError):
+    """Error, that occurs when a parameter of watching for changes of node groups is invalid."""
+    def __init__(self, name, value, reason):
+        """Constructor of the InvalidWatchParameterError.
+
+        Args:
+            name (str): Name of the parameter.
+            value (object): Value of the parameter.
+            reason (str): Reason, why the value is invalid.
+
+        """
+        message = "Parameter '{}' of watching node groups should be {}, not {!r}".format(name, reason, value)
+        super(InvalidWatchParameterError, self).__init__(message)
+
+
 class UnknownNodeError(BusinessProcessError):
     """Node with the specified name was not found."""
     def __init__(self, node_name):
@@ -166,24 +270,53 @@ class NodeFromGroupAlreadyExists(BusinessProcessError):
         super(NodeFromGroupAlreadyExists, self).__init__(message)
 
 
+def to_finite_float(value):
+    """Convert the value to a float, that is neither infinite nor NaN, so weights, computed from it, can be summed
+    and ordered.
+
+    Args:
+        value (object): The value, e.g. a number or a string with a number.
+
+    Returns:
+        float: The converted value.
+
+    Raises:
+        ValueError: If the value is not a number or is not finite.
+        TypeError: If the value cannot be converted to a number.
+
+    """
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError("{} is not a finite number".format(value))
+    return number
+
+
 class Attribute(object):
     """An attribute of the Node.
 
     Attributes:
         __value (float): Current value of the Attribute.
         __weight (float): Static weight of the Attribute's value.
+        __listener (callable): Function, that gets called without arguments each time the current weight of the
+            Attribute changes.
 
     """
-    def __init__(self, value, weight):
+    def __init__(self, value, weight, listener=None):
         """Constructor of the Attribute.
 
         Args:
             value (float): Current value of the Attribute.
             weight (float): Static weight of the Attribute.
+            listener (callable): Function, that gets called without arguments each time the current weight of the
+                Attribute changes.
+
+        Raises:
+            ValueError: If the value or the weight is not a finite number.
 
         """
-        self.__value = float(value)
-        self.__weight = float(weight)
+        self.__value = to_finite_float(value)
+        self.__weight = to_finite_float(weight)
+        self.__listener = listener
 
     @property
     def value(self):
@@ -202,8 +335,13 @@ class Attribute(object):
         Args:
             value (float): Current value of the Attribute.
 
+        Raises:
+            ValueError: If the value is not a finite number.
+
         """
-        self.__value = float(value)
+        old_weight = self.current_weight
+        self.__value = to_finite_float(value)
+        self.__notify(old_weight)
 
     @property
     def weight(self):
@@ -222,8 +360,13 @@ class Attribute(object):
         Args:
             value (float): Static weight of the Attribute.
 
+        Raises:
+            ValueError: If the weight is not a finite number.
+
         """
-        self.__weight = float(value)
+        old_weight = self.current_weight
+        self.__weight = to_finite_float(value)
+        self.__notify(old_weight)
 
     @property
     def current_weight(self):
@@ -235,6 +378,16 @@ class Attribute(object):
         """
         return self.__value * self.__weight
 
+    def __notify(self, old_weight):
+        """Notify the listener of the Attribute about the change of its current weight.
+
+        Args:
+            old_weight (float): Current weight of the Attribute before the change.
+
+        """
+        if self.current_weight != old_weight and self.__listener is not None:
+            self.__listener()
+
 
 class Node(object):
     """A node of the cluster.
@@ -243,19 +396,26 @@ class Node(object):
         host (str): Host, on which node accepts incoming messages.
         __port (int): Port, on which node accepts incoming messages.
         __attributes (dict): Named list of attributes of the node.
+        __weight (float): Overall weight of the node, recomputed from its attributes on each change of them.
+        listener (callable): Function, that gets called with the old and the new overall weight of the node each time
+            it changes.
 
     """
-    def __init__(self, host, port):
+    def __init__(self, host, port, listener=None):
         """Constructor of the Node.
 
         Args:
             host (str): Host of the node.
             port (int): Port of the node.
+            listener (callable): Function, that gets called with the old and the new overall weight of the node each
+                time it changes.
 
         """
         self.host = host
         self.__port = int(port)
         self.__attributes = {}
+        self.__weight = 0.0
+        self.listener = listener
 
     @property
     def port(self):
@@ -328,7 +488,30 @@ class Node(object):
         """
         if name in self.__attributes:
             raise AttributeAlreadyExistsError(name)
-        self.__attributes[name] = Attribute(value, weight)
+        self.__attributes[name] = Attribute(value, weight, self.__update_weight)
+        self.__update_weight()
+
+    def load_attributes(self, attributes):
+        """Add attributes to the Node, that has none yet, and compute its overall weight once, e.g. when the Node
+        gets loaded from a compact representation.
+
+        Args:
+            attributes (list): Names, values and weights of attributes.
+
+        """
+        for name, value, weight in attributes:
+            self.__attributes[name] = Attribute(value, weight, self.__update_weight)
+        self.__update_weight()
+
+    def get_attribute_items(self):
+        """Return names, values and weights of attributes of the Node without building a named list for each of
+        them, e.g. to dump the Node.
+
+        Returns:
+            list: Names, values and weights of attributes.
+
+        """
+        return [(name, attribute.value, attribute.weight) for name, attribute in self.__attributes.items()]
 
     def update_attribute(self, name, value=None, weight=None):
         """Update an attribute information of the Node.
@@ -360,9 +543,20 @@ class Node(object):
 
         """
         try:
-            self.__attributes.pop(name)
+            del self.__attributes[name]
         except KeyError:
             raise UnknownAttributeError(name)
+        self.__update_weight()
+
+    @property
+    def attribute_count(self):
+        """Return the count of attributes of the Node.
+
+        Returns:
+            int: Count of attributes.
+
+        """
+        return len(self.__attributes)
 
     @property
     def weight(self):
@@ -372,7 +566,212 @@ class Node(object):
             float: Overall weight of the Node.
 
         """
-        return sum([attribute.current_weight for attribute in self.__attributes.values()])
+        return self.__weight
+
+    def __update_weight(self):
+        """Recompute overall weight of the Node from its attributes and notify the listener, if it has changed.
+
+        The weight is summed anew instead of being adjusted by differences, so it never accumulates rounding errors.
+
+        """
+        old_weight = self.__weight
+        self.__weight = math.fsum(attribute.current_weight for attribute in self.__attributes.values())
+        if self.__weight != old_weight and self.listener is not None:
+            self.listener(old_weight, self.__weight)
+
+
+class WeightIndex(object):
+    """Index of nodes of a node group, sorted by their weights.
+
+    Keeps (weight, sequence number, name) keys in sorted buckets, that are ordered by their greatest keys. On each
+    change of the weight of a node, the bucket of its key is found with a binary search over the greatest keys, and
+    the key is moved with a binary search within the bucket, so a change moves at most a few thousand keys instead of
+    a half of all of them. Nodes with equal weights are ordered by the sequence, in which they were added to the
+    index. Weights should be finite, but a key is never moved or removed unless it is the very key of the node, so
+    a weight, that breaks the order, cannot corrupt keys of other nodes.
+
+    Attributes:
+        __keys (dict): Named list of keys of nodes in the buckets.
+        __buckets (list): Sorted lists of keys, that hold keys of all nodes in the ascending order of their weights.
+            None of them is empty.
+        __maxes (list): The greatest keys of the buckets.
+        __count (int): Count of nodes in the index.
+        __sequence (int): Sequence number of the next added node.
+
+    """
+    def __init__(self, weights=()):
+        """Constructor of the WeightIndex.
+
+        Args:
+            weights (iterable): Names and weights of nodes in the order they were added to the node group.
+
+        """
+        self.__keys = {name: (weight, sequence, name) for sequence, (name, weight) in enumerate(weights)}
+        keys = sorted(self.__keys.values())
+        self.__buckets = [keys[i:i + INDEX_BUCKET_SIZE] for i in range(0, len(keys), INDEX_BUCKET_SIZE)]
+        self.__maxes = [bucket[-1] for bucket in self.__buckets]
+        self.__count = len(keys)
+        self.__sequence = len(keys)
+
+    def __len__(self):
+        return self.__count
+
+    def add(self, name, weight):
+        """Add the node to the index.
+
+        Args:
+            name (str): Name of the node.
+            weight (float): Weight of the node.
+
+        """
+        key = (weight, self.__sequence, name)
+        self.__sequence += 1
+        self.__keys[name] = key
+        self.__insert(key)
+
+    def update(self, name, weight):
+        """Move the node to the position, that corresponds to its new weight.
+
+        Args:
+            name (str): Name of the node.
+            weight (float): New weight of the node.
+
+        """
+        key = self.__keys[name]
+        if key[0] == weight:
+            return
+        self.__delete(*self.__find(key))
+        key = (weight, key[1], name)
+        self.__keys[name] = key
+        self.__insert(key)
+
+    def remove(self, name):
+        """Remove the node from the index.
+
+        Args:
+            name (str): Name of the node.
+
+        """
+        self.__delete(*self.__find(self.__keys.pop(name)))
+
+    def get_rank(self, name):
+        """Return the position of the node in the ascending order of weights.
+
+        Args:
+            name (str): Name of the node.
+
+        Returns:
+            int: Rank of the node, starting with 0 for the lightest one.
+
+        Raises:
+            UnknownNodeError: If the node with the specified name was not found.
+
+        """
+        try:
+            bucket, position = self.__find(self.__keys[name])
+        except KeyError:
+            raise UnknownNodeError(name)
+        return sum(len(preceding) for preceding in self.__buckets[:bucket]) + position
+
+    def get_top(self, count):
+        """Return names of the heaviest nodes.
+
+        Args:
+            count (int): Count of nodes to return.
+
+        Returns:
+            list: Names of nodes in the descending order of their weights.
+
+        """
+        keys = chain.from_iterable(reversed(bucket) for bucket in reversed(self.__buckets))
+        return [key[2] for key in islice(keys, max(count, 0))]
+
+    def get_percentile(self, percent):
+        """Return the weight, that the specified percent of nodes does not exceed.
+
+        Args:
+            percent (float): Percent of nodes from 0 to 100.
+
+        Returns:
+            float: Weight of the nearest-ranked node. None if the index is empty.
+
+        """
+        if not self.__count:
+            return None
+        position = min(max(int(math.ceil(self.__count * float(percent) / 100)) - 1, 0), self.__count - 1)
+        for bucket in self.__buckets:
+            if position < len(bucket):
+                return bucket[position][0]
+            position -= len(bucket)
+
+    def get_names(self):
+        """Return names of all nodes in the ascending order of their weights.
+
+        Returns:
+            list: Names of nodes.
+
+        """
+        return [key[2] for bucket in self.__buckets for key in bucket]
+
+    def __insert(self, key):
+        """Insert the key into the bucket, its weight belongs to, and split the bucket, if it gets too large.
+
+        Args:
+            key (tuple): Key of a node.
+
+        """
+        self.__count += 1
+        if not self.__buckets:
+            self.__buckets.append([key])
+            self.__maxes.append(key)
+            return
+        index = min(bisect_left(self.__maxes, key), len(self.__maxes) - 1)
+        bucket = self.__buckets[index]
+        insort(bucket, key)
+        self.__maxes[index] = bucket[-1]
+        if len(bucket) > 2 * INDEX_BUCKET_SIZE:
+            self.__buckets.insert(index + 1, bucket[INDEX_BUCKET_SIZE:])
+            del bucket[INDEX_BUCKET_SIZE:]
+            self.__maxes.insert(index, bucket[-1])
+
+    def __delete(self, index, position):
+        """Delete the key at the specified position of the specified bucket, and the bucket, if it gets empty.
+
+        Args:
+            index (int): Index of the bucket.
+            position (int): Position of the key in the bucket.
+
+        """
+        self.__count -= 1
+        bucket = self.__buckets[index]
+        del bucket[position]
+        if bucket:
+            self.__maxes[index] = bucket[-1]
+        else:
+            del self.__buckets[index]
+            del self.__maxes[index]
+
+    def __find(self, key):
+        """Return the bucket of the key and its position in the bucket.
+
+        The key is looked up with a binary search first. If the key at the found position is not the same key,
+        because the keys are out of order, all buckets are scanned for it.
+
+        Args:
+            key (tuple): Key of a node, that is in the index.
+
+        Returns:
+            tuple: Index of the bucket and position of the key in it.
+
+        """
+        index = bisect_left(self.__maxes, key)
+        if index < len(self.__maxes):
+            bucket = self.__buckets[index]
+            position = bisect_left(bucket, key)
+            if position < len(bucket) and bucket[position] is key:
+                return index, position
+        return next((index, position) for index, bucket in enumerate(self.__buckets)
+                    for position, other in enumerate(bucket) if other is key)
 
 
 class NodeGroup(object):
@@ -380,22 +779,74 @@ class NodeGroup(object):
 
     Attributes:
         __nodes (dict): Named list of nodes of the NodeGroup.
+        __weight (float): Overall weight of all nodes of the NodeGroup, adjusted on each change of their weights.
+        __adjustments (int): Count of adjustments of the overall weight since it was summed anew. Once there are as
+            many of them as nodes, the weight is summed anew, so rounding errors do not accumulate.
+        __index (WeightIndex): Index of nodes of the NodeGroup, sorted by their weights.
+        __attribute_count (int): Count of attributes of all nodes of the NodeGroup.
 
     """
     def __init__(self):
         """Constructor of the NodeGroup."""
         self.__nodes = {}
+        self.__weight = 0.0
+        self.__adjustments = 0
+        self.__index = WeightIndex()
+        self.__attribute_count = 0
+
+    @property
+    def node_count(self):
+        """Return the count of nodes of the NodeGroup.
+
+        Returns:
+            int: Count of nodes.
+
+        """
+        return len(self.__nodes)
+
+    @property
+    def attribute_count(self):
+        """Return the count of attributes of all nodes of the NodeGroup.
+
+        Returns:
+            int: Count of attributes.
+
+        """
+        return self.__attribute_count
+
+    @property
+    def weight(self):
+        """Return overall weight of all nodes of the NodeGroup.
+
+        Returns:
+            float: Overall weight of the NodeGroup.
+
+        """
+        return self.__weight
+
+    @property
+    def index(self):
+        """Return the index of nodes of the NodeGroup, sorted by their weights.
+
+        Returns:
+            WeightIndex: Index of nodes.
+
+        """
+        return self.__index
 
     def get_nodes_list(self):
-        """Return the list of nodes of the NodeGroup.
+        """Return the list of nodes of the NodeGroup with their names, hosts, ports and weights in the ascending
+        order of their weights.
 
         Returns:
             list: List of nodes.
 
         """
         nodes = []
-        for node in self.__nodes.values():
+        for name in self.__index.get_names():
+            node = self.__nodes[name]
             node_info = {
+                'name': name,
                 'host': node.host,
                 'port': node.port,
                 'weight': node.weight
@@ -403,6 +854,50 @@ class NodeGroup(object):
             nodes.append(node_info)
         return nodes
 
+    def dump(self):
+        """Return a compact representation of the NodeGroup, that can be loaded back with load().
+
+        Nodes are listed by 'nodes', 'hosts' and 'ports' in the same order. Each of 'attributes' refers to the nodes,
+        that have it, by their positions in that order, followed by values and weights of the attribute of those
+        nodes.
+
+        Returns:
+            dict: Compact representation of the NodeGroup.
+
+        """
+        names, hosts, ports, attributes = [], [], [], {}
+        for position, (name, node) in enumerate(self.__nodes.items()):
+            names.append(name)
+            hosts.append(node.host)
+            ports.append(node.port)
+            for attribute_name, value, weight in node.get_attribute_items():
+                positions, values, weights = attributes.setdefault(attribute_name, ([], [], []))
+                positions.append(position)
+                values.append(value)
+                weights.append(weight)
+        return {'nodes': names, 'hosts': hosts, 'ports': ports, 'attributes': attributes}
+
+    def load(self, dump):
+        """Fill the empty NodeGroup from its compact representation.
+
+        Args:
+            dump (dict): Compact representation of the NodeGroup, returned by dump().
+
+        """
+        node_attributes = [[] for _ in dump['nodes']]
+        for attribute_name, (positions, values, weights) in dump['attributes'].items():
+            for position, value, weight in zip(positions, values, weights):
+                node_attributes[position].append((attribute_name, value, weight))
+        for name, host, port, attributes in zip(dump['nodes'], dump['hosts'], dump['ports'], node_attributes):
+            node = Node(host, port)
+            node.load_attributes(attributes)
+            node.listener = partial(self.__change_weight, name)
+            self.__nodes[name] = node
+        nodes = self.__nodes.values()
+        self.__sum_weights()
+        self.__attribute_count = sum(node.attribute_count for node in nodes)
+        self.__index = WeightIndex((name, node.weight) for name, node in self.__nodes.items())
+
     def get_nodes(self):
         """Return named list of node of the NodeGroup.
 
@@ -444,6 +939,24 @@ class NodeGroup(object):
         except KeyError:
             raise UnknownNodeError(name)
 
+    def get_node_weight(self, name):
+        """Return overall weight of the node of the NodeGroup.
+
+        Args:
+            name (str): Name of the node.
+
+        Returns:
+            float: Weight of the node.
+
+        Raises:
+            UnknownNodeError: If the node with the specified name was not found.
+
+        """
+        try:
+            return self.__nodes[name].weight
+        except KeyError:
+            raise UnknownNodeError(name)
+
     def add_node(self, name, host, port):
         """Add a node to the NodeGroup.
 
@@ -458,7 +971,8 @@ class NodeGroup(object):
         """
         if name in self.__nodes:
             raise NodeAlreadyExistsError(name)
-        self.__nodes[name] = Node(host, port)
+        self.__nodes[name] = Node(host, port, partial(self.__change_weight, name))
+        self.__index.add(name, 0.0)
 
     def update_node(self, name, host=None, port=None):
         """Update an information of the node from the NodeGroup.
@@ -490,9 +1004,12 @@ class NodeGroup(object):
 
         """
         try:
-            self.__nodes.pop(name)
+            node = self.__nodes.pop(name)
         except KeyError:
             raise UnknownNodeError(name)
+        self.__index.remove(name)
+        self.__adjust_weight(node.weight, 0.0)
+        self.__attribute_count -= node.attribute_count
 
     def get_node_attributes(self, node_name):
         """Return named list of node attributes.
@@ -556,6 +1073,7 @@ class NodeGroup(object):
             raise UnknownNodeError(node_name)
         except AttributeAlreadyExistsError:
             raise NodeAttributeAlreadyExistsError(node_name, attribute_name)
+        self.__attribute_count += 1
 
     def update_node_attribute(self, node_name, attribute_name, value=None, weight=None):
         """Update an information of the attribute of the node.
@@ -598,6 +1116,38 @@ class NodeGroup(object):
             raise UnknownNodeError(node_name)
         except UnknownAttributeError:
             raise UnknownNodeAttributeError(node_name, attribute_name)
+        self.__attribute_count -= 1
+
+    def __change_weight(self, name, old_weight, new_weight):
+        """Adjust overall weight of the NodeGroup to the changed weight of the node and move the node in the index.
+
+        Args:
+            name (str): Name of the changed node.
+            old_weight (float): Weight of the node before the change.
+            new_weight (float): Weight of the node after the change.
+
+        """
+        self.__adjust_weight(old_weight, new_weight)
+        self.__index.update(name, new_weight)
+
+    def __adjust_weight(self, old_weight, new_weight):
+        """Adjust overall weight of the NodeGroup to the changed weight of one of its nodes. Sum it anew once it was
+        adjusted as many times as there are nodes, so the cost stays constant on average, or if it is not finite.
+
+        Args:
+            old_weight (float): Weight of the node before the change.
+            new_weight (float): Weight of the node after the change.
+
+        """
+        self.__weight += new_weight - old_weight
+        self.__adjustments += 1
+        if self.__adjustments >= len(self.__nodes) or not math.isfinite(self.__weight):
+            self.__sum_weights()
+
+    def __sum_weights(self):
+        """Sum overall weight of the NodeGroup anew from weights of its nodes."""
+        self.__weight = math.fsum(node.weight for node in self.__nodes.values())
+        self.__adjustments = 0
 
 
 class NodeGroupRepository(object):
@@ -666,85 +1216,743 @@ class NodeGroupRepository(object):
             raise UnknownNodeGroupError(name)
 
 
-class BusinessLayerFacade(object):
-    """A facade of the business layer.
-
-    An interface for business processes execution.
+class PendingPush(object):
+    """A push of the node group to the proxy, that is scheduled but has not started yet.
 
     Attributes:
-        __integration_layer (IntegrationLayer): An integration layer of the application.
-        __node_group_repository (NodeGroupRepository): Repository of NodeGroups.
+        future (Future): Future, that gets resolved once the push is finished.
+        created (float): Moment of time (according to the event loop clock) of the first change, the push delivers.
+        deadline (float): Latest moment of time (according to the event loop clock), the push should start at.
+        handle (TimerHandle): Handle of the scheduled start of the push.
 
     """
-    def __init__(self, integration_layer):
-        """Constructor of the BusinessLayerFacade.
+    def __init__(self, future, created, deadline):
+        """Constructor of the PendingPush.
 
         Args:
-            integration_layer (IntegrationLayer): An integration layer of the application.
+            future (Future): Future, that gets resolved once the push is finished.
+            created (float): Moment of time (according to the event loop clock) of the first change, the push
+                delivers.
+            deadline (float): Latest moment of time (according to the event loop clock), the push should start at.
 
         """
-        self.__integration_layer = integration_layer
-        self.__node_group_repository = NodeGroupRepository()
+        self.future = future
+        self.created = created
+        self.deadline = deadline
+        self.handle = None
 
-    async def get_node_groups(self):
-        """Return a named list of all NodeGroups.
 
-        Note: awaitable method.
+class NodeGroupPushScheduler(object):
+    """Coalesces pushes of node groups to the proxy.
 
-        Returns:
-            dict: Named list of all NodeGroups.
+    A change of a node group, that has no push pending or in flight, starts a push of it right away, so a single
+    change is not delayed. A change, that is made while a push of the group is in flight, schedules the next push
+    after a window of time instead. Each following change of the same group within the window moves the push
+    further, but no more than max_delay after the first change. Once the push starts, the latest state of the group
+    is submitted, so all changes, that were made in between, cost a single push. Pushes of the same group never
+    overlap and go out in order.
+
+    Attributes:
+        __push (callable): Awaitable function, that submits the latest state of the group with the specified name.
+        __window (float): Time in seconds to wait for further changes of the group, that is being pushed, before
+            pushing it again.
+        __max_delay (float): Maximum time in seconds between the first change of the group and its push.
+        __pending (dict): Named list of pushes, that are scheduled but have not started yet.
+        __in_flight (dict): Named list of pushes, that have started but have not finished yet.
+        __failed (int): Count of pushes, that have failed.
+
+    """
+    def __init__(self, push, window, max_delay):
+        """Constructor of the NodeGroupPushScheduler.
+
+        Args:
+            push (callable): Awaitable function, that submits the latest state of the group with the specified name.
+            window (float): Time in seconds to wait for further changes of the group, that is being pushed, before
+                pushing it again.
+            max_delay (float): Maximum time in seconds between the first change of the group and its push.
 
         """
-        node_groups = self.__node_group_repository.get_node_groups()
-        groups = {}
-        for name, node_group in node_groups.items():
-            groups[name] = {'nodes': node_group.get_nodes()}
-        return groups
+        self.__push = push
+        self.__window = window
+        self.__max_delay = max(max_delay, window)
+        self.__pending = {}
+        self.__in_flight = {}
+        self.__failed = 0
 
-    async def get_node_group(self, group_name):
-        """Return the node group with the specified name.
+    def get_stats(self):
+        """Return the state of the queue of pushes.
 
-        Note: awaitable method.
+        Returns:
+            dict: Count of node groups, that have changes, which are not pushed yet ('depth'), of which 'pending'
+                have not started and 'in_flight' have; the time in seconds since the oldest of those changes ('lag')
+                and the count of pushes, that have 'failed'.
+
+        """
+        pushes = list(self.__pending.values()) + list(self.__in_flight.values())
+        now = asyncio.get_event_loop().time()
+        return {
+            'depth': len(set(self.__pending) | set(self.__in_flight)),
+            'pending': len(self.__pending),
+            'in_flight': len(self.__in_flight),
+            'lag': now - min(push.created for push in pushes) if pushes else 0.0,
+            'failed': self.__failed
+        }
+
+    def schedule(self, name):
+        """Schedule a push of the node group with the specified name.
 
         Args:
-            group_name (str): Name of the NodeGroup.
+            name (str): Name of the node group.
 
         Returns:
-            dict: Node group with the specified name.
+            Future: Future, that gets resolved once the latest state of the group is pushed or raises ProxyError
+                if the push has failed.
+
+        """
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        pending = self.__pending.get(name)
+        if pending is None:
+            pending = PendingPush(loop.create_future(), now, now + self.__max_delay)
+            pending.future.add_done_callback(partial(self.__report, name))
+            self.__pending[name] = pending
+            if name not in self.__in_flight:
+                self.__start(name)
+                return pending.future
+        else:
+            pending.handle.cancel()
+        pending.handle = loop.call_at(min(now + self.__window, pending.deadline), self.__start, name)
+        return pending.future
+
+    async def flush(self, name=None):
+        """Push the specified node group right away, without waiting for the end of its window, and wait until
+        all its pushes, that have already started, are finished.
+
+        Note: awaitable method.
+
+        Args:
+            name (str): Name of the node group. If not specified, all node groups are pushed.
 
         Raises:
-            UnknownNodeGroupError: If there is no node group with the specified name.
+            ProxyError: If one of the pushes has failed.
 
         """
-        node_group = self.__node_group_repository.get_node_group(group_name)
-        return {'nodes': node_group.get_nodes()}
-
-    async def create_node_group(self, group_name):
-        """Create a node group with the specified name.
+        names = list(set(self.__pending) | set(self.__in_flight)) if name is None else [name]
+        for name_to_push in names:
+            if name_to_push in self.__pending:
+                self.__start(name_to_push)
+        futures = [self.__in_flight[name].future for name in names if name in self.__in_flight]
+        if futures:
+            await asyncio.gather(*futures)
 
-        Note: awaitable method.
+    def __start(self, name):
+        """Start the scheduled push of the node group.
 
         Args:
-            group_name (str): Name of the group.
+            name (str): Name of the node group.
 
         """
-        node_group = NodeGroup()
-        self.__node_group_repository.save(group_name, node_group)
+        pending = self.__pending.pop(name)
+        if pending.handle is not None:
+            pending.handle.cancel()
+        previous = self.__in_flight.get(name)
+        self.__in_flight[name] = pending
+        asyncio.ensure_future(self.__run(name, pending, previous))
 
-    async def remove_node_group(self, group_name):
-        """Remove a node group with the specified name and notify a proxy about it.
+    async def __run(self, name, push, previous):
+        """Push the latest state of the node group once the previous push of it is finished.
 
         Note: awaitable method.
 
         Args:
-            group_name (str): Name of the group.
+            name (str): Name of the node group.
+            push (PendingPush): The push to resolve with its outcome.
+            previous (PendingPush): The previous push of the same group.
 
-        Raises:
-            ProxyError: If application was not able to notify a proxy.
+        """
+        if previous is not None:
+            await asyncio.wait([previous.future])
+        try:
+            await self.__push(name)
+            push.future.set_result(None)
+        except Exception as e:
+            push.future.set_exception(e)
+        finally:
+            if self.__in_flight.get(name) is push:
+                del self.__in_flight[name]
+
+    def __report(self, name, future):
+        """Count the failure of the finished push of the node group, so it is reported by get_stats(), even if
+        nobody awaits the push.
+
+        Args:
+            name (str): Name of the node group.
+            future (Future): Future of the push.
+
+        """
+        if not future.cancelled() and future.exception() is not None:
+            self.__failed += 1
+
+
+def get_current_task():
+    """Return the task, that is running in the event loop of the current thread.
+
+    Returns:
+        Task: The task. None if no task is running.
+
+    """
+    current_task = getattr(asyncio, 'current_task', None) or asyncio.Task.current_task
+    return current_task()
+
+
+class DeferredPushes(object):
+    """Asynchronous context manager, that defers pushes of node groups, changed by the task, that has entered it.
+
+    Each request should use its own context. Pushes are deferred only for changes, made by the task, that has entered
+    the context, so concurrent requests are pushed as usual. If the task enters another context while it is already
+    in one, the inner context joins the outer one. Once the outermost context is exited, each of the groups, the task
+    has changed, is pushed once, and the exit waits until all of them are delivered, unless pushes are made in
+    background. A failed push is raised from the exit, unless pushes were made with push() before.
+
+    Attributes:
+        __push_scheduler (NodeGroupPushScheduler): Scheduler of pushes of node groups to the proxy.
+        __contexts (dict): Contexts, that are entered, by their tasks. Shared by all contexts of the same facade.
+        __wait (bool): False if pushes should not be waited for.
+        __task (Task): Task, that has entered the context. None if the context has joined an outer one or was not
+            entered yet.
+        __names (set): Names of node groups, that were changed while pushes were deferred.
+        __recent (set): Names of node groups, that were changed since the last call of pop_deferred().
+        __pushed (bool): True if remembered node groups were pushed already.
+
+    """
+    def __init__(self, push_scheduler, contexts, wait=True):
+        """Constructor of the DeferredPushes.
+
+        Args:
+            push_scheduler (NodeGroupPushScheduler): Scheduler of pushes of node groups to the proxy.
+            contexts (dict): Contexts, that are entered, by their tasks. Shared by all contexts of the same facade.
+            wait (bool): False if pushes should not be waited for.
+
+        """
+        self.__push_scheduler = push_scheduler
+        self.__contexts = contexts
+        self.__wait = wait
+        self.__task = None
+        self.__names = set()
+        self.__recent = set()
+        self.__pushed = False
+
+    def defer(self, name):
+        """Remember the changed node group.
+
+        Args:
+            name (str): Name of the node group.
+
+        """
+        self.__names.add(name)
+        self.__recent.add(name)
+
+    def pop_deferred(self):
+        """Return names of node groups, that were changed since the previous call, e.g. by a single operation of
+        a batch.
+
+        Returns:
+            set: Names of node groups. Empty if the context has joined an outer one.
+
+        """
+        recent, self.__recent = self.__recent, set()
+        return recent
+
+    async def push(self):
+        """Stop deferring pushes and push each of the remembered node groups once.
+
+        Note: awaitable method.
+
+        Returns:
+            dict: Errors of failed pushes by names of their node groups. Empty if pushes are not waited for, or the
+                context has joined an outer one.
+
+        """
+        if self.__task is None or self.__pushed:
+            return {}
+        self.__pushed = True
+        del self.__contexts[self.__task]
+        names = list(self.__names)
+        for name in names:
+            self.__push_scheduler.schedule(name)
+        if not self.__wait or not names:
+            return {}
+        results = await asyncio.gather(*[self.__push_scheduler.flush(name) for name in names],
+                                       return_exceptions=True)
+        return {name: result for name, result in zip(names, results) if isinstance(result, Exception)}
+
+    async def __aenter__(self):
+        task = get_current_task()
+        if task not in self.__contexts:
+            self.__task = task
+            self.__contexts[task] = self
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        errors = await self.push()
+        if errors and exc_type is None:
+            raise next(iter(errors.values()))
+
+
+class ChangeLog(object):
+    """Log of the most recent changes of node groups.
+
+    Each change is a dict with a 'type', a 'group' and a 'version' of all node groups right after the change along
+    with details specific to the type of the change. Changes can be awaited by their version.
+
+    Attributes:
+        __changes (deque): The most recent changes in the order they were made.
+        __lost_version (int): The latest version, some changes of which were dropped from the log.
+        __waiters (set): Futures of callers, that wait for the next change.
+
+    """
+    def __init__(self, size, version=0):
+        """Constructor of the ChangeLog.
+
+        Args:
+            size (int): Count of the most recent changes to keep.
+            version (int): Current version of all node groups. Callers, that know earlier versions, have to resync.
+
+        """
+        self.__changes = deque(maxlen=size)
+        self.__lost_version = version
+        self.__waiters = set()
+
+    def append(self, change):
+        """Append the change to the log and wake up all callers, that wait for it.
+
+        Args:
+            change (dict): The change.
+
+        """
+        if len(self.__changes) == self.__changes.maxlen:
+            self.__lost_version = self.__changes[0]['version']
+        self.__changes.append(change)
+        waiters, self.__waiters = self.__waiters, set()
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def get_changes(self, since, version):
+        """Return all changes, made after the specified version.
+
+        Args:
+            since (int): Version, after which changes should be returned.
+            version (int): Current version of all node groups.
+
+        Returns:
+            list: Changes in the order they were made. None if some of the changes are not kept in the log anymore,
+                or the specified version is unknown.
+
+        """
+        if since == version:
+            return []
+        if since > version or since < self.__lost_version:
+            return None
+        return [change for change in self.__changes if change['version'] > since]
+
+    def reset(self, version):
+        """Drop all changes from the log, so callers, that know versions before the specified one, have to resync.
+
+        Args:
+            version (int): Current version of all node groups.
+
+        """
+        self.__changes.clear()
+        self.__lost_version = version
+
+    async def wait(self, timeout):
+        """Wait for the next change.
+
+        Note: awaitable method.
+
+        Args:
+            timeout (float): Maximum time in seconds to wait for.
+
+        """
+        waiter = asyncio.get_event_loop().create_future()
+        self.__waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.__waiters.discard(waiter)
+
+
+class BusinessLayerFacade(object):
+    """A facade of the business layer.
+
+    An interface for business processes execution.
+
+    Changes of node groups are submitted to the proxy through a NodeGroupPushScheduler, so changes of the same group,
+    that happen close to each other in time, cost a single push. In the asynchronous push mode, business processes
+    return once node groups are changed in memory, and pushes are delivered in background.
+
+    Attributes:
+        __integration_layer (IntegrationLayer): An integration layer of the application.
+        __node_group_factory (callable): Function, that creates an empty node group.
+        __node_group_repository (NodeGroupRepository): Repository of NodeGroups.
+        __push_mode (str): SYNC_PUSH_MODE or ASYNC_PUSH_MODE.
+        __push_scheduler (NodeGroupPushScheduler): Scheduler of pushes of node groups to the proxy.
+        __deferred_pushes (dict): Contexts, that defer pushes of node groups until their exit, by tasks, that have
+            entered them.
+        __version (int): Version of all node groups, that gets incremented on each change of any of them. Starts
+            from the time of the start of the application, so it keeps growing across restarts.
+        __versions (dict): Named list of versions of node groups. Version of a group is the version of all node
+            groups right after the latest change of the group.
+        __change_log (ChangeLog): Log of the most recent changes of node groups.
+        __journal (Journal): Durable journal of changes of node groups. None if node groups are kept in memory only.
+        __dumps (dict): Named list of versions of node groups along with their compact representations, taken for
+            the latest snapshot, so groups, that have not changed since, are not dumped again.
+
+    """
+    def __init__(self, integration_layer, push_window=0.02, push_max_delay=0.2, node_group_factory=NodeGroup,
+                 change_log_size=10000, journal=None, push_mode=SYNC_PUSH_MODE):
+        """Constructor of the BusinessLayerFacade.
+
+        Args:
+            integration_layer (IntegrationLayer): An integration layer of the application.
+            push_window (float): Time in seconds to wait for further changes of a node group, that is being pushed
+                to the proxy, before pushing it again.
+            push_max_delay (float): Maximum time in seconds between the first change of a node group and its push to
+                the proxy.
+            node_group_factory (callable): Function, that creates an empty node group, e.g. NodeGroup or
+                ColumnarNodeGroup.
+            change_log_size (int): Count of the most recent changes of node groups to keep for watchers.
+            journal (Journal): Durable journal of changes of node groups. If specified, each change is synced to it
+                before it gets pushed to the proxy, and node groups should be restored from it with restore() before
+                serving requests.
+            push_mode (str): SYNC_PUSH_MODE to wait until each change is pushed to the proxy, or ASYNC_PUSH_MODE to
+                push changes in background.
+
+        """
+        self.__integration_layer = integration_layer
+        self.__node_group_factory = node_group_factory
+        self.__node_group_repository = NodeGroupRepository()
+        self.__push_mode = push_mode or SYNC_PUSH_MODE
+        self.__push_scheduler = NodeGroupPushScheduler(self.__submit_node_group, push_window, push_max_delay)
+        self.__deferred_pushes = {}
+        self.__version = int(time.time() * VERSIONS_PER_SECOND)
+        self.__versions = {}
+        self.__change_log = ChangeLog(change_log_size, self.__version)
+        self.__journal = journal
+        self.__dumps = {}
+
+    def restore(self):
+        """Restore node groups from the latest snapshot in the journal and replay operations, journaled after it.
+
+        Watchers, that know any earlier version of node groups, are asked to resync. Versions continue from the
+        latest journaled one, unless the time of the start of the application is later.
+
+        The cyclic garbage collector is paused meanwhile, since restored nodes and attributes create no garbage, but
+        allocation of that many objects triggers repeated collections, which would take most of the time.
+
+        """
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            start_version = self.__version
+            snapshot, records = self.__journal.load()
+            if snapshot is not None:
+                self.__version = snapshot['version']
+                for group_name, dump in snapshot['node_groups'].items():
+                    node_group = self.__node_group_factory()
+                    node_group.load(dump)
+                    self.__node_group_repository.save(group_name, node_group)
+            for record in records:
+                self.__replay(record[1], record[2], record[3:])
+                self.__version = record[0]
+            self.__version = max(self.__version, start_version)
+            for group_name in self.__node_group_repository.get_node_groups():
+                self.__versions[group_name] = self.__version
+            self.__change_log.reset(self.__version)
+        finally:
+            if collecting:
+                gc.enable()
+        print("Restored {} node groups of version {}".format(len(self.__versions), self.__version))
+
+    async def push_node_groups(self):
+        """Push all node groups to the proxy, e.g. after they were restored, and wait until they are delivered.
+
+        Note: awaitable method.
+
+        Raises:
+            ProxyError: If application was not able to notify a proxy.
+
+        """
+        for group_name in self.__node_group_repository.get_node_groups():
+            self.__push_scheduler.schedule(group_name)
+        await self.__push_scheduler.flush()
+
+    def defer_pushes(self):
+        """Return a new context, within which changes of node groups, made by the task, that enters it, are not pushed
+        to the proxy. Each changed group is pushed once on exit from the context.
+
+        Returns:
+            DeferredPushes: Asynchronous context manager.
+
+        """
+        return DeferredPushes(self.__push_scheduler, self.__deferred_pushes, wait=self.__push_mode != ASYNC_PUSH_MODE)
+
+    async def flush_node_groups(self):
+        """Push all node groups with pending changes to the proxy right away and wait until they are delivered.
+
+        Note: awaitable method.
+
+        Raises:
+            ProxyError: If application was not able to notify a proxy.
+
+        """
+        await self.__push_scheduler.flush()
+
+    async def flush_node_group(self, group_name):
+        """Push the node group with the specified name to the proxy right away, if it has pending changes, and wait
+        until it is delivered.
+
+        Note: awaitable method.
+
+        Args:
+            group_name (str): Name of the group.
+
+        Raises:
+            ProxyError: If application was not able to notify a proxy.
+
+        """
+        await self.__push_scheduler.flush(group_name)
+
+    async def get_push_queue(self):
+        """Return the state of the queue of pushes of node groups to the proxy.
+
+        Note: awaitable method.
+
+        Returns:
+            dict: The 'mode' of pushes, count of node groups with changes, that are not pushed yet ('depth'), of which
+                'pending' have not started and 'in_flight' have; the time in seconds since the oldest of those changes
+                ('lag') and the count of pushes, that have 'failed'.
+
+        """
+        stats = self.__push_scheduler.get_stats()
+        stats['mode'] = self.__push_mode
+        return stats
+
+    def get_cardinalities(self):
+        """Return counts of node groups, nodes and attributes.
+
+        Returns:
+            dict: Counts of 'node_groups', 'nodes' and 'attributes'.
+
+        """
+        node_groups = self.__node_group_repository.get_node_groups().values()
+        return {
+            'node_groups': len(node_groups),
+            'nodes': sum(node_group.node_count for node_group in node_groups),
+            'attributes': sum(node_group.attribute_count for node_group in node_groups)
+        }
+
+    async def get_push_stats(self):
+        """Return counts of pushes of node groups to the proxy, that were sent and that were suppressed, because
+        they would not change what the proxy sees.
+
+        Note: awaitable method.
+
+        Returns:
+            dict: Counts of 'sent' and 'suppressed' pushes.
+
+        """
+        return self.__integration_layer.get_proxy_stats()
+
+    def get_node_groups_version(self):
+        """Return the version of all node groups, that gets incremented on each change of any of them.
+
+        Returns:
+            int: Version of all node groups.
+
+        """
+        return self.__version
+
+    def get_node_group_version(self, group_name, node_name=None, attribute_name=None):
+        """Return the version of the node group with the specified name, that is also a version of all its nodes and
+        their attributes. The version gets incremented on each change of the group and never repeats, even if the
+        group gets removed and created again.
+
+        Args:
+            group_name (str): Name of the group.
+            node_name (str): Name of a node of the group. Nodes share the version of their group.
+            attribute_name (str): Name of an attribute of the node. Attributes share the version of their group.
+
+        Returns:
+            int: Version of the node group.
+
+        Raises:
+            UnknownNodeGroupError: If there is no node group with the specified name.
+
+        """
+        try:
+            return self.__versions[group_name]
+        except KeyError:
+            raise UnknownNodeGroupError(group_name)
+
+    async def get_node_groups(self, watch=None, since=None, timeout=None):
+        """Return a named list of all NodeGroups.
+
+        If watch is 'true', return changes of node groups, made after the specified version, instead.
+        See watch_node_groups() for details.
+
+        Note: awaitable method.
+
+        Args:
+            watch (str): 'true' to return changes of node groups instead of node groups.
+            since (str): Version of node groups, after which changes should be returned.
+            timeout (str): Maximum time in seconds to wait for changes.
+
+        Returns:
+            dict: Named list of all NodeGroups or changes of them.
+
+        """
+        if watch in ('true', '1', True):
+            return await self.watch_node_groups(since, timeout)
+        node_groups = self.__node_group_repository.get_node_groups()
+        return {name: {'nodes': node_group.get_nodes()} for name, node_group in node_groups.items()}
+
+    async def watch_node_groups(self, since=None, timeout=None):
+        """Return changes of node groups, made after the specified version. If there are no such changes yet, wait
+        for them up to the specified timeout.
+
+        Versions are the same as the ones returned by get_node_groups_version(). If the version is not specified,
+        no changes are returned and the current version is returned right away, so the caller can start watching
+        from it. If some of the changes since the specified version are not known anymore, e.g. the version was
+        issued before a restart of the application, 'resync' is set to True and the caller should load node groups
+        anew.
+
+        Note: awaitable method.
+
+        Args:
+            since (str): Version of node groups, after which changes should be returned.
+            timeout (str): Maximum time in seconds to wait for changes. Default is 30, maximum is 60.
+
+        Returns:
+            dict: The 'version' of node groups, up to which changes are returned, a list of 'changes' and a 'resync'
+                flag.
+
+        Raises:
+            InvalidWatchParameterError: If the version is not an integer or the timeout is not a non-negative number.
+
+        """
+        if since is None:
+            return {'version': self.__version, 'changes': [], 'resync': False}
+        try:
+            since = int(since)
+        except (TypeError, ValueError):
+            raise InvalidWatchParameterError('since', since, 'an integer version')
+        try:
+            seconds = float(30 if timeout in (None, '') else timeout)
+        except (TypeError, ValueError):
+            seconds = -1.0
+        if not 0 <= seconds < math.inf:
+            raise InvalidWatchParameterError('timeout', timeout, 'a non-negative number of seconds')
+        changes = self.__change_log.get_changes(since, self.__version)
+        if changes == []:
+            await self.__change_log.wait(min(seconds, 60))
+            changes = self.__change_log.get_changes(since, self.__version)
+        if changes is None:
+            return {'version': self.__version, 'changes': [], 'resync': True}
+        return {'version': self.__version, 'changes': changes, 'resync': False}
+
+    async def get_node_group(self, group_name):
+        """Return the node group with the specified name.
+
+        Note: awaitable method.
+
+        Args:
+            group_name (str): Name of the NodeGroup.
+
+        Returns:
+            dict: Node group with the specified name.
+
+        Raises:
+            UnknownNodeGroupError: If there is no node group with the specified name.
+
+        """
+        node_group = self.__node_group_repository.get_node_group(group_name)
+        return {'nodes': node_group.get_nodes()}
+
+    async def import_node_groups(self, node_groups=None):
+        """Replace the specified node groups with their descriptions and push each of them to the proxy once.
+        Node groups, that are not described, are left as they are.
+
+        Descriptions have the same structure as the ones returned by get_node_groups(), except that weights of nodes
+        are not needed. All of them are validated before any node group is changed, and then all node groups are
+        replaced at once, so requests never see a part of the import.
+
+        Note: awaitable method.
+
+        Args:
+            node_groups (dict): Named list of descriptions of node groups, each of which has a named list of 'nodes'
+                with their 'host', 'port' and a named list of 'attributes' with their 'value' and 'weight'.
+
+        Raises:
+            ProxyError: If application was not able to notify a proxy.
+            InvalidNodeGroupError: If a description of a node group is malformed.
+
+        """
+        if not isinstance(node_groups, dict):
+            raise InvalidNodeGroupError('', 'node groups should be a named list')
+        dumps = {group_name: self.__get_dump(group_name, group) for group_name, group in node_groups.items()}
+        async with self.defer_pushes():
+            written = []
+            for group_name, dump in dumps.items():
+                node_group = self.__node_group_factory()
+                node_group.load(dump)
+                self.__node_group_repository.save(group_name, node_group)
+                written.append(self.__record(group_name, [{'type': NODE_GROUP_REPLACED}],
+                                             ['import_node_group', dump]))
+            await asyncio.gather(*[asyncio.shield(future) for future in written if future is not None])
+            for group_name in dumps:
+                await self.__push(group_name)
+
+    async def create_node_group(self, group_name, nodes=None):
+        """Create a node group with the specified name. If nodes are specified, import the group with them instead.
+        See import_node_groups() for details.
+
+        Note: awaitable method.
+
+        Args:
+            group_name (str): Name of the group.
+            nodes (dict): Named list of descriptions of nodes of the group.
+
+        Raises:
+            ProxyError: If application was not able to notify a proxy.
+            InvalidNodeGroupError: If a description of a node is malformed.
+
+        """
+        if nodes is not None:
+            await self.import_node_groups({group_name: {'nodes': nodes}})
+            return
+        node_group = self.__node_group_factory()
+        self.__node_group_repository.save(group_name, node_group)
+        await self.__commit(group_name, [{'type': NODE_GROUP_CREATED}], ['create_node_group'], push=False)
+
+    async def remove_node_group(self, group_name):
+        """Remove a node group with the specified name and notify a proxy about it.
+
+        Note: awaitable method.
+
+        Args:
+            group_name (str): Name of the group.
+
+        Raises:
+            ProxyError: If application was not able to notify a proxy.
 
         """
         self.__node_group_repository.remove(group_name)
-        await self.__integration_layer.submit_node_group_to_proxy(group_name, [])
+        self.__forget(group_name)
+        await self.__commit(group_name, [{'type': NODE_GROUP_REMOVED}], ['remove_node_group'])
 
     async def get_nodes(self, group_name):
         """Return nodes of the specified NodeGroup.
@@ -807,7 +2015,8 @@ class BusinessLayerFacade(object):
         try:
             node_group = self.__node_group_repository.get_node_group(group_name)
             node_group.add_node(node_name, host, port)
-            await self.__integration_layer.submit_node_group_to_proxy(group_name, node_group.get_nodes_list())
+            await self.__commit(group_name, [self.__node_change(NODE_ADDED, node_group, node_name)],
+                                ['create_node', node_name, host, port])
         except NodeAlreadyExistsError:
             raise NodeFromGroupAlreadyExists(group_name, node_name)
 
@@ -831,7 +2040,8 @@ class BusinessLayerFacade(object):
         try:
             node_group = self.__node_group_repository.get_node_group(group_name)
             node_group.update_node(node_name, host, port)
-            await self.__integration_layer.submit_node_group_to_proxy(group_name, node_group.get_nodes_list())
+            await self.__commit(group_name, [self.__node_change(NODE_UPDATED, node_group, node_name)],
+                                ['update_node', node_name, host, port])
         except UnknownNodeError:
             raise UnknownNodeFromGroupError(group_name, node_name)
 
@@ -853,7 +2063,7 @@ class BusinessLayerFacade(object):
         try:
             node_group = self.__node_group_repository.get_node_group(group_name)
             node_group.remove_node(node_name)
-            await self.__integration_layer.submit_node_group_to_proxy(group_name, node_group.get_nodes_list())
+            await self.__commit(group_name, [{'type': NODE_REMOVED, 'node': node_name}], ['remove_node', node_name])
         except UnknownNodeError:
             raise UnknownNodeFromGroupError(group_name, node_name)
 
@@ -924,12 +2134,17 @@ class BusinessLayerFacade(object):
             UnknownNodeGroupError: If there is no node group with the specified name.
             UnknownNodeFromGroupError: If there is no node with the specified name in the group.
             NodeFromGroupAttributeAlreadyExistsError: If node already has an attribute with the specified name.
+            InvalidNodeFromGroupAttributeError: If the value or the weight is not a finite number.
 
         """
+        self.__validate_attribute(group_name, node_name, attribute_name, value=value, weight=weight)
         try:
             node_group = self.__node_group_repository.get_node_group(group_name)
+            old_weight = node_group.get_node_weight(node_name)
             node_group.add_node_attribute(node_name, attribute_name, value, weight)
-            await self.__integration_layer.submit_node_group_to_proxy(group_name, node_group.get_nodes_list())
+            changes = self.__attribute_changes(ATTRIBUTE_ADDED, node_group, node_name, attribute_name, old_weight)
+            await self.__commit(group_name, changes,
+                                ['create_node_attribute', node_name, attribute_name, value, weight])
         except UnknownNodeError:
             raise UnknownNodeFromGroupError(group_name, node_name)
         except NodeAttributeAlreadyExistsError:
@@ -952,12 +2167,17 @@ class BusinessLayerFacade(object):
             UnknownNodeGroupError: If there is no node group with the specified name.
             UnknownNodeFromGroupError: If there is no node with the specified name in the group.
             UnknownNodeFromGroupAttributeError: If node does not have a specified attribute.
+            InvalidNodeFromGroupAttributeError: If the value or the weight is not a finite number.
 
         """
+        self.__validate_attribute(group_name, node_name, attribute_name, value=value, weight=weight)
         try:
             node_group = self.__node_group_repository.get_node_group(group_name)
+            old_weight = node_group.get_node_weight(node_name)
             node_group.update_node_attribute(node_name, attribute_name, value, weight)
-            await self.__integration_layer.submit_node_group_to_proxy(group_name, node_group.get_nodes_list())
+            changes = self.__attribute_changes(ATTRIBUTE_UPDATED, node_group, node_name, attribute_name, old_weight)
+            await self.__commit(group_name, changes,
+                                ['update_node_attribute', node_name, attribute_name, value, weight])
         except UnknownNodeError:
             raise UnknownNodeFromGroupError(group_name, node_name)
         except UnknownNodeAttributeError:
@@ -982,9 +2202,301 @@ class BusinessLayerFacade(object):
         """
         try:
             node_group = self.__node_group_repository.get_node_group(group_name)
+            old_weight = node_group.get_node_weight(node_name)
             node_group.remove_node_attribute(node_name, attribute_name)
-            await self.__integration_layer.submit_node_group_to_proxy(group_name, node_group.get_nodes_list())
+            changes = self.__attribute_changes(ATTRIBUTE_REMOVED, node_group, node_name, attribute_name, old_weight)
+            await self.__commit(group_name, changes, ['remove_node_attribute', node_name, attribute_name])
         except UnknownNodeError:
             raise UnknownNodeFromGroupError(group_name, node_name)
         except UnknownNodeAttributeError:
             raise UnknownNodeFromGroupAttributeError(group_name, node_name, attribute_name)
+
+    async def __commit(self, group_name, changes, operation, push=True):
+        """Record the change of the node group with the specified name, wait until it is written to the journal and
+        push the group to the proxy.
+
+        Note: awaitable method.
+
+        Args:
+            group_name (str): Name of the group.
+            changes (list): Changes of the group, each of which has a 'type' and details specific to it.
+            operation (list): Name of the business process, that has changed the group, followed by its arguments
+                except the name of the group.
+            push (bool): False if the change is not visible to the proxy.
+
+        Raises:
+            ProxyError: If application was not able to notify a proxy.
+
+        """
+        written = self.__record(group_name, changes, operation)
+        if written is not None:
+            await asyncio.shield(written)
+        if push:
+            await self.__push(group_name)
+
+    def __record(self, group_name, changes, operation):
+        """Increment the version of the node group with the specified name after its change, log the change and
+        append the operation, that has made it, to the journal.
+
+        Args:
+            group_name (str): Name of the group.
+            changes (list): Changes of the group, each of which has a 'type' and details specific to it.
+            operation (list): Name of the business process, that has changed the group, followed by its arguments
+                except the name of the group.
+
+        Returns:
+            Future: Future, that gets resolved once the operation is synced to the journal. None if there is no
+                journal.
+
+        """
+        self.__version += 1
+        if group_name in self.__node_group_repository.get_node_groups():
+            self.__versions[group_name] = self.__version
+        for change in changes:
+            change['group'] = group_name
+            change['version'] = self.__version
+            self.__change_log.append(change)
+        if self.__journal is None:
+            return None
+        written = self.__journal.append([self.__version, operation[0], group_name] + operation[1:])
+        if self.__journal.is_snapshot_due():
+            self.__journal.take_snapshot(self.__version, self.__dump_node_groups())
+        return written
+
+    def __replay(self, operation, group_name, arguments):
+        """Apply the journaled operation to node groups without journaling, logging or pushing it.
+
+        Args:
+            operation (str): Name of the business process, that has made the change.
+            group_name (str): Name of the group.
+            arguments (list): Arguments of the business process except the name of the group.
+
+        """
+        if operation == 'create_node_group':
+            self.__node_group_repository.save(group_name, self.__node_group_factory())
+        elif operation == 'remove_node_group':
+            self.__node_group_repository.remove(group_name)
+        elif operation == 'import_node_group':
+            node_group = self.__node_group_factory()
+            node_group.load(arguments[0])
+            self.__node_group_repository.save(group_name, node_group)
+        else:
+            node_group = self.__node_group_repository.get_node_group(group_name)
+            getattr(node_group, REPLAYED_OPERATIONS[operation])(*arguments)
+
+    def __validate_attribute(self, group_name, node_name, attribute_name, **fields):
+        """Check, that the specified fields of the attribute are finite numbers, before anything is changed.
+
+        Args:
+            group_name (str): Name of the group.
+            node_name (str): Name of the node.
+            attribute_name (str): Name of the attribute.
+            **fields: Values of the fields by their names. Fields, that are None, are not changed and not checked.
+
+        Raises:
+            InvalidNodeFromGroupAttributeError: If one of the fields is not a finite number.
+
+        """
+        for field, value in fields.items():
+            if value is None:
+                continue
+            try:
+                to_finite_float(value)
+            except (TypeError, ValueError):
+                reason = "'{}' should be a finite number, not {!r}".format(field, value)
+                raise InvalidNodeFromGroupAttributeError(group_name, node_name, attribute_name, reason)
+
+    def __get_dump(self, group_name, group):
+        """Validate the description of the node group and return its compact representation.
+
+        Args:
+            group_name (str): Name of the group.
+            group (dict): Description of the group with a named list of 'nodes'.
+
+        Returns:
+            dict: Compact representation of the group, that can be loaded into an empty node group.
+
+        Raises:
+            InvalidNodeGroupError: If the description is malformed.
+
+        """
+        if not isinstance(group, dict) or not isinstance(group.get('nodes'), dict):
+            raise InvalidNodeGroupError(group_name, "'nodes' should be a named list")
+        names, hosts, ports, attributes = [], [], [], {}
+        for position, (node_name, node) in enumerate(group['nodes'].items()):
+            location = "the node '{}'".format(node_name)
+            try:
+                if not isinstance(node.get('host'), str):
+                    raise ValueError("'host' should be a string")
+                hosts.append(node['host'])
+                ports.append(self.__get_port(group_name, location, node['port']))
+                for attribute_name, attribute in node.get('attributes', {}).items():
+                    location = "the attribute '{}' of the node '{}'".format(attribute_name, node_name)
+                    value = self.__get_number(group_name, location, 'value', attribute['value'])
+                    weight = self.__get_number(group_name, location, 'weight', attribute['weight'])
+                    positions, values, weights = attributes.setdefault(attribute_name, ([], [], []))
+                    positions.append(position)
+                    values.append(value)
+                    weights.append(weight)
+            except KeyError as e:
+                raise InvalidNodeGroupError(group_name, "'{}' of {} is missing".format(e.args[0], location))
+            except (AttributeError, TypeError, ValueError) as e:
+                raise InvalidNodeGroupError(group_name, "{} is malformed: {}".format(location, e))
+            names.append(node_name)
+        return {'nodes': names, 'hosts': hosts, 'ports': ports, 'attributes': attributes}
+
+    def __get_port(self, group_name, location, port):
+        """Validate the port of a node from the description of the node group and return it as an integer.
+
+        Args:
+            group_name (str): Name of the group.
+            location (str): Description of the node for error messages.
+            port (object): The port.
+
+        Returns:
+            int: The port.
+
+        Raises:
+            InvalidNodeGroupError: If the port is not an integer between 1 and 65535.
+
+        """
+        try:
+            number = int(port)
+        except (TypeError, ValueError):
+            number = None
+        if isinstance(port, bool) or number is None or not 1 <= number <= 65535:
+            raise InvalidNodeGroupError(group_name, "'port' of {} should be an integer between 1 and 65535, not "
+                                                    "{!r}".format(location, port))
+        return number
+
+    def __get_number(self, group_name, location, field, value):
+        """Validate a numeric field of an attribute from the description of the node group and return it. Numbers are
+        returned as they are, so integers stay integers, and strings are converted to floats.
+
+        Args:
+            group_name (str): Name of the group.
+            location (str): Description of the attribute for error messages.
+            field (str): Name of the field.
+            value (object): Value of the field.
+
+        Returns:
+            object: The number.
+
+        Raises:
+            InvalidNodeGroupError: If the value is not a finite number.
+
+        """
+        try:
+            number = to_finite_float(value)
+        except (TypeError, ValueError):
+            number = None
+        if isinstance(value, bool) or number is None:
+            raise InvalidNodeGroupError(group_name, "'{}' of {} should be a finite number, not {!r}".format(
+                field, location, value))
+        return value if isinstance(value, (int, float)) else number
+
+    def __dump_node_groups(self):
+        """Return compact representations of all node groups. Only groups, that have changed since the previous call,
+        are dumped anew. Compact representations are never modified, so they are shared with snapshots.
+
+        Returns:
+            dict: Named list of compact representations of node groups.
+
+        """
+        dumps = {}
+        for group_name, node_group in self.__node_group_repository.get_node_groups().items():
+            version = self.__versions[group_name]
+            dump = self.__dumps.get(group_name)
+            dumps[group_name] = dump if dump is not None and dump[0] == version else (version, node_group.dump())
+        self.__dumps = dumps
+        return {group_name: dump for group_name, (_, dump) in dumps.items()}
+
+    def __node_change(self, change_type, node_group, node_name):
+        """Return a change of the node, that contains the current state of the node.
+
+        Args:
+            change_type (str): Type of the change.
+            node_group (NodeGroup): Node group of the node.
+            node_name (str): Name of the node.
+
+        Returns:
+            dict: The change.
+
+        """
+        node = node_group.get_node(node_name)
+        return {'type': change_type, 'node': node_name, 'host': node['host'], 'port': node['port'],
+                'weight': node['weight']}
+
+    def __attribute_changes(self, change_type, node_group, node_name, attribute_name, old_weight):
+        """Return a change of the attribute of the node, that contains the current state of the attribute, followed
+        by a change of the weight of the node, if it has changed.
+
+        Args:
+            change_type (str): Type of the change.
+            node_group (NodeGroup): Node group of the node.
+            node_name (str): Name of the node.
+            attribute_name (str): Name of the attribute.
+            old_weight (float): Weight of the node before the change.
+
+        Returns:
+            list: The changes.
+
+        """
+        change = {'type': change_type, 'node': node_name, 'attribute': attribute_name}
+        if change_type != ATTRIBUTE_REMOVED:
+            change.update(node_group.get_node_attribute(node_name, attribute_name))
+        changes = [change]
+        weight = node_group.get_node_weight(node_name)
+        if weight != old_weight:
+            changes.append({'type': NODE_WEIGHT_CHANGED, 'node': node_name, 'weight': weight})
+        return changes
+
+    def __forget(self, group_name):
+        """Drop the version of the removed node group with the specified name.
+
+        Args:
+            group_name (str): Name of the group.
+
+        """
+        self.__versions.pop(group_name, None)
+
+    async def __push(self, group_name):
+        """Schedule a push of the node group with the specified name to the proxy and wait until it is delivered.
+        If pushes are deferred by the current task, return right away. In the asynchronous push mode, return once
+        the push is scheduled.
+
+        Note: awaitable method.
+
+        Args:
+            group_name (str): Name of the group.
+
+        Raises:
+            ProxyError: If application was not able to notify a proxy.
+
+        """
+        deferred_pushes = self.__deferred_pushes.get(get_current_task())
+        if deferred_pushes is not None:
+            deferred_pushes.defer(group_name)
+            return
+        push = self.__push_scheduler.schedule(group_name)
+        if self.__push_mode != ASYNC_PUSH_MODE:
+            await asyncio.shield(push)
+
+    async def __submit_node_group(self, group_name):
+        """Submit the current state of the node group with the specified name to the proxy. A group, that does not
+        exist anymore, is submitted without nodes.
+
+        Note: awaitable method.
+
+        Args:
+            group_name (str): Name of the group.
+
+        Raises:
+            ProxyError: If application was not able to notify a proxy.
+
+        """
+        try:
+            node_list = self.__node_group_repository.get_node_group(group_name).get_nodes_list()
+        except UnknownNodeGroupError:
+            node_list = []
+        await self.__integration_layer.submit_node_group_to_proxy(group_name, node_list, self.__version)
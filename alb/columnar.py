@@ -0,0 +1,582 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from alb.business import UnknownNodeError, UnknownAttributeError, UnknownNodeAttributeError, NodeAlreadyExistsError, \
+    NodeAttributeAlreadyExistsError, WeightIndex, to_finite_float
+
+
+class BackendUnavailableError(Exception):
+    """Backend of node groups cannot be used, since a library, it requires, is not installed."""
+    def __init__(self, backend, library):
+        """Constructor of the BackendUnavailableError.
+
+        Args:
+            backend (str): Name of the backend.
+            library (str): Name of the missing library.
+
+        """
+        message = "Node group backend '{}' requires {} to be installed".format(backend, library)
+        super(BackendUnavailableError, self).__init__(message)
+
+
+class ColumnarNodeGroup(object):
+    """Group of nodes, that serve the same service, stored column by column.
+
+    A drop-in replacement of the NodeGroup for large groups. Instead of keeping an object per node and per attribute,
+    each node occupies a slot, and values and weights of each attribute of all nodes are kept in rows of two
+    float matrices, where each column corresponds to a slot. Weights of all nodes of the group are computed at once
+    with a single vectorized product of those matrices, that is cached. On a change of attributes of a node, only
+    the cached weight of its slot is recomputed.
+
+    Requires numpy.
+
+    Attributes:
+        __slots (dict): Named list of slots of the nodes of the group in the order, the nodes were added in.
+        __hosts (list): Hosts of the nodes by their slots.
+        __ports (list): Ports of the nodes by their slots.
+        __free_slots (list): Slots, that are not occupied by any node.
+        __rows (dict): Named list of rows of attributes in the values and weights matrices.
+        __row_sizes (list): Count of nodes, that have the attribute of the row, by rows.
+        __free_rows (list): Rows, that are not occupied by any attribute.
+        __values (ndarray): Matrix of current values of attributes, where each row is an attribute and each column is
+            a slot.
+        __weights (ndarray): Matrix of static weights of attributes with the same layout as __values.
+        __present (ndarray): Matrix of flags, that tell if the node of the slot has the attribute of the row.
+        __node_weights (ndarray): Cached overall weights of nodes by their slots. None if they should be recomputed,
+            e.g. after the matrices were reallocated.
+        __index (WeightIndex): Index of nodes of the group, sorted by their weights.
+
+    """
+    def __init__(self, capacity=16):
+        """Constructor of the ColumnarNodeGroup.
+
+        Args:
+            capacity (int): Initial count of node slots to allocate.
+
+        Raises:
+            BackendUnavailableError: If numpy is not installed.
+
+        """
+        self.check_requirements()
+        self.__slots = {}
+        self.__hosts = [None] * capacity
+        self.__ports = [None] * capacity
+        self.__free_slots = list(reversed(range(capacity)))
+        self.__rows = {}
+        self.__row_sizes = []
+        self.__free_rows = []
+        self.__values = numpy.zeros((0, capacity))
+        self.__weights = numpy.zeros((0, capacity))
+        self.__present = numpy.zeros((0, capacity), dtype=bool)
+        self.__node_weights = None
+        self.__index = WeightIndex()
+
+    @staticmethod
+    def check_requirements():
+        """Make sure, that libraries, the ColumnarNodeGroup requires, are installed.
+
+        Raises:
+            BackendUnavailableError: If numpy is not installed.
+
+        """
+        if numpy is None:
+            raise BackendUnavailableError('columnar', 'numpy')
+
+    @property
+    def index(self):
+        """Return the index of nodes of the NodeGroup, sorted by their weights.
+
+        Returns:
+            WeightIndex: Index of nodes.
+
+        """
+        return self.__index
+
+    @property
+    def node_count(self):
+        """Return the count of nodes of the NodeGroup.
+
+        Returns:
+            int: Count of nodes.
+
+        """
+        return len(self.__slots)
+
+    @property
+    def attribute_count(self):
+        """Return the count of attributes of all nodes of the NodeGroup.
+
+        Returns:
+            int: Count of attributes.
+
+        """
+        return sum(self.__row_sizes)
+
+    @property
+    def weight(self):
+        """Return overall weight of all nodes of the NodeGroup.
+
+        Returns:
+            float: Overall weight of the NodeGroup.
+
+        """
+        return float(self.__get_node_weights().sum())
+
+    def get_nodes_list(self):
+        """Return the list of nodes of the NodeGroup with their names, hosts, ports and weights in the ascending
+        order of their weights.
+
+        Returns:
+            list: List of nodes.
+
+        """
+        weights = self.__get_node_weights().tolist()
+        slots = self.__slots
+        return [{'name': name, 'host': self.__hosts[slots[name]], 'port': self.__ports[slots[name]],
+                 'weight': weights[slots[name]]} for name in self.__index.get_names()]
+
+    def dump(self):
+        """Return a compact representation of the NodeGroup, that can be loaded back with load().
+
+        Nodes are listed by 'nodes', 'hosts' and 'ports' in the same order. Each of 'attributes' refers to the nodes,
+        that have it, by their positions in that order, followed by values and weights of the attribute of those
+        nodes.
+
+        Returns:
+            dict: Compact representation of the NodeGroup.
+
+        """
+        slots = list(self.__slots.values())
+        positions = numpy.zeros(len(self.__hosts), dtype=int)
+        positions[slots] = numpy.arange(len(slots))
+        attributes = {}
+        for name, row in self.__rows.items():
+            attribute_slots = numpy.flatnonzero(self.__present[row])
+            attributes[name] = (positions[attribute_slots].tolist(), self.__values[row, attribute_slots].tolist(),
+                                self.__weights[row, attribute_slots].tolist())
+        return {'nodes': list(self.__slots), 'hosts': [self.__hosts[slot] for slot in slots],
+                'ports': [self.__ports[slot] for slot in slots], 'attributes': attributes}
+
+    def load(self, dump):
+        """Fill the empty NodeGroup from its compact representation at once.
+
+        Args:
+            dump (dict): Compact representation of the NodeGroup, returned by dump().
+
+        """
+        count = len(dump['nodes'])
+        capacity = max(count, len(self.__hosts))
+        self.__slots = dict(zip(dump['nodes'], range(count)))
+        self.__hosts = list(dump['hosts']) + [None] * (capacity - count)
+        self.__ports = [int(port) for port in dump['ports']] + [None] * (capacity - count)
+        self.__free_slots = list(reversed(range(count, capacity)))
+        attributes = dump['attributes']
+        self.__rows = dict(zip(attributes, range(len(attributes))))
+        self.__row_sizes = [len(positions) for positions, _, _ in attributes.values()]
+        self.__free_rows = []
+        self.__values = numpy.zeros((len(attributes), capacity))
+        self.__weights = numpy.zeros((len(attributes), capacity))
+        self.__present = numpy.zeros((len(attributes), capacity), dtype=bool)
+        for row, (positions, values, weights) in enumerate(attributes.values()):
+            self.__values[row, positions] = values
+            self.__weights[row, positions] = weights
+            self.__present[row, positions] = True
+        self.__node_weights = None
+        weights = self.__get_node_weights().tolist()
+        self.__index = WeightIndex((name, weights[slot]) for name, slot in self.__slots.items())
+
+    def get_nodes(self):
+        """Return named list of node of the NodeGroup.
+
+        Returns:
+            dict: Named list of nodes.
+
+        """
+        weights = self.__get_node_weights().tolist()
+        values = self.__values.T.tolist()
+        attribute_weights = self.__weights.T.tolist()
+        present = self.__present.T.tolist()
+        names = self.__get_row_names()
+        nodes = {}
+        for name, slot in self.__slots.items():
+            nodes[name] = {
+                'host': self.__hosts[slot],
+                'port': self.__ports[slot],
+                'weight': weights[slot],
+                'attributes': {names[row]: {'value': values[slot][row], 'weight': attribute_weights[slot][row]}
+                               for row, has_attribute in enumerate(present[slot]) if has_attribute}
+            }
+        return nodes
+
+    def get_node(self, name):
+        """Return information about the node of the NodeGroup.
+
+        Args:
+            name (str): Name of the node to return.
+
+        Returns:
+            dict: Node of the NodeGroup, that has a specified name.
+
+        Raises:
+            UnknownNodeError: If the node with the specified name was not found.
+
+        """
+        slot = self.__get_slot(name)
+        return {
+            'host': self.__hosts[slot],
+            'port': self.__ports[slot],
+            'weight': self.__get_node_weight(slot),
+            'attributes': self.__get_attributes(slot)
+        }
+
+    def get_node_weight(self, name):
+        """Return overall weight of the node of the NodeGroup.
+
+        Args:
+            name (str): Name of the node.
+
+        Returns:
+            float: Weight of the node.
+
+        Raises:
+            UnknownNodeError: If the node with the specified name was not found.
+
+        """
+        return self.__get_node_weight(self.__get_slot(name))
+
+    def add_node(self, name, host, port):
+        """Add a node to the NodeGroup.
+
+        Args:
+            name (str): Name of the new node.
+            host (str): Host of the node.
+            port (int): Port of the node.
+
+        Raises:
+            NodeAlreadyExistsError: If Node with the specified node already exists in the NodeGroup.
+
+        """
+        if name in self.__slots:
+            raise NodeAlreadyExistsError(name)
+        port = int(port)
+        if not self.__free_slots:
+            self.__grow_slots()
+        slot = self.__free_slots.pop()
+        self.__slots[name] = slot
+        self.__hosts[slot] = host
+        self.__ports[slot] = port
+        self.__index.add(name, 0.0)
+
+    def update_node(self, name, host=None, port=None):
+        """Update an information of the node from the NodeGroup.
+
+        Args:
+            name (str): Name of the node.
+            host (str): Host of the node.
+            port (int): Port of the node.
+
+        Raises:
+            UnknownNodeError: If the node with the specified name was not found.
+
+        """
+        slot = self.__get_slot(name)
+        self.__hosts[slot] = host or self.__hosts[slot]
+        self.__ports[slot] = int(port or self.__ports[slot])
+
+    def remove_node(self, name):
+        """Remove the node from the NodeGroup.
+
+        Args:
+            name (str): Name of the node.
+
+        Raises:
+            UnknownNodeError: If the node with the specified name was not found.
+
+        """
+        slot = self.__get_slot(name)
+        for row in numpy.flatnonzero(self.__present[:, slot]).tolist():
+            self.__clear(row, slot)
+        del self.__slots[name]
+        self.__index.remove(name)
+        self.__hosts[slot] = None
+        self.__ports[slot] = None
+        self.__free_slots.append(slot)
+
+    def get_node_attributes(self, node_name):
+        """Return named list of node attributes.
+
+        Args:
+            node_name (str): Name of the node.
+
+        Returns:
+            dict: Named list of attributes.
+
+        Raises:
+            UnknownNodeError: If the node with the specified name was not found.
+
+        """
+        return self.__get_attributes(self.__get_slot(node_name))
+
+    def get_node_attribute(self, node_name, attribute_name):
+        """Return information about the attribute of the node.
+
+        Args:
+            node_name (str): Name of the node.
+            attribute_name (str): Name of the attribute.
+
+        Returns:
+            dict: Attribute of the node.
+
+        Raises:
+            UnknownNodeError: If the node with the specified name was not found.
+            UnknownNodeAttributeError: If the node does not have a specified attribute.
+
+        """
+        slot = self.__get_slot(node_name)
+        try:
+            row = self.__get_row(attribute_name, slot)
+        except UnknownAttributeError:
+            raise UnknownNodeAttributeError(node_name, attribute_name)
+        return {'value': float(self.__values[row, slot]), 'weight': float(self.__weights[row, slot])}
+
+    def add_node_attribute(self, node_name, attribute_name, value, weight):
+        """Add an attribute to the Node.
+
+        Args:
+            node_name (str): Name of the node.
+            attribute_name (str): Name of the new attribute.
+            value (float): Current value of the attribute.
+            weight (float): Static weight of the attribute.
+
+        Raises:
+            UnknownNodeError: If the node with the specified name was not found.
+            NodeAttributeAlreadyExistsError: If the node already has an attribute with the specified name.
+            ValueError: If the value or the weight is not a finite number.
+
+        """
+        slot = self.__get_slot(node_name)
+        row = self.__rows.get(attribute_name)
+        if row is not None and self.__present[row, slot]:
+            raise NodeAttributeAlreadyExistsError(node_name, attribute_name)
+        value, weight = to_finite_float(value), to_finite_float(weight)
+        if row is None:
+            row = self.__add_row(attribute_name)
+        self.__values[row, slot] = value
+        self.__weights[row, slot] = weight
+        self.__present[row, slot] = True
+        self.__row_sizes[row] += 1
+        self.__index.update(node_name, self.__update_node_weight(slot))
+
+    def update_node_attribute(self, node_name, attribute_name, value=None, weight=None):
+        """Update an information of the attribute of the node.
+
+        Args:
+            node_name (str): Name of the node.
+            attribute_name (str): Name of the attribute.
+            value (float): Current value of the attribute.
+            weight (float): Static weight of the attribute.
+
+        Raises:
+            UnknownNodeError: If the node with the specified name was not found.
+            UnknownNodeAttributeError: If the node does not have an attribute with the specified name.
+            ValueError: If the value or the weight is not a finite number.
+
+        """
+        slot = self.__get_slot(node_name)
+        try:
+            row = self.__get_row(attribute_name, slot)
+        except UnknownAttributeError:
+            raise UnknownNodeAttributeError(node_name, attribute_name)
+        value = to_finite_float(value) if value else None
+        weight = to_finite_float(weight) if weight else None
+        if value:
+            self.__values[row, slot] = value
+        if weight:
+            self.__weights[row, slot] = weight
+        self.__index.update(node_name, self.__update_node_weight(slot))
+
+    def remove_node_attribute(self, node_name, attribute_name):
+        """Remove the attribute of the node.
+
+        Args:
+            node_name (str): Name of the node.
+            attribute_name (str): Name of the attribute.
+
+        Raises:
+            UnknownNodeError: If the node with the specified name was not found.
+            UnknownNodeAttributeError: If the node does not have an attribute with the specified name.
+
+        """
+        slot = self.__get_slot(node_name)
+        try:
+            row = self.__get_row(attribute_name, slot)
+        except UnknownAttributeError:
+            raise UnknownNodeAttributeError(node_name, attribute_name)
+        self.__clear(row, slot)
+        self.__index.update(node_name, self.__get_node_weight(slot))
+
+    def __get_slot(self, name):
+        """Return the slot of the node with the specified name.
+
+        Args:
+            name (str): Name of the node.
+
+        Returns:
+            int: Slot of the node.
+
+        Raises:
+            UnknownNodeError: If the node with the specified name was not found.
+
+        """
+        try:
+            return self.__slots[name]
+        except KeyError:
+            raise UnknownNodeError(name)
+
+    def __get_row(self, name, slot):
+        """Return the row of the attribute with the specified name, that the node of the specified slot has.
+
+        Args:
+            name (str): Name of the attribute.
+            slot (int): Slot of the node.
+
+        Returns:
+            int: Row of the attribute.
+
+        Raises:
+            UnknownAttributeError: If the node does not have an attribute with the specified name.
+
+        """
+        row = self.__rows.get(name)
+        if row is None or not self.__present[row, slot]:
+            raise UnknownAttributeError(name)
+        return row
+
+    def __get_row_names(self):
+        """Return names of attributes by their rows.
+
+        Returns:
+            list: Names of attributes. Rows, that are not occupied, have None as a name.
+
+        """
+        names = [None] * len(self.__row_sizes)
+        for name, row in self.__rows.items():
+            names[row] = name
+        return names
+
+    def __get_attributes(self, slot):
+        """Return named list of attributes of the node of the specified slot.
+
+        Args:
+            slot (int): Slot of the node.
+
+        Returns:
+            dict: Named list of attributes.
+
+        """
+        attributes = {}
+        for name, row in self.__rows.items():
+            if self.__present[row, slot]:
+                attributes[name] = {
+                    'value': float(self.__values[row, slot]),
+                    'weight': float(self.__weights[row, slot])
+                }
+        return attributes
+
+    def __get_node_weights(self):
+        """Return overall weights of all nodes by their slots, computing them if the group has changed since the
+        last call.
+
+        Returns:
+            ndarray: Weights of the nodes. Weights of free slots are 0.
+
+        """
+        if self.__node_weights is None:
+            self.__node_weights = numpy.einsum('ij,ij->j', self.__values, self.__weights)
+        return self.__node_weights
+
+    def __get_node_weight(self, slot):
+        """Return overall weight of the node of the specified slot.
+
+        Args:
+            slot (int): Slot of the node.
+
+        Returns:
+            float: Weight of the node.
+
+        """
+        if self.__node_weights is not None:
+            return float(self.__node_weights[slot])
+        return float(numpy.dot(self.__values[:, slot], self.__weights[:, slot]))
+
+    def __update_node_weight(self, slot):
+        """Recompute overall weight of the node of the specified slot after a change of its attributes and update it
+        in the cached weights of all nodes, if they are cached.
+
+        Args:
+            slot (int): Slot of the node.
+
+        Returns:
+            float: Weight of the node.
+
+        """
+        weight = float(numpy.dot(self.__values[:, slot], self.__weights[:, slot]))
+        if self.__node_weights is not None:
+            self.__node_weights[slot] = weight
+        return weight
+
+    def __add_row(self, name):
+        """Allocate a row for the attribute with the specified name.
+
+        Args:
+            name (str): Name of the attribute.
+
+        Returns:
+            int: Row of the attribute.
+
+        """
+        if not self.__free_rows:
+            rows = len(self.__row_sizes)
+            extra = max(rows, 1)
+            self.__values = numpy.vstack((self.__values, numpy.zeros((extra, self.__values.shape[1]))))
+            self.__weights = numpy.vstack((self.__weights, numpy.zeros((extra, self.__weights.shape[1]))))
+            self.__present = numpy.vstack((self.__present, numpy.zeros((extra, self.__present.shape[1]),
+                                                                       dtype=bool)))
+            self.__row_sizes.extend([0] * extra)
+            self.__free_rows.extend(reversed(range(rows, rows + extra)))
+        row = self.__free_rows.pop()
+        self.__rows[name] = row
+        return row
+
+    def __grow_slots(self):
+        """Double the count of node slots."""
+        slots = len(self.__hosts)
+        extra = max(slots, 1)
+        self.__values = numpy.hstack((self.__values, numpy.zeros((self.__values.shape[0], extra))))
+        self.__weights = numpy.hstack((self.__weights, numpy.zeros((self.__weights.shape[0], extra))))
+        self.__present = numpy.hstack((self.__present, numpy.zeros((self.__present.shape[0], extra), dtype=bool)))
+        self.__hosts.extend([None] * extra)
+        self.__ports.extend([None] * extra)
+        self.__free_slots.extend(reversed(range(slots, slots + extra)))
+        self.__node_weights = None
+
+    def __clear(self, row, slot):
+        """Remove the attribute of the specified row from the node of the specified slot. Release the row, if no
+        other node has the attribute.
+
+        Args:
+            row (int): Row of the attribute.
+            slot (int): Slot of the node.
+
+        """
+        self.__values[row, slot] = 0.0
+        self.__weights[row, slot] = 0.0
+        self.__present[row, slot] = False
+        self.__row_sizes[row] -= 1
+        if self.__row_sizes[row] == 0:
+            name = next(name for name, attribute_row in self.__rows.items() if attribute_row == row)
+            del self.__rows[name]
+            self.__free_rows.append(row)
+        self.__update_node_weight(slot)
@@ -1,4 +1,22 @@
-import aiohttp
+import asyncio
+import time
+
+from core.session import SharedSession
+
+
+RANK_PROJECTION = 'rank'
+"""Projection of a node group onto upstream servers and their rank-based weights, the way nginx-adapter builds them."""
+WEIGHT_PROJECTION = 'weight'
+"""Projection of a node group onto its nodes with their hosts, ports and exact weights."""
+NO_PROJECTION = 'none'
+"""No projection: each change of a node group is pushed to the proxy."""
+
+CLOSED = 'closed'
+"""State of the circuit breaker, in which all submissions are allowed."""
+OPEN = 'open'
+"""State of the circuit breaker, in which submissions are rejected right away."""
+HALF_OPEN = 'half_open'
+"""State of the circuit breaker, in which a single trial submission is allowed."""
 
 
 class ProxyError(Exception):
@@ -28,73 +46,556 @@ class ProxyErrorResponse(Exception):
         super(ProxyErrorResponse, self).__init__(message)
 
 
+class ProxyResyncRequired(Exception):
+    """Proxy does not have the version of the node group, the delta was computed against."""
+    pass
+
+
 class Proxy(object):
     """A proxy server interface.
     
     Notifies remote proxy about changes in the cluster configuration.
+
+    The first submission of a node group sends all of its nodes. Following submissions send only nodes, that were
+    added, updated or removed since the last submission, the proxy has acknowledged, along with versions of the
+    group before and after the change and the resulting order of names of nodes, so the proxy does not have to sort
+    them and break ties of weights on its own. If the proxy does not have the version the delta is based on, it
+    responds with 409 Conflict and the whole group is submitted again.
+
+    A submission is suppressed, if the projection of the group, i.e. the part of it, that is visible to the proxy,
+    has not changed since the last submission, the proxy has acknowledged. Since the projection depends on the order
+    of nodes, it is only remembered, if the proxy is known to have the same order: after the whole group was
+    submitted, or after a delta, the proxy has confirmed to apply in the sent order.
+
+    All submissions share a single session with a pool of keep-alive connections.
     
     Attributes:
-        __url (str): URL of the proxy API.
+        url (str): URL of the proxy API.
+        __session (SharedSession): HTTP client session, shared by all submissions.
+        __projection (str): Projection of node groups, that is compared to suppress submissions: RANK_PROJECTION,
+            WEIGHT_PROJECTION or NO_PROJECTION.
+        __acknowledged (dict): Named list of versions and nodes of node groups, that the proxy has acknowledged.
+        __projections (dict): Named list of projections of node groups, that the proxy has acknowledged in the same
+            order of nodes.
+        __sent (int): Count of submissions, that were sent to the proxy.
+        __suppressed (int): Count of submissions, that were suppressed.
     
     """
-    def __init__(self, url):
+    def __init__(self, url, projection=RANK_PROJECTION, session=None):
         """Constructor of the Proxy.
         
         Args:
             url (str): URL of the proxy API.
+            projection (str): Projection of node groups, that is compared to suppress submissions: RANK_PROJECTION,
+                WEIGHT_PROJECTION or NO_PROJECTION.
+            session (SharedSession): HTTP client session, shared by all submissions. A session with default options
+                is used, if not specified.
         
         """
-        self.__url = url or 'http://localhost:5001/node_group/{}'
+        self.url = url or 'http://localhost:5001/node_group/{}'
+        self.__session = session or SharedSession()
+        self.__projection = projection or RANK_PROJECTION
+        self.__acknowledged = {}
+        self.__projections = {}
+        self.__sent = 0
+        self.__suppressed = 0
+
+    async def close(self):
+        """Close all connections to the proxy.
+
+        Note: awaitable method.
+
+        """
+        await self.__session.close()
+
+    def get_stats(self):
+        """Return counts of submissions, that were sent to the proxy and that were suppressed.
+
+        Returns:
+            dict: The 'url' of the proxy API and counts of 'sent' and 'suppressed' submissions.
+
+        """
+        return {'url': self.url, 'sent': self.__sent, 'suppressed': self.__suppressed}
 
-    async def submit_node_group(self, name, node_list):
+    async def submit_node_group(self, name, node_list, version):
         """Submit a node group to the remote proxy.
         
         Note: awaitable method.
         
         Args:
             name (str): Name of the node group.
-            node_list (list): List of nodes of the group.
+            node_list (list): List of nodes of the group in the ascending order of their weights. Each node should have
+                a unique name.
+            version (int): Version of the node group.
             
         Raises:
             ProxyError: If an error occurred while trying to submit the group
         
         """
+        projection = self.__project(node_list)
+        if projection is not None and self.__projections.get(name) == projection:
+            self.__suppressed += 1
+            return
+        self.__projections.pop(name, None)
+        nodes = {node['name']: node for node in node_list}
+        acknowledged = self.__acknowledged.pop(name, None)
+        ordered = True
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.__url.format(name), json={'nodes': node_list}) as response:
-                    if 399 < response.status or response.status < 200:
-                        raise ProxyErrorResponse(await response.text())
+            if acknowledged is None or not nodes:
+                self.__sent += 1
+                await self.__send('post', name, {'version': version, 'nodes': node_list, 'ordered': True})
+            else:
+                delta = self.__get_delta(acknowledged[1], nodes)
+                if not any(delta.values()) and list(acknowledged[1]) == list(nodes):
+                    self.__suppressed += 1
+                    self.__acknowledged[name] = acknowledged
+                    return
+                self.__sent += 1
+                delta['base_version'] = acknowledged[0]
+                delta['version'] = version
+                delta['order'] = list(nodes)
+                try:
+                    response = await self.__send('patch', name, delta)
+                    ordered = isinstance(response, dict) and response.get('ordered') is True
+                except ProxyResyncRequired:
+                    await self.__send('post', name, {'version': version, 'nodes': node_list, 'ordered': True})
         except Exception as e:
             raise ProxyError(name, str(e))
+        if nodes:
+            self.__acknowledged[name] = (version, nodes)
+        if ordered:
+            self.__projections[name] = projection
+
+    def __project(self, node_list):
+        """Return the projection of the node group, that is visible to the proxy.
+
+        The rank projection mirrors nginx-adapter: each node gets an upstream weight based on its position in
+        the list, that is already ordered by weights. It matches the upstream only while the proxy has the nodes in
+        the same order.
+
+        Args:
+            node_list (list): List of nodes of the group in the ascending order of their weights.
+
+        Returns:
+            list: Projection of the group. None if submissions should never be suppressed.
+
+        """
+        if self.__projection == NO_PROJECTION:
+            return None
+        if self.__projection == WEIGHT_PROJECTION:
+            return [(node['name'], node['host'], node['port'], node['weight']) for node in node_list]
+        size = len(node_list)
+        return [('{}:{}'.format(node['host'], node['port']), int(position / size * 100) + 1)
+                for position, node in enumerate(node_list)]
+
+    def __get_delta(self, old_nodes, new_nodes):
+        """Return the difference between two states of the node group.
+
+        Args:
+            old_nodes (dict): Named list of nodes of the old state of the group.
+            new_nodes (dict): Named list of nodes of the new state of the group.
+
+        Returns:
+            dict: Lists of 'added' and 'updated' nodes and a list of names of 'removed' nodes.
+
+        """
+        added = [node for name, node in new_nodes.items() if name not in old_nodes]
+        updated = [node for name, node in new_nodes.items() if name in old_nodes and node != old_nodes[name]]
+        removed = [name for name in old_nodes if name not in new_nodes]
+        return {'added': added, 'updated': updated, 'removed': removed}
+
+    async def __send(self, method, name, body):
+        """Send a request with the specified body to the proxy API of the node group.
+
+        Note: awaitable method.
+
+        Args:
+            method (str): Name of the HTTP method.
+            name (str): Name of the node group.
+            body (dict): Body of the request.
+
+        Returns:
+            object: Decoded JSON body of the response. None if the body is empty or is not JSON.
+
+        Raises:
+            ProxyResyncRequired: If the proxy responded with 409 Conflict.
+            ProxyErrorResponse: If the proxy responded with another error code.
+
+        """
+        async with self.__session.get().request(method, self.url.format(name), json=body,
+                                                timeout=self.__session.timeout) as response:
+            if response.status == 409:
+                raise ProxyResyncRequired()
+            if 399 < response.status or response.status < 200:
+                raise ProxyErrorResponse(await response.text())
+            try:
+                return await response.json(content_type=None)
+            except ValueError:
+                return None
+
+
+class CircuitBreaker(object):
+    """Circuit breaker, that stops submissions to a proxy, that keeps failing.
+
+    After the specified count of consecutive failures the breaker opens and rejects all submissions. Once the reset
+    timeout passes, it lets a single trial submission through. If the trial succeeds, the breaker closes, otherwise
+    it opens again.
+
+    Attributes:
+        __failure_threshold (int): Count of consecutive failures, after which the breaker opens.
+        __reset_timeout (float): Time in seconds, after which an open breaker lets a trial submission through.
+        __failures (int): Count of consecutive failures.
+        __opened (float): Moment of time (according to the event loop clock), the breaker has opened at.
+        __trial (bool): True if a trial submission is in progress.
+
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=10):
+        """Constructor of the CircuitBreaker.
+
+        Args:
+            failure_threshold (int): Count of consecutive failures, after which the breaker opens.
+            reset_timeout (float): Time in seconds, after which an open breaker lets a trial submission through.
+
+        """
+        self.__failure_threshold = failure_threshold
+        self.__reset_timeout = reset_timeout
+        self.__failures = 0
+        self.__opened = None
+        self.__trial = False
+
+    @property
+    def state(self):
+        """Return the state of the CircuitBreaker.
+
+        Returns:
+            str: CLOSED, OPEN or HALF_OPEN.
+
+        """
+        if self.__opened is None:
+            return CLOSED
+        if self.__trial or asyncio.get_event_loop().time() - self.__opened >= self.__reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    @property
+    def reset_timeout(self):
+        """Return the time in seconds, after which an open breaker lets a trial submission through.
+
+        Returns:
+            float: Reset timeout.
+
+        """
+        return self.__reset_timeout
+
+    def allow(self):
+        """Return True if a submission may be made now.
+
+        Returns:
+            bool: True if the breaker is closed or the submission is a trial one.
+
+        """
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self.__trial:
+            self.__trial = True
+            return True
+        return False
+
+    def record_success(self):
+        """Close the breaker after a successful submission."""
+        self.__failures = 0
+        self.__opened = None
+        self.__trial = False
+
+    def record_failure(self):
+        """Count a failed submission and open the breaker if there were too many of them in a row."""
+        self.__failures += 1
+        if self.__trial or self.__failures >= self.__failure_threshold:
+            self.__opened = asyncio.get_event_loop().time()
+        self.__trial = False
+
+
+class ProxyChannel(object):
+    """Ordered delivery of node groups to a single proxy.
+
+    Submissions of the same group are delivered one at a time. If the group changes while its previous state is being
+    delivered, only the latest state is delivered next. A failed submission is retried with an exponential backoff.
+    Groups, that could not be delivered, are delivered again once the circuit breaker of the proxy lets submissions
+    through.
+
+    Attributes:
+        __proxy (Proxy): The proxy.
+        __breaker (CircuitBreaker): Circuit breaker of the proxy.
+        __retries (int): Count of retries of a failed submission.
+        __backoff (float): Delay in seconds before the first retry, that doubles with each following retry.
+        __max_backoff (float): Maximum delay in seconds before a retry.
+        __latest (dict): Named list of node lists and versions of groups, that wait for delivery.
+        __waiters (dict): Named list of futures of submissions, that wait for delivery of their groups.
+        __deliveries (dict): Named list of tasks, that deliver groups.
+        __failed (dict): Named list of node lists and versions of groups, that could not be delivered.
+        __recovery (TimerHandle): Handle of the scheduled delivery of failed groups. None if it is not scheduled.
+        __latency (Histogram): Time of submissions by URLs of proxies. None if metrics are not collected.
+        __failures (Counter): Count of failed submissions by URLs of proxies. None if metrics are not collected.
+
+    """
+    def __init__(self, proxy, breaker, retries=2, backoff=0.1, max_backoff=2, latency=None, failures=None):
+        """Constructor of the ProxyChannel.
+
+        Args:
+            proxy (Proxy): The proxy.
+            breaker (CircuitBreaker): Circuit breaker of the proxy.
+            retries (int): Count of retries of a failed submission.
+            backoff (float): Delay in seconds before the first retry, that doubles with each following retry.
+            max_backoff (float): Maximum delay in seconds before a retry.
+            latency (Histogram): Time of submissions by URLs of proxies.
+            failures (Counter): Count of failed submissions by URLs of proxies.
+
+        """
+        self.__proxy = proxy
+        self.__breaker = breaker
+        self.__retries = retries
+        self.__backoff = backoff
+        self.__max_backoff = max_backoff
+        self.__latest = {}
+        self.__waiters = {}
+        self.__deliveries = {}
+        self.__failed = {}
+        self.__recovery = None
+        self.__latency = latency
+        self.__failures = failures
+
+    def get_stats(self):
+        """Return counts of submissions to the proxy, the state of its circuit breaker and the count of groups,
+        that wait for delivery or could not be delivered.
+
+        Returns:
+            dict: Statistics of the proxy.
+
+        """
+        stats = self.__proxy.get_stats()
+        stats['breaker'] = self.__breaker.state
+        stats['queued'] = len(self.__latest)
+        stats['failed'] = len(self.__failed)
+        return stats
+
+    def submit(self, name, node_list, version):
+        """Schedule delivery of the node group to the proxy.
+
+        Args:
+            name (str): Name of the node group.
+            node_list (list): List of nodes of the group in the ascending order of their weights.
+            version (int): Version of the node group.
+
+        Returns:
+            Future: Future, that gets resolved once this or a later state of the group is delivered, or raises
+                ProxyError if it could not be delivered.
+
+        """
+        future = asyncio.get_event_loop().create_future()
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self.__failed.pop(name, None)
+        self.__latest[name] = (node_list, version)
+        self.__waiters.setdefault(name, []).append(future)
+        if name not in self.__deliveries:
+            self.__deliveries[name] = asyncio.ensure_future(self.__deliver(name))
+        return future
+
+    async def close(self):
+        """Cancel the scheduled delivery of failed groups and close all connections to the proxy.
+
+        Note: awaitable method.
+
+        """
+        if self.__recovery is not None:
+            self.__recovery.cancel()
+        await self.__proxy.close()
+
+    async def __deliver(self, name):
+        """Deliver the latest state of the node group until there are no newer states.
+
+        Note: awaitable method.
+
+        Args:
+            name (str): Name of the node group.
+
+        """
+        try:
+            while name in self.__latest:
+                node_list, version = self.__latest.pop(name)
+                waiters = self.__waiters.pop(name, [])
+                try:
+                    await self.__submit(name, node_list, version)
+                    for waiter in waiters:
+                        waiter.set_result(None)
+                except ProxyError as e:
+                    if name not in self.__latest:
+                        self.__fail(name, node_list, version)
+                    for waiter in waiters:
+                        waiter.set_exception(e)
+        finally:
+            del self.__deliveries[name]
+
+    async def __submit(self, name, node_list, version):
+        """Submit the state of the node group to the proxy, retrying failed submissions.
+
+        Note: awaitable method.
+
+        Args:
+            name (str): Name of the node group.
+            node_list (list): List of nodes of the group.
+            version (int): Version of the node group.
+
+        Raises:
+            ProxyError: If all attempts have failed or the circuit breaker does not let submissions through.
+
+        """
+        for attempt in range(self.__retries + 1):
+            if not self.__breaker.allow():
+                raise ProxyError(name, "circuit breaker of the proxy '{}' is open".format(self.__proxy.url))
+            start = time.perf_counter()
+            try:
+                await self.__proxy.submit_node_group(name, node_list, version)
+                self.__breaker.record_success()
+                return
+            except ProxyError:
+                self.__breaker.record_failure()
+                if self.__failures is not None:
+                    self.__failures.inc(self.__proxy.url)
+                if attempt == self.__retries:
+                    raise
+            finally:
+                if self.__latency is not None:
+                    self.__latency.observe(time.perf_counter() - start, self.__proxy.url)
+            await asyncio.sleep(min(self.__backoff * 2 ** attempt, self.__max_backoff))
+
+    def __fail(self, name, node_list, version):
+        """Remember the state of the node group, that could not be delivered, and schedule its delivery once the
+        circuit breaker lets submissions through.
+
+        Args:
+            name (str): Name of the node group.
+            node_list (list): List of nodes of the group.
+            version (int): Version of the node group.
+
+        """
+        self.__failed[name] = (node_list, version)
+        if self.__recovery is None:
+            delay = self.__breaker.reset_timeout if self.__breaker.state == OPEN else self.__max_backoff
+            self.__recovery = asyncio.get_event_loop().call_later(delay, self.__recover)
+
+    def __recover(self):
+        """Deliver all node groups, that could not be delivered before."""
+        self.__recovery = None
+        failed, self.__failed = self.__failed, {}
+        for name, (node_list, version) in failed.items():
+            if name not in self.__latest:
+                self.submit(name, node_list, version)
 
 
 class IntegrationLayer(object):
     """A facade of an integration layer.
+
+    Node groups are pushed to all proxies concurrently, each of which has its own ProxyChannel. A push is complete
+    once any of the proxies has acknowledged it, while slower proxies keep receiving it in background.
     
     Attributes:
-        __proxy (Proxy): A remote proxy server.
+        __channels (list): Channels to the remote proxy servers.
     
     """
-    def __init__(self, proxy_url):
+    def __init__(self, proxy_url, push_projection=None, session_options=None, retries=2, backoff=0.1, max_backoff=2,
+                 failure_threshold=5, reset_timeout=10, metrics=None):
         """Constructor of the IntegrationLayer.
         
         Args:
-            proxy_url (str): URL of the proxy API.
+            proxy_url (str): URL of the proxy API or a comma-separated list of URLs of several proxies.
+            push_projection (str): Projection of node groups, that is compared to suppress pushes, that do not change
+                what the proxy sees: 'rank' (default), 'weight' or 'none'.
+            session_options (dict): Keyword arguments of the SharedSession, that is used for all requests to each
+                proxy, e.g. returned by get_session_options().
+            retries (int): Count of retries of a failed push to a proxy.
+            backoff (float): Delay in seconds before the first retry, that doubles with each following retry.
+            max_backoff (float): Maximum delay in seconds before a retry.
+            failure_threshold (int): Count of consecutive failures of a proxy, after which it is not pushed to until
+                the reset timeout passes.
+            reset_timeout (float): Time in seconds, after which a failing proxy is tried again.
+            metrics (MetricsRegistry): Registry to register metrics of pushes in.
         
         """
-        self.__proxy = Proxy(proxy_url)
+        latency, failures = None, None
+        if metrics is not None:
+            latency = metrics.histogram('alb_proxy_push_duration_seconds', 'Time of pushes of node groups to proxies.',
+                                        ('proxy',))
+            failures = metrics.counter('alb_proxy_push_failures_total',
+                                       'Count of failed pushes of node groups to proxies.', ('proxy',))
+            metrics.counter('alb_proxy_pushes_sent_total', 'Count of pushes of node groups, sent to proxies.',
+                            ('proxy',), lambda: self.__get_proxy_stat('sent'))
+            metrics.counter('alb_proxy_pushes_suppressed_total', 'Count of pushes of node groups, that would not '
+                            'change what proxies see.', ('proxy',), lambda: self.__get_proxy_stat('suppressed'))
+        urls = [url.strip() for url in (proxy_url or '').split(',') if url.strip()] or [None]
+        self.__channels = [ProxyChannel(Proxy(url, push_projection, SharedSession(**(session_options or {}))),
+                                        CircuitBreaker(failure_threshold, reset_timeout), retries, backoff,
+                                        max_backoff, latency, failures)
+                           for url in urls]
 
-    async def submit_node_group_to_proxy(self, name, node_list):
-        """Submit a node group to the remote proxy.
+    async def close(self):
+        """Close all connections to the proxies.
+
+        Note: awaitable method.
+
+        """
+        await asyncio.gather(*[channel.close() for channel in self.__channels])
+
+    def get_proxy_stats(self):
+        """Return counts of pushes to the proxies, that were sent and that were suppressed, along with statistics of
+        each proxy.
+
+        Returns:
+            dict: Total counts of 'sent' and 'suppressed' pushes and a list of statistics of 'proxies'.
+
+        """
+        proxies = [channel.get_stats() for channel in self.__channels]
+        return {
+            'sent': sum(proxy['sent'] for proxy in proxies),
+            'suppressed': sum(proxy['suppressed'] for proxy in proxies),
+            'proxies': proxies
+        }
+
+    def __get_proxy_stat(self, stat):
+        """Return the specified statistic of each proxy.
+
+        Args:
+            stat (str): Name of the statistic.
+
+        Returns:
+            dict: Values of the statistic by tuples with URLs of proxies.
+
+        """
+        return {(stats['url'],): stats[stat] for stats in (channel.get_stats() for channel in self.__channels)}
+
+    async def submit_node_group_to_proxy(self, name, node_list, version):
+        """Submit a node group to the remote proxies and wait until any of them acknowledges it.
 
         Note: awaitable method.
 
         Args:
             name (str): Name of the node group.
-            node_list (list): List of nodes of the group.
+            node_list (list): List of nodes of the group in the ascending order of their weights. Each node should have
+                a unique name.
+            version (int): Version of the node group.
 
         Raises:
-            ProxyError: If an error occurred while trying to submit the group
+            ProxyError: If none of the proxies has acknowledged the group.
 
         """
-        await self.__proxy.submit_node_group(name, node_list)
+        pending = {channel.submit(name, node_list, version) for channel in self.__channels}
+        errors = []
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return
+                errors.append(future.exception())
+        if len(errors) == 1:
+            raise errors[0]
+        raise ProxyError(name, 'none of {} proxies has acknowledged it'.format(len(errors)))
@@ -0,0 +1,325 @@
+import asyncio
+import time
+from abc import ABCMeta, abstractmethod
+from bisect import bisect_left
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""Default upper bounds of histogram buckets in seconds."""
+CONTENT_TYPE = 'text/plain'
+"""MIME type of the Prometheus text exposition format."""
+
+
+class Metric(object, metaclass=ABCMeta):
+    """Base class for a metric family, that keeps a value per combination of label values.
+
+    Subclasses collect samples of the metric, and the base class renders them.
+
+    Attributes:
+        name (str): Name of the metric.
+        description (str): Description of the metric.
+        type (str): Prometheus type of the metric.
+        label_names (tuple): Names of labels of the metric.
+
+    """
+    def __init__(self, name, description, type, label_names=()):
+        """Constructor of the Metric.
+
+        Args:
+            name (str): Name of the metric.
+            description (str): Description of the metric.
+            type (str): Prometheus type of the metric.
+            label_names (tuple): Names of labels of the metric.
+
+        """
+        self.name = name
+        self.description = description
+        self.type = type
+        self.label_names = label_names
+
+    def render(self):
+        """Return samples of the metric in the Prometheus text exposition format.
+
+        Returns:
+            list: Lines with samples.
+
+        """
+        return ['{}{}{} {}'.format(self.name, suffix, self._format_labels(labels, extra), value)
+                for suffix, labels, extra, value in self._collect()]
+
+    @abstractmethod
+    def _collect(self):
+        """Return samples of the metric.
+
+        Returns:
+            list: Samples, each of which is a tuple of a suffix of the name of the metric, values of its labels,
+                additional pairs of label names and values, and the value of the sample.
+
+        """
+
+    def _format_labels(self, label_values, extra=()):
+        """Return labels of a sample in the exposition format.
+
+        Args:
+            label_values (tuple): Values of labels of the metric.
+            extra (tuple): Additional pairs of label names and values.
+
+        Returns:
+            str: Labels in braces or an empty string if there are no labels.
+
+        """
+        pairs = list(zip(self.label_names, label_values)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                              for name, value in pairs) + '}'
+
+
+class Counter(Metric):
+    """Monotonically increasing counter.
+
+    Values are plain numbers in a dict. All updates happen on the event loop thread, so they need no locks.
+    A counter, that is already kept by another object, can be collected by a function instead.
+
+    Attributes:
+        __values (dict): Values of the counter by tuples of label values.
+        __function (callable): Function, that returns a named list of values by tuples of label values. None if
+            the counter is incremented with inc().
+
+    """
+    def __init__(self, name, description, label_names=(), function=None):
+        """Constructor of the Counter.
+
+        Args:
+            name (str): Name of the metric.
+            description (str): Description of the metric.
+            label_names (tuple): Names of labels of the metric.
+            function (callable): Function, that returns a dict of values by tuples of label values, if the counter
+                is kept by another object.
+
+        """
+        super(Counter, self).__init__(name, description, 'counter', label_names)
+        self.__values = {}
+        self.__function = function
+
+    def inc(self, *label_values, amount=1):
+        """Increment the counter.
+
+        Args:
+            *label_values (str): Values of labels in the order of their names.
+            amount (float): Amount to add.
+
+        """
+        self.__values[label_values] = self.__values.get(label_values, 0) + amount
+
+    def _collect(self):
+        values = self.__function() if self.__function is not None else self.__values
+        return [('', labels, (), value) for labels, value in values.items()]
+
+
+class Gauge(Metric):
+    """Value, that is computed by a function each time metrics are collected.
+
+    Attributes:
+        __function (callable): Function, that returns a named list of values by tuples of label values, or a single
+            value if the gauge has no labels.
+
+    """
+    def __init__(self, name, description, function, label_names=()):
+        """Constructor of the Gauge.
+
+        Args:
+            name (str): Name of the metric.
+            description (str): Description of the metric.
+            function (callable): Function, that returns a dict of values by tuples of label values, or a single value
+                if the gauge has no labels.
+            label_names (tuple): Names of labels of the metric.
+
+        """
+        super(Gauge, self).__init__(name, description, 'gauge', label_names)
+        self.__function = function
+
+    def _collect(self):
+        values = self.__function()
+        if not self.label_names:
+            values = {(): values}
+        return [('', labels, (), value) for labels, value in values.items()]
+
+
+class Histogram(Metric):
+    """Distribution of observed values over buckets.
+
+    Bucket counts of each combination of label values are kept in a list, that is allocated once, and an observation
+    only finds its bucket with a binary search and increments it. Counts are accumulated when metrics are collected.
+
+    Attributes:
+        __buckets (tuple): Sorted upper bounds of buckets.
+        __values (dict): Lists of bucket counts, followed by the sum and the count of observations, by tuples of label
+            values.
+
+    """
+    def __init__(self, name, description, label_names=(), buckets=LATENCY_BUCKETS):
+        """Constructor of the Histogram.
+
+        Args:
+            name (str): Name of the metric.
+            description (str): Description of the metric.
+            label_names (tuple): Names of labels of the metric.
+            buckets (tuple): Sorted upper bounds of buckets.
+
+        """
+        super(Histogram, self).__init__(name, description, 'histogram', label_names)
+        self.__buckets = tuple(buckets)
+        self.__values = {}
+
+    def observe(self, value, *label_values):
+        """Add an observation to the histogram.
+
+        Args:
+            value (float): Observed value.
+            *label_values (str): Values of labels in the order of their names.
+
+        """
+        counts = self.__values.get(label_values)
+        if counts is None:
+            counts = [0] * (len(self.__buckets) + 3)
+            self.__values[label_values] = counts
+        counts[bisect_left(self.__buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    def _collect(self):
+        samples = []
+        for labels, counts in self.__values.items():
+            total = 0
+            for bound, count in zip(self.__buckets + ('+Inf',), counts):
+                total += count
+                samples.append(('_bucket', labels, (('le', bound),), total))
+            samples.append(('_sum', labels, (), counts[-2]))
+            samples.append(('_count', labels, (), counts[-1]))
+        return samples
+
+
+class MetricsRegistry(object):
+    """Registry of metrics of the application.
+
+    Attributes:
+        __metrics (list): Registered metrics in the order of registration.
+
+    """
+    def __init__(self):
+        """Constructor of the MetricsRegistry."""
+        self.__metrics = []
+
+    def counter(self, name, description, label_names=(), function=None):
+        """Register a Counter.
+
+        Args:
+            name (str): Name of the metric.
+            description (str): Description of the metric.
+            label_names (tuple): Names of labels of the metric.
+            function (callable): Function, that returns a dict of values by tuples of label values, if the counter
+                is kept by another object.
+
+        Returns:
+            Counter: The registered counter.
+
+        """
+        return self.__register(Counter(name, description, label_names, function))
+
+    def gauge(self, name, description, function, label_names=()):
+        """Register a Gauge.
+
+        Args:
+            name (str): Name of the metric.
+            description (str): Description of the metric.
+            function (callable): Function, that returns a dict of values by tuples of label values, or a single value
+                if the gauge has no labels.
+            label_names (tuple): Names of labels of the metric.
+
+        Returns:
+            Gauge: The registered gauge.
+
+        """
+        return self.__register(Gauge(name, description, function, label_names))
+
+    def histogram(self, name, description, label_names=(), buckets=LATENCY_BUCKETS):
+        """Register a Histogram.
+
+        Args:
+            name (str): Name of the metric.
+            description (str): Description of the metric.
+            label_names (tuple): Names of labels of the metric.
+            buckets (tuple): Sorted upper bounds of buckets.
+
+        Returns:
+            Histogram: The registered histogram.
+
+        """
+        return self.__register(Histogram(name, description, label_names, buckets))
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format.
+
+        Returns:
+            bytes: Encoded metrics.
+
+        """
+        lines = []
+        for metric in self.__metrics:
+            lines.append('# HELP {} {}'.format(metric.name, metric.description))
+            lines.append('# TYPE {} {}'.format(metric.name, metric.type))
+            lines.extend(metric.render())
+        return ('\n'.join(lines) + '\n').encode()
+
+    def __register(self, metric):
+        """Add the metric to the registry.
+
+        Args:
+            metric (Metric): The metric.
+
+        Returns:
+            Metric: The same metric.
+
+        """
+        self.__metrics.append(metric)
+        return metric
+
+
+class EventLoopLagMonitor(object):
+    """Measures how late the event loop runs scheduled callbacks.
+
+    Sleeps for the specified interval over and over and observes how much longer than the interval each sleep took.
+
+    Attributes:
+        __interval (float): Time in seconds between measurements.
+        __histogram (Histogram): Histogram of measured lags.
+        __lag (float): The latest measured lag in seconds.
+
+    """
+    def __init__(self, registry, interval=0.5):
+        """Constructor of the EventLoopLagMonitor.
+
+        Args:
+            registry (MetricsRegistry): Registry to register metrics of the lag in.
+            interval (float): Time in seconds between measurements.
+
+        """
+        self.__interval = interval
+        self.__histogram = registry.histogram('alb_event_loop_lag_seconds',
+                                              'Delay of scheduled callbacks of the event loop.')
+        registry.gauge('alb_event_loop_lag_latest_seconds', 'The latest measured delay of the event loop.',
+                       lambda: self.__lag)
+        self.__lag = 0.0
+
+    async def run(self):
+        """Measure the lag until the event loop stops.
+
+        Note: awaitable method.
+
+        """
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.__interval)
+            self.__lag = max(time.perf_counter() - start - self.__interval, 0.0)
+            self.__histogram.observe(self.__lag)
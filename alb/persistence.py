@@ -0,0 +1,253 @@
+import asyncio
+import json
+import os
+
+
+SNAPSHOT_FILE = 'snapshot.json'
+"""Name of the file with the latest snapshot of node groups."""
+SEGMENT_TEMPLATE = 'journal-{:020d}.log'
+"""Template of the name of a journal segment file, formatted with the first version, the segment may contain."""
+
+
+class Journal(object):
+    """Durable journal of changes of node groups.
+
+    Keeps an append-only log of operations, that have changed node groups, and periodic snapshots of all node groups.
+    The log is split into segments, each of which starts right after a snapshot. Once a new snapshot is written,
+    segments, that precede it, are removed.
+
+    Records, appended within the same iteration of the event loop, are written and synced to the disk together
+    in a background thread.
+
+    Each record is a list, that starts with the version of node groups, that the operation has produced.
+    A snapshot is a dict with the 'version' of node groups and their compact representations in 'node_groups'.
+
+    Attributes:
+        __directory (str): Directory, that contains the snapshot and the segments.
+        __snapshot_interval (int): Count of records, after which a new snapshot should be taken.
+        __segment (file): Segment, new records are written to.
+        __records_since_snapshot (int): Count of records, appended since the latest snapshot.
+        __lines (list): Encoded records, that were appended but not written yet.
+        __futures (list): Futures of records, that were appended but not written yet.
+        __flush (Future): Future of the write, that is in progress. None if there is no such write.
+        __snapshot (Future): Future of the snapshot, that is being written. None if there is no such snapshot.
+
+    """
+    def __init__(self, directory, snapshot_interval=100000):
+        """Constructor of the Journal.
+
+        Args:
+            directory (str): Directory, that contains the snapshot and the segments. Gets created if it does not exist.
+            snapshot_interval (int): Count of records, after which a new snapshot should be taken.
+
+        """
+        self.__directory = directory
+        self.__snapshot_interval = snapshot_interval
+        self.__segment = None
+        self.__records_since_snapshot = 0
+        self.__lines = []
+        self.__futures = []
+        self.__flush = None
+        self.__snapshot = None
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self):
+        """Return the latest snapshot and records, appended after it, and start a new segment for new records.
+
+        A record, that was not written completely, gets truncated from the segment, it belongs to.
+
+        Returns:
+            tuple: The snapshot (None if there is no snapshot yet) and the list of records in the order they were
+                appended.
+
+        """
+        snapshot = None
+        snapshot_path = os.path.join(self.__directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'rb') as f:
+                snapshot = json.loads(f.read().decode())
+        version = snapshot['version'] if snapshot is not None else 0
+        records = []
+        for segment in self.__get_segments():
+            for record in self.__read_segment(os.path.join(self.__directory, segment)):
+                if record[0] > version:
+                    records.append(record)
+                    version = record[0]
+        self.__records_since_snapshot = len(records)
+        self.__segment = self.__open_segment(version + 1)
+        return snapshot, records
+
+    def append(self, record):
+        """Append the record to the journal.
+
+        Args:
+            record (list): The record. Its first element should be the version, that the operation has produced.
+
+        Returns:
+            Future: Future, that gets resolved once the record is synced to the disk.
+
+        """
+        future = asyncio.get_event_loop().create_future()
+        self.__lines.append(json.dumps(record).encode() + b'\n')
+        self.__futures.append(future)
+        self.__records_since_snapshot += 1
+        if self.__flush is None:
+            self.__flush = asyncio.ensure_future(self.__write_records())
+        return future
+
+    def is_snapshot_due(self):
+        """Return True if enough records were appended since the latest snapshot to take a new one.
+
+        Returns:
+            bool: True if a new snapshot should be taken.
+
+        """
+        return self.__snapshot is None and self.__records_since_snapshot >= self.__snapshot_interval
+
+    def take_snapshot(self, version, node_groups):
+        """Start writing a snapshot of node groups in background. All records, appended after this call, go to
+        a new segment.
+
+        Args:
+            version (int): Version of node groups.
+            node_groups (dict): Named list of compact representations of node groups. Should not be modified after
+                the call.
+
+        """
+        old_segment = self.__segment
+        self.__segment = self.__open_segment(version + 1)
+        self.__records_since_snapshot = 0
+        self.__snapshot = asyncio.ensure_future(self.__write_snapshot(version, node_groups, old_segment))
+
+    async def __write_records(self):
+        """Write and sync all appended records to the current segment, until there are no records left.
+
+        Note: awaitable method.
+
+        """
+        loop = asyncio.get_event_loop()
+        while self.__lines:
+            lines, self.__lines = self.__lines, []
+            futures, self.__futures = self.__futures, []
+            try:
+                await loop.run_in_executor(None, self.__write, self.__segment, lines)
+                for future in futures:
+                    future.set_result(None)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+        self.__flush = None
+
+    async def __write_snapshot(self, version, node_groups, old_segment):
+        """Write the snapshot of node groups and remove segments, that precede it.
+
+        Note: awaitable method.
+
+        Args:
+            version (int): Version of node groups.
+            node_groups (dict): Named list of compact representations of node groups.
+            old_segment (file): Segment, that was current before the snapshot.
+
+        """
+        if self.__flush is not None:
+            await asyncio.wait([self.__flush])
+        old_segment.close()
+        try:
+            await asyncio.get_event_loop().run_in_executor(None, self.__save_snapshot, version, node_groups)
+        except Exception as e:
+            print("Failed to write a snapshot of version {} - {}".format(version, e))
+        finally:
+            self.__snapshot = None
+
+    def __save_snapshot(self, version, node_groups):
+        """Atomically replace the snapshot file and remove segments, that precede the current one.
+
+        Args:
+            version (int): Version of node groups.
+            node_groups (dict): Named list of compact representations of node groups.
+
+        """
+        path = os.path.join(self.__directory, SNAPSHOT_FILE)
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as f:
+            f.write(json.dumps({'version': version, 'node_groups': node_groups}).encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, path)
+        current = SEGMENT_TEMPLATE.format(version + 1)
+        for segment in self.__get_segments():
+            if segment < current:
+                os.remove(os.path.join(self.__directory, segment))
+        self.__sync_directory()
+
+    def __read_segment(self, path):
+        """Return all records of the segment. Truncate the segment after the last complete record.
+
+        Args:
+            path (str): Path to the segment file.
+
+        Returns:
+            list: Records of the segment.
+
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        records = []
+        offset = 0
+        while offset < len(data):
+            end = data.find(b'\n', offset)
+            try:
+                if end < 0:
+                    raise ValueError('Incomplete record')
+                records.append(json.loads(data[offset:end].decode()))
+            except ValueError:
+                with open(path, 'r+b') as f:
+                    f.truncate(offset)
+                    os.fsync(f.fileno())
+                break
+            offset = end + 1
+        return records
+
+    def __write(self, segment, lines):
+        """Write lines to the segment and sync it to the disk.
+
+        Args:
+            segment (file): The segment.
+            lines (list): Encoded records.
+
+        """
+        segment.write(b''.join(lines))
+        segment.flush()
+        os.fsync(segment.fileno())
+
+    def __open_segment(self, version):
+        """Open a new segment for records, that start with the specified version.
+
+        Args:
+            version (int): The first version, the segment may contain.
+
+        Returns:
+            file: The segment, opened for appending.
+
+        """
+        segment = open(os.path.join(self.__directory, SEGMENT_TEMPLATE.format(version)), 'ab')
+        self.__sync_directory()
+        return segment
+
+    def __get_segments(self):
+        """Return names of all segment files in the order of their versions.
+
+        Returns:
+            list: Names of the segment files.
+
+        """
+        return sorted(name for name in os.listdir(self.__directory)
+                      if name.startswith('journal-') and name.endswith('.log'))
+
+    def __sync_directory(self):
+        """Sync the directory, so creation, renaming and removal of files in it survive a crash."""
+        descriptor = os.open(self.__directory, os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
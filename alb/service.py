@@ -1,6 +1,15 @@
+import asyncio
+import json
+import re
+import time
+from collections import OrderedDict
 from json import JSONDecodeError
+from urllib.parse import parse_qsl
 from japronto import Application
 
+from alb.metrics import CONTENT_TYPE
+from core.debug import handle_profile, handle_tasks
+
 
 GET = 'GET'
 """HTTP get method name constant."""
@@ -11,12 +20,126 @@ PUT = 'PUT'
 DELETE = 'DELETE'
 """HTTP delete method name constant."""
 
+JSON = 'application/json'
+"""MIME type of JSON responses."""
+
+OK = 200
+"""HTTP response code for the 'ok' reason constant."""
+NOT_MODIFIED = 304
+"""HTTP response code for the 'not modified' reason constant."""
 BAD_REQUEST = 400
 """HTTP response code for the 'bad request reason constant.'"""
+NOT_FOUND = 404
+"""HTTP response code for the 'not found' reason constant."""
 INTERNAL_ERROR = 500
 """HTTP response code for the 'internal error' reason constant."""
 
 
+class Route(object):
+    """A mapping of requests with the specific method and url to the business process.
+
+    Attributes:
+        method (str): HTTP method name.
+        url (str): URL of the route.
+        business_process (method): Method to call, when request arrives.
+        query (tuple): Names of parameters of the query string to pass to the business process.
+        body (str): Name of the argument of the business process, the whole body of the request is passed in. None if
+            fields of the body are passed as separate arguments.
+        __pattern (Pattern): Regular expression, that matches paths of the route and captures their parameters.
+
+    """
+    def __init__(self, method, url, business_process, query=(), body=None):
+        """Constructor of the Route.
+
+        Args:
+            method (str): HTTP method name.
+            url (str): URL of the route. Parameters of the URL are specified in braces: '/node_group/{group_name}'.
+            business_process (method): Method to call, when request arrives.
+            query (tuple): Names of parameters of the query string to pass to the business process.
+            body (str): Name of the argument of the business process, the whole body of the request is passed in.
+
+        """
+        self.method = method
+        self.url = url
+        self.business_process = business_process
+        self.query = query
+        self.body = body
+        parts = re.split(r'{(\w+)}', url)
+        pattern = ''.join(re.escape(part) if i % 2 == 0 else '(?P<{}>[^/]+)'.format(part)
+                          for i, part in enumerate(parts))
+        self.__pattern = re.compile('^{}$'.format(pattern))
+
+    def match(self, method, path):
+        """Return parameters of the specified path, if the request matches the Route.
+
+        Args:
+            method (str): HTTP method name.
+            path (str): Path of the request.
+
+        Returns:
+            dict: Named list of parameters of the path. If the request does not match the Route, None is returned
+                instead.
+
+        """
+        if method != self.method:
+            return None
+        match = self.__pattern.match(path)
+        return match.groupdict() if match is not None else None
+
+
+class ResponseCache(object):
+    """Cache of JSON-encoded responses.
+
+    Each response is cached along with the version of the resource it was encoded from, and is not returned for
+    other versions. Once the cache is full, the least recently used response is dropped.
+
+    Attributes:
+        __size (int): Maximum count of cached responses.
+        __entries (OrderedDict): Cached versions and responses by their keys, the least recently used first.
+
+    """
+    def __init__(self, size=10000):
+        """Constructor of the ResponseCache.
+
+        Args:
+            size (int): Maximum count of cached responses.
+
+        """
+        self.__size = size
+        self.__entries = OrderedDict()
+
+    def get(self, key, version):
+        """Return the response with the specified key, encoded from the specified version of the resource.
+
+        Args:
+            key (tuple): Key of the response.
+            version (object): Version of the resource.
+
+        Returns:
+            bytes: JSON-encoded response. None if there is no cached response for the version.
+
+        """
+        entry = self.__entries.get(key)
+        if entry is None or entry[0] != version:
+            return None
+        self.__entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, version, response):
+        """Cache the response with the specified key, encoded from the specified version of the resource.
+
+        Args:
+            key (tuple): Key of the response.
+            version (object): Version of the resource.
+            response (bytes): JSON-encoded response.
+
+        """
+        self.__entries[key] = (version, response)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__size:
+            self.__entries.popitem(last=False)
+
+
 class ServiceLayer(object):
     """A facade of a service layer.
 
@@ -31,19 +154,41 @@ class ServiceLayer(object):
         __host (str): Host to listen to incoming requests to.
         __port (int): Port to listen to incoming requests to.
         __application (Application): HTTP server.
+        __routes (list): Routes of all mapped business processes.
+        __errors (dict): Response codes of all mapped business errors.
+        __response_cache (ResponseCache): Cache of encoded responses of business processes, that have a version.
+        __metrics (MetricsRegistry): Registry of metrics of the application. None if metrics are not collected.
+        __requests (Counter): Count of handled requests by their methods, routes and response codes.
+        __latency (Histogram): Time of handling of requests by their methods and routes.
+        __business_errors (Counter): Count of errors, raised by business processes, by their types.
 
     """
-    def __init__(self, host, port):
+    def __init__(self, host, port, metrics=None, response_cache_size=10000):
         """Constructor of the ServiceLayer.
 
         Args:
             host (str): Host to listen to incoming requests to.
             port (int): Port to listen to incoming requests to.
+            metrics (MetricsRegistry): Registry of metrics of the application. If specified, each request is counted
+                and timed.
+            response_cache_size (int): Maximum count of encoded responses to cache.
 
         """
         self.__host = host or '0.0.0.0'
         self.__port = port or 5000
         self.__application = Application()
+        self.__routes = []
+        self.__errors = {}
+        self.__response_cache = ResponseCache(response_cache_size)
+        self.__metrics = metrics
+        if metrics is not None:
+            self.__requests = metrics.counter('alb_http_requests_total', 'Count of handled HTTP requests.',
+                                              ('method', 'route', 'code'))
+            self.__latency = metrics.histogram('alb_http_request_duration_seconds', 'Time of handling HTTP requests.',
+                                               ('method', 'route'))
+            self.__business_errors = metrics.counter('alb_business_errors_total',
+                                                     'Count of errors, raised by business processes.',
+                                                     ('error', 'code'))
         self.map_business_error(TypeError, 402)
 
     def map_business_error(self, error, code):
@@ -56,31 +201,301 @@ class ServiceLayer(object):
         """
         def handle(request, exception):
             return request.Response(code=code, text=str(exception))
+        self.__errors[error] = code
         self.__application.add_error_handler(error, handle)
 
-    def map_business_process(self, method, url, business_process):
+    def map_business_process(self, method, url, business_process, version=None, query=(), body=None):
         """Call a specified method, each time a request with the specified method and url arrives. Use a return value
         of the method as a response data. If specified method returns None, server will respond with a plain 200 OK.
 
+        If a version method is specified, it gets called with parameters of the url, and the version it returns is
+        sent as an ETag of the response. If the request has an If-None-Match header with the same ETag, server
+        responds with a 304 Not Modified without calling the business process. Otherwise the encoded response is
+        cached for that version, so the business process is not called again until the version changes. Requests
+        with the 'watch' parameter wait for changes instead, so they are neither answered with a 304 nor cached, and
+        their ETag is taken once the business process returns.
+
+        Parameters of the query string of the request are passed to the business process only if they are listed
+        in the query argument. Fields of the JSON body of the request are passed as separate arguments, unless the
+        body argument is specified, in which case the whole body is passed in the argument with that name.
+
         Args:
             method (str): HTTP method name.
             url (str): URL of the incoming request.
             business_process (method): Method to call, when request arrives.
+            version (method): Method, that returns the current version of the requested resource.
+            query (tuple): Names of parameters of the query string to pass to the business process.
+            body (str): Name of the argument of the business process to pass the whole body of the request in.
 
         """
         async def handle(request):
-            arguments = request.match_dict or {}
+            start = time.perf_counter()
+            code = INTERNAL_ERROR
             try:
-                if request.json is not None:
-                    arguments.update(request.json)
-            except JSONDecodeError:
-                pass
-            result = await business_process(**arguments)
-            return request.Response(json=result) \
-                if result is not None \
-                else request.Response()
+                parameters = request.match_dict or {}
+                arguments = dict(parameters)
+                for name in query:
+                    if name in request.query:
+                        arguments[name] = request.query[name]
+                key, current = None, None
+                if version is not None and 'watch' not in arguments:
+                    current = version(**parameters)
+                    etag = '"{}"'.format(current)
+                    if etag in self.__get_if_none_match(request):
+                        code = NOT_MODIFIED
+                        return request.Response(code=NOT_MODIFIED, headers={'ETag': etag})
+                    key = (method, url) + tuple(sorted(arguments.items()))
+                    cached = self.__response_cache.get(key, current)
+                    if cached is not None:
+                        code = OK
+                        return request.Response(body=cached, mime_type=JSON, headers={'ETag': etag})
+                try:
+                    if request.json is not None:
+                        if body is None:
+                            arguments.update(request.json)
+                        else:
+                            arguments[body] = request.json
+                except JSONDecodeError:
+                    pass
+                result = await business_process(**arguments)
+                code = OK
+                headers = None
+                if version is not None:
+                    latest = version(**parameters)
+                    headers = {'ETag': '"{}"'.format(latest)}
+                if result is None:
+                    return request.Response(headers=headers)
+                response = self.__encode(result)
+                if key is not None and latest == current:
+                    self.__response_cache.put(key, current, response)
+                return request.Response(body=response, mime_type=JSON, headers=headers)
+            except Exception as e:
+                code = self.__get_error_code(e)
+                raise
+            finally:
+                self.__observe(method, url, code, start)
+        self.__routes.append(Route(method, url, business_process, query, body))
         self.__application.router.add_route(url, handle, method=method)
 
+    def map_batch_process(self, url, transaction=None):
+        """Execute a list of operations each time a POST request with the specified url arrives.
+
+        The body of the request should be a list of operations, each of which is an object with the 'method', the
+        'path' and an optional 'body' of the request, that should be executed. Each operation is dispatched to the
+        business process, that was mapped to its method and path, and is processed the same way a standalone request
+        would be. The response contains a list of results, one per operation, in the same order. Each result has a
+        'code' and either a 'body' with the return value of the business process or an 'error' with a reason of
+        the failure. A malformed body is rejected with a 400 Bad Request, while a malformed operation only gets
+        a result with the 400 code.
+
+        If a transaction is specified, all operations are executed within a new context, returned by it. The context
+        should defer side effects of operations, e.g. pushes of node groups, until push() is called. It should
+        return keys of side effects, deferred since the previous call, from pop_deferred(), which gets called after
+        each operation, and errors of failed side effects by their keys from push(), which gets called after all
+        operations. An operation, that has succeeded, but one of whose side effects has failed, is reported with
+        the error of that side effect.
+
+        Args:
+            url (str): URL of the incoming request.
+            transaction (callable): Function, that returns an asynchronous context manager, within which all
+                operations of the request are executed, e.g. BusinessLayerFacade.defer_pushes.
+
+        """
+        async def handle(request):
+            start = time.perf_counter()
+            code = INTERNAL_ERROR
+            try:
+                try:
+                    operations = request.json
+                except ValueError as e:
+                    code = BAD_REQUEST
+                    return request.Response(code=BAD_REQUEST, text='Request body is malformed: {}'.format(e))
+                if not isinstance(operations, list):
+                    code = BAD_REQUEST
+                    return request.Response(code=BAD_REQUEST, text='Request body should be a list of operations')
+                if transaction is None:
+                    results = [await self.__execute(operation) for operation in operations]
+                else:
+                    results = await self.__execute_transaction(transaction, operations)
+                code = OK
+                return request.Response(body=b'[' + b','.join(result for _, result in results) + b']',
+                                        mime_type=JSON)
+            finally:
+                self.__observe(POST, url, code, start)
+        self.__application.router.add_route(url, handle, method=POST)
+
+    def map_metrics(self, url='/metrics'):
+        """Respond with all metrics of the application in the Prometheus text exposition format each time a GET
+        request with the specified url arrives.
+
+        Args:
+            url (str): URL of the incoming request.
+
+        """
+        def handle(request):
+            return request.Response(body=self.__metrics.render(), mime_type=CONTENT_TYPE)
+        self.__application.router.add_route(url, handle, method=GET)
+
+    def map_debug(self, url='/debug'):
+        """Serve debugging endpoints under the specified url: GET {url}/profile?seconds=N samples stacks of the
+        service for N seconds and responds with collapsed stacks, GET {url}/tasks responds with a dump of pending
+        tasks of the event loop.
+
+        Args:
+            url (str): Common prefix of URLs of the endpoints.
+
+        """
+        self.__application.router.add_route(url + '/profile', handle_profile, method=GET)
+        self.__application.router.add_route(url + '/tasks', handle_tasks, method=GET)
+
+    def __get_if_none_match(self, request):
+        """Return ETags, listed in the If-None-Match header of the request.
+
+        Args:
+            request (Request): Instance of the HTTP request.
+
+        Returns:
+            list: ETags from the header. Empty if the request has no such header.
+
+        """
+        header = request.headers.get('If-None-Match') or request.headers.get('if-none-match')
+        return [etag.strip() for etag in header.split(',')] if header else []
+
+    async def __execute_transaction(self, transaction, operations):
+        """Execute operations of a batch request within a new context of the transaction and return their results.
+        An operation, that has succeeded, but one of whose deferred side effects has failed, gets the result of
+        the failure.
+
+        Args:
+            transaction (callable): Function, that returns an asynchronous context manager, within which all
+                operations are executed.
+            operations (list): Operations, each of which has the 'method', the 'path' and an optional 'body' of the
+                request.
+
+        Returns:
+            list: Response codes and JSON-encoded results of the operations.
+
+        """
+        results = []
+        deferred = []
+        async with transaction() as context:
+            for operation in operations:
+                results.append(await self.__execute(operation))
+                deferred.append(context.pop_deferred())
+            errors = await context.push()
+        for position, keys in enumerate(deferred):
+            failures = [errors[key] for key in keys if key in errors]
+            if failures and results[position][0] == OK:
+                code = self.__get_error_code(failures[0])
+                results[position] = (code, self.__encode_error(code, str(failures[0])))
+        return results
+
+    async def __execute(self, operation):
+        """Execute an operation of a batch request and return its result.
+
+        Args:
+            operation (dict): Operation with the 'method', the 'path' and an optional 'body' of the request.
+
+        Returns:
+            tuple: Response code and JSON-encoded result of the operation with the response 'code' and either
+                a 'body' or an 'error'.
+
+        """
+        if not isinstance(operation, dict) or not isinstance(operation.get('method'), str) \
+                or not isinstance(operation.get('path'), str):
+            return BAD_REQUEST, self.__encode_error(BAD_REQUEST, "Operation should have a 'method' and a 'path', "
+                                                                 "which are strings")
+        path, _, query = operation['path'].partition('?')
+        for route in self.__routes:
+            arguments = route.match(operation['method'], path)
+            if arguments is not None:
+                break
+        else:
+            return NOT_FOUND, self.__encode_error(NOT_FOUND, 'No business process is mapped to {} {}'.format(
+                operation['method'], operation['path']))
+        if route.body is None and not isinstance(operation.get('body') or {}, dict):
+            return BAD_REQUEST, self.__encode_error(BAD_REQUEST, "Operation 'body' should be an object")
+        try:
+            arguments.update((name, value) for name, value in parse_qsl(query) if name in route.query)
+            if route.body is None:
+                arguments.update(operation.get('body') or {})
+            elif operation.get('body') is not None:
+                arguments[route.body] = operation['body']
+            result = await route.business_process(**arguments)
+        except Exception as e:
+            code = self.__get_error_code(e)
+            return code, self.__encode_error(code, str(e))
+        return OK, '{{"code":{},"body":'.format(OK).encode() + self.__encode(result) + b'}'
+
+    def __get_error_code(self, error):
+        """Return the response code, that corresponds to the error, raised by a business process, and count the
+        error.
+
+        Args:
+            error (Exception): The error.
+
+        Returns:
+            int: Response code, mapped to the type of the error or to one of its base types. INTERNAL_ERROR if none
+                of them is mapped.
+
+        """
+        code = INTERNAL_ERROR
+        for error_type in type(error).__mro__:
+            if error_type in self.__errors:
+                code = self.__errors[error_type]
+                break
+        if self.__metrics is not None:
+            self.__business_errors.inc(type(error).__name__, code)
+        return code
+
+    def __observe(self, method, url, code, start):
+        """Count the handled request and its handling time.
+
+        Args:
+            method (str): HTTP method name.
+            url (str): URL of the route, that has handled the request.
+            code (int): Response code.
+            start (float): Moment of time (according to time.perf_counter()), handling of the request started at.
+
+        """
+        if self.__metrics is not None:
+            self.__requests.inc(method, url, code)
+            self.__latency.observe(time.perf_counter() - start, method, url)
+
+    def __encode(self, result):
+        """Return the JSON-encoded return value of a business process.
+
+        Args:
+            result (object): Return value of the business process.
+
+        Returns:
+            bytes: JSON-encoded return value.
+
+        """
+        return json.dumps(result).encode()
+
+    def __encode_error(self, code, reason):
+        """Return a JSON-encoded result of a failed operation of a batch request.
+
+        Args:
+            code (int): Response code of the operation.
+            reason (str): Reason of the failure.
+
+        Returns:
+            bytes: JSON-encoded result of the operation.
+
+        """
+        return json.dumps({'code': code, 'error': reason}).encode()
+
+    def run_on_startup(self, coroutine_function):
+        """Run the specified coroutine function in background once the HTTP server starts.
+
+        Args:
+            coroutine_function (callable): Function, that returns a coroutine.
+
+        """
+        self.__application.loop.call_soon(lambda: asyncio.ensure_future(coroutine_function()))
+
     def run(self):
         """Run the HTTP server."""
         self.__application.run(host=self.__host, port=self.__port)
@@ -0,0 +1,370 @@
+"""Measure throughput and latency of the ALB REST API under a mixed workload.
+
+Starts the ALB in a subprocess along with a local stub proxy, that accepts all pushes, pre-populates it with groups of
+nodes with attributes through the /batch endpoint and then drives a workload, that mostly updates values of attributes
+and periodically reads all node groups, from the specified count of concurrent clients. Results are printed as a JSON
+object, so they can be stored and compared between commits.
+
+Usage: python3 -m benchmarks.alb_load [--groups N] [--nodes M] [--attributes K] [--concurrency C] [--duration S]
+                                      [--get-ratio R] [--env NAME=VALUE ...] [--output PATH] [--url URL]
+
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.http_session import handle_connection
+from core.session import SharedSession
+
+
+ATTRIBUTES = ['cpu', 'memory', 'latency', 'distance', 'connections', 'errors', 'disk', 'network']
+"""Names of attributes, that nodes of the benchmarked groups have."""
+BATCH_SIZE = 500
+"""Count of operations in a single batch request, that populates the ALB."""
+PERCENTILES = (('p50', 0.5), ('p99', 0.99), ('p999', 0.999))
+"""Names and ranks of reported latency percentiles."""
+STARTUP_TIMEOUT = 30
+"""Time in seconds to wait for the ALB to start accepting requests."""
+
+
+def get_free_port():
+    """Return a TCP port, that is free on the loopback interface.
+
+    Returns:
+        int: The port.
+
+    """
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def get_percentile(latencies, rank):
+    """Return the nearest-rank percentile of the sorted latencies.
+
+    Args:
+        latencies (list): Sorted latencies in seconds.
+        rank (float): Rank of the percentile from 0 to 1.
+
+    Returns:
+        float: The percentile in milliseconds. None if there are no latencies.
+
+    """
+    if not latencies:
+        return None
+    index = min(max(math.ceil(rank * len(latencies)) - 1, 0), len(latencies) - 1)
+    return round(latencies[index] * 1000, 3)
+
+
+def summarize(latencies, errors, seconds):
+    """Return statistics of requests of a single kind.
+
+    Args:
+        latencies (list): Latencies of successful requests in seconds.
+        errors (int): Count of failed requests.
+        seconds (float): Duration of the workload in seconds.
+
+    Returns:
+        dict: Count of requests, count of errors, throughput in requests per second and latency percentiles in
+            milliseconds.
+
+    """
+    latencies = sorted(latencies)
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / seconds, 1),
+        'mean': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None
+    }
+    for name, rank in PERCENTILES:
+        summary[name] = get_percentile(latencies, rank)
+    return summary
+
+
+class LoadGenerator(object):
+    """Client, that populates the ALB and drives the workload against it.
+
+    Attributes:
+        __url (str): Base URL of the ALB.
+        __session (SharedSession): HTTP client session, shared by all clients.
+        __groups (int): Count of node groups.
+        __nodes (int): Count of nodes in each group.
+        __attributes (list): Names of attributes of each node.
+        __latencies (dict): Latencies of successful requests in seconds by kinds of requests.
+        __errors (dict): Counts of failed requests by kinds of requests.
+
+    """
+    def __init__(self, url, session, groups, nodes, attributes):
+        """Constructor of the LoadGenerator.
+
+        Args:
+            url (str): Base URL of the ALB.
+            session (SharedSession): HTTP client session, shared by all clients.
+            groups (int): Count of node groups.
+            nodes (int): Count of nodes in each group.
+            attributes (int): Count of attributes of each node.
+
+        """
+        self.__url = url
+        self.__session = session
+        self.__groups = groups
+        self.__nodes = nodes
+        self.__attributes = [ATTRIBUTES[i % len(ATTRIBUTES)] + ('' if i < len(ATTRIBUTES) else str(i))
+                             for i in range(attributes)]
+        self.__latencies = {'put_attribute': [], 'get_node_groups': []}
+        self.__errors = {'put_attribute': 0, 'get_node_groups': 0}
+
+    async def wait_ready(self, process=None):
+        """Wait until the ALB starts accepting requests.
+
+        Note: awaitable method.
+
+        Args:
+            process (Popen): Process of the ALB. If it exits before it becomes ready, an error is raised.
+
+        Raises:
+            RuntimeError: If the ALB does not become ready in time.
+
+        """
+        deadline = time.perf_counter() + STARTUP_TIMEOUT
+        while time.perf_counter() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError('ALB exited with code {}'.format(process.returncode))
+            try:
+                await self.__request('GET', '/node_group')
+                return
+            except (OSError, asyncio.TimeoutError):
+                await asyncio.sleep(0.1)
+        raise RuntimeError('ALB did not start in {} seconds'.format(STARTUP_TIMEOUT))
+
+    async def populate(self):
+        """Create all node groups, nodes and attributes in batches.
+
+        Note: awaitable method.
+
+        Returns:
+            float: Time in seconds, that populating has taken.
+
+        """
+        start = time.perf_counter()
+        operations = []
+        for g in range(self.__groups):
+            operations.append({'method': 'POST', 'path': '/node_group/group-{}'.format(g)})
+            for n in range(self.__nodes):
+                node_path = '/node_group/group-{}/node/node-{}'.format(g, n)
+                operations.append({'method': 'POST', 'path': node_path,
+                                   'body': {'host': '10.0.{}.{}'.format(n // 250, n % 250 + 1), 'port': 80}})
+                for i, attribute in enumerate(self.__attributes):
+                    operations.append({'method': 'POST', 'path': '{}/attribute/{}'.format(node_path, attribute),
+                                       'body': {'value': random.randint(1, 100), 'weight': i + 1}})
+        for i in range(0, len(operations), BATCH_SIZE):
+            await self.__request('POST', '/batch', operations[i:i + BATCH_SIZE])
+        return time.perf_counter() - start
+
+    async def run(self, concurrency, duration, get_ratio):
+        """Drive the workload and return its statistics.
+
+        Each client in a loop either reads all node groups with the specified probability, or updates the value of a
+        random attribute of a random node.
+
+        Note: awaitable method.
+
+        Args:
+            concurrency (int): Count of concurrent clients.
+            duration (float): Duration of the workload in seconds.
+            get_ratio (float): Share of requests, that read all node groups.
+
+        Returns:
+            dict: Statistics of all requests and of each kind of requests.
+
+        """
+        deadline = time.perf_counter() + duration
+
+        async def client():
+            while time.perf_counter() < deadline:
+                if random.random() < get_ratio:
+                    await self.__measure('get_node_groups', 'GET', '/node_group')
+                else:
+                    path = '/node_group/group-{}/node/node-{}/attribute/{}'.format(
+                        random.randrange(self.__groups), random.randrange(self.__nodes),
+                        random.choice(self.__attributes))
+                    await self.__measure('put_attribute', 'PUT', path, {'value': random.randint(1, 100)})
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client() for _ in range(concurrency)])
+        seconds = time.perf_counter() - start
+        results = {kind: summarize(latencies, self.__errors[kind], seconds)
+                   for kind, latencies in self.__latencies.items()}
+        results['total'] = summarize([latency for latencies in self.__latencies.values() for latency in latencies],
+                                     sum(self.__errors.values()), seconds)
+        return results
+
+    async def __measure(self, kind, method, path, body=None):
+        """Execute a request and record its latency or its failure.
+
+        Note: awaitable method.
+
+        Args:
+            kind (str): Kind of the request.
+            method (str): HTTP method name.
+            path (str): Path of the request.
+            body (object): Body of the request.
+
+        """
+        start = time.perf_counter()
+        try:
+            await self.__request(method, path, body)
+        except (OSError, asyncio.TimeoutError, RuntimeError):
+            self.__errors[kind] += 1
+        else:
+            self.__latencies[kind].append(time.perf_counter() - start)
+
+    async def __request(self, method, path, body=None):
+        """Execute a request and read its response.
+
+        Note: awaitable method.
+
+        Args:
+            method (str): HTTP method name.
+            path (str): Path of the request.
+            body (object): Body of the request.
+
+        Returns:
+            bytes: Body of the response.
+
+        Raises:
+            RuntimeError: If the ALB responds with an error.
+
+        """
+        async with self.__session.get().request(method, self.__url + path, json=body,
+                                                timeout=self.__session.timeout) as response:
+            content = await response.read()
+            if response.status >= 400:
+                raise RuntimeError('{} {} failed with {}: {}'.format(method, path, response.status, content))
+            return content
+
+
+def start_alb(port, proxy_port, environment):
+    """Start the ALB in a subprocess.
+
+    Args:
+        port (int): Port for the ALB to listen to.
+        proxy_port (int): Port of the stub proxy.
+        environment (dict): Additional environment variables of the ALB.
+
+    Returns:
+        Popen: Process of the ALB.
+
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env.update(HOST='127.0.0.1', PORT=str(port), PROXY_URL='http://127.0.0.1:{}/node_group/{{}}'.format(proxy_port))
+    env.update(environment)
+    return subprocess.Popen([sys.executable, os.path.join(root, 'alb.py')], cwd=root, env=env,
+                            stdout=subprocess.DEVNULL)
+
+
+def get_revision():
+    """Return the git revision of the working tree.
+
+    Returns:
+        str: Hash of the current commit. None if it could not be determined.
+
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(arguments):
+    """Run the benchmark and print its results.
+
+    Note: awaitable method.
+
+    Args:
+        arguments (Namespace): Parsed command line arguments.
+
+    """
+    process = None
+    proxy = None
+    url = arguments.url
+    if url is None:
+        proxy = await asyncio.start_server(handle_connection, '127.0.0.1', 0)
+        port = get_free_port()
+        process = start_alb(port, proxy.sockets[0].getsockname()[1],
+                            dict(variable.split('=', 1) for variable in arguments.env))
+        url = 'http://127.0.0.1:{}'.format(port)
+    session = SharedSession(connection_limit=arguments.concurrency)
+    generator = LoadGenerator(url.rstrip('/'), session, arguments.groups, arguments.nodes, arguments.attributes)
+    try:
+        await generator.wait_ready(process)
+        populate_seconds = await generator.populate()
+        results = await generator.run(arguments.concurrency, arguments.duration, arguments.get_ratio)
+    finally:
+        await session.close()
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if proxy is not None:
+            proxy.close()
+            await proxy.wait_closed()
+    report = {
+        'revision': get_revision(),
+        'python': platform.python_version(),
+        'parameters': {
+            'groups': arguments.groups,
+            'nodes': arguments.nodes,
+            'attributes': arguments.attributes,
+            'concurrency': arguments.concurrency,
+            'duration': arguments.duration,
+            'get_ratio': arguments.get_ratio,
+            'env': arguments.env
+        },
+        'populate_seconds': round(populate_seconds, 3),
+        'results': results
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    print(output)
+    if arguments.output:
+        with open(arguments.output, 'w') as f:
+            f.write(output + '\n')
+
+
+def parse_arguments(argv):
+    """Parse command line arguments of the benchmark.
+
+    Args:
+        argv (list): Command line arguments without the name of the program.
+
+    Returns:
+        Namespace: Parsed arguments.
+
+    """
+    parser = argparse.ArgumentParser(prog='python3 -m benchmarks.alb_load',
+                                     description='Measure throughput and latency of the ALB REST API.')
+    parser.add_argument('--groups', type=int, default=10, help='count of node groups')
+    parser.add_argument('--nodes', type=int, default=100, help='count of nodes in each group')
+    parser.add_argument('--attributes', type=int, default=4, help='count of attributes of each node')
+    parser.add_argument('--concurrency', type=int, default=50, help='count of concurrent clients')
+    parser.add_argument('--duration', type=float, default=30, help='duration of the workload in seconds')
+    parser.add_argument('--get-ratio', type=float, default=0.01,
+                        help='share of requests, that read all node groups')
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                        help='environment variable of the ALB, e.g. NODE_GROUP_BACKEND=columnar')
+    parser.add_argument('--output', help='path of a file to write the results to')
+    parser.add_argument('--url', help='base URL of an already running ALB to benchmark instead of starting one')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main(parse_arguments(sys.argv[1:])))
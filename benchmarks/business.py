@@ -0,0 +1,391 @@
+"""Time operations of alb.business and measure its memory usage per node.
+
+Benchmarks Attribute, Node, NodeGroup, NodeGroupRepository and BusinessLayerFacade in process, with an integration
+layer, that accepts all pushes without sending them anywhere. Each operation is timed at each of the specified counts
+of nodes and its time is reported per node, so an operation, whose time per node grows with the count of nodes, does
+more than linear work and is marked in the results. Memory per node is measured with tracemalloc in a separate run,
+so tracing does not affect the timings.
+
+Usage: python3 -m benchmarks.business [node_count ...]
+
+"""
+import asyncio
+import math
+import sys
+import time
+import tracemalloc
+
+from alb.business import Attribute, Node, NodeGroup, NodeGroupRepository, BusinessLayerFacade
+
+
+ATTRIBUTES = ['cpu', 'memory', 'latency', 'distance']
+"""Names of attributes, that each benchmarked node has."""
+FACADE_ROUNDS = 10
+"""Count of rounds, in which business processes of each operation are executed concurrently through the
+BusinessLayerFacade. Each round costs a push of the whole group, so the count of pushes does not depend on the count
+of nodes."""
+SCALING_THRESHOLD = 10 ** 0.5
+"""Growth of the time per node per tenfold growth of the count of nodes, above which an operation is marked as
+superlinear. It lies halfway on a logarithmic scale between a constant and a linear time per node."""
+ROW_TEMPLATE = '{component:<22}{operation:<20}{nodes:>8}{seconds:>10}{per_node:>12}{memory:>14}'
+"""Template of a row of the results table."""
+
+
+class NullIntegrationLayer(object):
+    """Integration layer, that accepts all pushes without sending them anywhere."""
+    async def submit_node_group_to_proxy(self, group_name, node_list, version=None):
+        """Accept the push of the node group.
+
+        Note: awaitable method.
+
+        Args:
+            group_name (str): Name of the node group.
+            node_list (list): Nodes of the group.
+            version (int): Version of the group.
+
+        """
+        pass
+
+    def get_proxy_stats(self):
+        """Return statistics of pushes.
+
+        Returns:
+            dict: Empty statistics.
+
+        """
+        return {}
+
+
+def get_node_name(i):
+    """Return the name of the node with the specified number.
+
+    Args:
+        i (int): Number of the node.
+
+    Returns:
+        str: Name of the node.
+
+    """
+    return 'node-{}'.format(i)
+
+
+def build_attributes(node_count):
+    """Create as many attributes, as nodes of the specified count have.
+
+    Args:
+        node_count (int): Count of nodes.
+
+    Returns:
+        list: Created attributes.
+
+    """
+    return [Attribute(i % 100, j + 1) for i in range(node_count) for j in range(len(ATTRIBUTES))]
+
+
+def update_attributes(attributes):
+    """Update the value of each attribute once.
+
+    Args:
+        attributes (list): Attributes to update.
+
+    """
+    for i, attribute in enumerate(attributes):
+        attribute.value = i % 7 + 1
+
+
+def build_nodes(node_count):
+    """Create nodes with attributes.
+
+    Args:
+        node_count (int): Count of nodes.
+
+    Returns:
+        list: Created nodes.
+
+    """
+    nodes = []
+    for i in range(node_count):
+        node = Node('host-{}'.format(i), 80)
+        for j, attribute in enumerate(ATTRIBUTES):
+            node.add_attribute(attribute, i % 100, j + 1)
+        nodes.append(node)
+    return nodes
+
+
+def update_nodes(nodes):
+    """Update the value of each attribute of each node once.
+
+    Args:
+        nodes (list): Nodes to update.
+
+    """
+    for i, node in enumerate(nodes):
+        for attribute in ATTRIBUTES:
+            node.update_attribute(attribute, value=i % 7 + 1)
+
+
+def build_node_group(node_count):
+    """Create a node group and fill it with nodes and their attributes.
+
+    Args:
+        node_count (int): Count of nodes.
+
+    Returns:
+        NodeGroup: Filled node group.
+
+    """
+    node_group = NodeGroup()
+    for i in range(node_count):
+        name = get_node_name(i)
+        node_group.add_node(name, 'host-{}'.format(i), 80)
+        for j, attribute in enumerate(ATTRIBUTES):
+            node_group.add_node_attribute(name, attribute, i % 100, j + 1)
+    return node_group
+
+
+def update_node_group(node_group, node_count):
+    """Update the value of each attribute of each node of the group once.
+
+    Args:
+        node_group (NodeGroup): Node group to update.
+        node_count (int): Count of nodes in the group.
+
+    """
+    for i in range(node_count):
+        name = get_node_name(i)
+        for attribute in ATTRIBUTES:
+            node_group.update_node_attribute(name, attribute, value=i % 7 + 1)
+
+
+def remove_nodes(node_group, node_count):
+    """Remove all nodes from the group.
+
+    Args:
+        node_group (NodeGroup): Node group to empty.
+        node_count (int): Count of nodes in the group.
+
+    """
+    for i in range(node_count):
+        node_group.remove_node(get_node_name(i))
+
+
+def build_repository(group_count):
+    """Create a repository and save groups with a single node each in it.
+
+    Args:
+        group_count (int): Count of groups.
+
+    Returns:
+        NodeGroupRepository: Filled repository.
+
+    """
+    repository = NodeGroupRepository()
+    for i in range(group_count):
+        node_group = NodeGroup()
+        node_group.add_node(get_node_name(i), 'host-{}'.format(i), 80)
+        repository.save('group-{}'.format(i), node_group)
+    return repository
+
+
+def read_repository(repository, group_count):
+    """Read each group of the repository once.
+
+    Args:
+        repository (NodeGroupRepository): Repository to read.
+        group_count (int): Count of groups in the repository.
+
+    """
+    for i in range(group_count):
+        repository.get_node_group('group-{}'.format(i))
+
+
+def empty_repository(repository, group_count):
+    """Remove all groups from the repository.
+
+    Args:
+        repository (NodeGroupRepository): Repository to empty.
+        group_count (int): Count of groups in the repository.
+
+    """
+    for i in range(group_count):
+        repository.remove('group-{}'.format(i))
+
+
+def run_concurrently(loop, business_processes):
+    """Execute business processes concurrently in FACADE_ROUNDS rounds, so pushes of their changes get coalesced the
+    way they are for concurrent requests.
+
+    Args:
+        loop (AbstractEventLoop): Event loop to execute business processes in.
+        business_processes (iterable): Functions, that return coroutines of business processes.
+
+    """
+    business_processes = list(business_processes)
+    size = max(-(-len(business_processes) // FACADE_ROUNDS), 1)
+    for i in range(0, len(business_processes), size):
+        loop.run_until_complete(asyncio.gather(*[business_process()
+                                                 for business_process in business_processes[i:i + size]]))
+
+
+def build_facade(loop, node_count):
+    """Create a facade and fill a single group of it with nodes and their attributes.
+
+    Args:
+        loop (AbstractEventLoop): Event loop to execute business processes in.
+        node_count (int): Count of nodes.
+
+    Returns:
+        BusinessLayerFacade: Filled facade.
+
+    """
+    facade = BusinessLayerFacade(NullIntegrationLayer(), push_window=0, push_max_delay=0)
+    loop.run_until_complete(facade.create_node_group('group'))
+    run_concurrently(loop, [lambda i=i: facade.create_node('group', get_node_name(i), 'host-{}'.format(i), 80)
+                            for i in range(node_count)])
+    run_concurrently(loop, [lambda i=i, j=j, attribute=attribute: facade.create_node_attribute(
+        'group', get_node_name(i), attribute, i % 100, j + 1)
+        for i in range(node_count) for j, attribute in enumerate(ATTRIBUTES)])
+    return facade
+
+
+def update_facade(loop, facade, node_count):
+    """Update the value of each attribute of each node of the group of the facade once.
+
+    Args:
+        loop (AbstractEventLoop): Event loop to execute business processes in.
+        facade (BusinessLayerFacade): Facade to update.
+        node_count (int): Count of nodes in the group.
+
+    """
+    run_concurrently(loop, [lambda i=i, attribute=attribute: facade.update_node_attribute(
+        'group', get_node_name(i), attribute, value=i % 7 + 1)
+        for i in range(node_count) for attribute in ATTRIBUTES])
+
+
+def remove_facade_nodes(loop, facade, node_count):
+    """Remove all nodes from the group of the facade.
+
+    Args:
+        loop (AbstractEventLoop): Event loop to execute business processes in.
+        facade (BusinessLayerFacade): Facade to update.
+        node_count (int): Count of nodes in the group.
+
+    """
+    run_concurrently(loop, [lambda i=i: facade.remove_node('group', get_node_name(i)) for i in range(node_count)])
+
+
+def measure(function, *args):
+    """Call the specified function with the specified arguments and return the time it took.
+
+    Args:
+        function (callable): Function to call.
+        *args: Arguments of the function.
+
+    Returns:
+        tuple: Return value of the function and the time in seconds.
+
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def measure_memory(function, *args):
+    """Call the specified function with the specified arguments and return the memory, taken by its return value.
+
+    Args:
+        function (callable): Function to call.
+        *args: Arguments of the function.
+
+    Returns:
+        int: Count of bytes, that were allocated by the function and are still in use.
+
+    """
+    tracemalloc.start()
+    result = function(*args)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return memory
+
+
+def benchmark(loop, node_count):
+    """Time all operations at the specified count of nodes.
+
+    Args:
+        loop (AbstractEventLoop): Event loop to execute business processes in.
+        node_count (int): Count of nodes.
+
+    Yields:
+        tuple: The component, the operation, the time in seconds and the memory in bytes, taken by the created
+            objects, or None if the operation does not create objects.
+
+    """
+    attributes, seconds = measure(build_attributes, node_count)
+    yield 'Attribute', 'create', seconds, measure_memory(build_attributes, node_count)
+    _, seconds = measure(update_attributes, attributes)
+    yield 'Attribute', 'update', seconds, None
+    del attributes
+    nodes, seconds = measure(build_nodes, node_count)
+    yield 'Node', 'create', seconds, measure_memory(build_nodes, node_count)
+    _, seconds = measure(update_nodes, nodes)
+    yield 'Node', 'update', seconds, None
+    del nodes
+    node_group, seconds = measure(build_node_group, node_count)
+    yield 'NodeGroup', 'add', seconds, measure_memory(build_node_group, node_count)
+    _, seconds = measure(update_node_group, node_group, node_count)
+    yield 'NodeGroup', 'update', seconds, None
+    _, seconds = measure(node_group.get_nodes_list)
+    yield 'NodeGroup', 'get_nodes_list', seconds, None
+    _, seconds = measure(node_group.get_nodes)
+    yield 'NodeGroup', 'get_nodes', seconds, None
+    _, seconds = measure(remove_nodes, node_group, node_count)
+    yield 'NodeGroup', 'remove', seconds, None
+    del node_group
+    repository, seconds = measure(build_repository, node_count)
+    yield 'NodeGroupRepository', 'save', seconds, measure_memory(build_repository, node_count)
+    _, seconds = measure(read_repository, repository, node_count)
+    yield 'NodeGroupRepository', 'get_node_group', seconds, None
+    _, seconds = measure(empty_repository, repository, node_count)
+    yield 'NodeGroupRepository', 'remove', seconds, None
+    del repository
+    facade, seconds = measure(build_facade, loop, node_count)
+    yield 'BusinessLayerFacade', 'create', seconds, measure_memory(build_facade, loop, node_count)
+    _, seconds = measure(update_facade, loop, facade, node_count)
+    yield 'BusinessLayerFacade', 'update', seconds, None
+    _, seconds = measure(loop.run_until_complete, facade.get_nodes('group'))
+    yield 'BusinessLayerFacade', 'get_nodes', seconds, None
+    _, seconds = measure(remove_facade_nodes, loop, facade, node_count)
+    yield 'BusinessLayerFacade', 'remove', seconds, None
+
+
+def main(node_counts):
+    """Benchmark all components at each of the specified counts of nodes and print the results table.
+
+    Args:
+        node_counts (list): Counts of nodes.
+
+    """
+    loop = asyncio.get_event_loop()
+    print(ROW_TEMPLATE.format(component='component', operation='operation', nodes='nodes', seconds='seconds',
+                              per_node='us/node', memory='bytes/node'))
+    per_node = {}
+    for node_count in node_counts:
+        for component, operation, seconds, memory in benchmark(loop, node_count):
+            per_node.setdefault((component, operation), []).append(seconds / node_count)
+            print(ROW_TEMPLATE.format(component=component, operation=operation, nodes=node_count,
+                                      seconds='{:.3f}'.format(seconds),
+                                      per_node='{:.3f}'.format(seconds / node_count * 10 ** 6),
+                                      memory='{:.0f}'.format(memory / node_count) if memory is not None else ''),
+                  flush=True)
+    if len(node_counts) > 1:
+        decades = math.log10(node_counts[-1] / node_counts[0])
+        growth = {key: (times[-1] / times[0]) ** (1 / decades) for key, times in per_node.items() if times[0] > 0}
+        superlinear = ['{} {} ({:.1f}x per 10x nodes)'.format(component, operation, growth[component, operation])
+                       for component, operation in per_node
+                       if growth.get((component, operation), 0) > SCALING_THRESHOLD]
+        print('Superlinear operations: {}'.format(', '.join(superlinear) or 'none'))
+
+
+if __name__ == '__main__':
+    main(sorted(set(int(count) for count in sys.argv[1:])) or [1000, 10000, 100000])
@@ -0,0 +1,119 @@
+"""Compare throughput of requests, each of which opens its own session, with requests, that share a SharedSession.
+
+Starts a local stub HTTP server, that answers each request with an empty JSON object over keep-alive connections,
+and sends POST requests to it through core.api.Resource.
+
+Usage: python3 -m benchmarks.http_session [request_count [concurrency ...]]
+
+"""
+import asyncio
+import sys
+import time
+
+from aiohttp import ClientSession
+
+from core.api import Resource
+from core.session import SharedSession
+
+
+RESPONSE = b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\n\r\n{}'
+"""Response of the stub server to each request."""
+ROW_TEMPLATE = '{mode:<10}{concurrency:>12}{requests:>10}{seconds:>10}{rate:>14}'
+"""Template of a row of the results table."""
+
+
+async def handle_connection(reader, writer):
+    """Answer all requests, that arrive over the connection, until the client closes it.
+
+    Note: awaitable method.
+
+    Args:
+        reader (StreamReader): Reader of the connection.
+        writer (StreamWriter): Writer of the connection.
+
+    """
+    try:
+        while True:
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            for line in head.split(b'\r\n'):
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            writer.write(RESPONSE)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def post_with_fresh_sessions(url, body):
+    """Send a POST request through a session, that is created for it, the way requests were sent before.
+
+    Note: awaitable method.
+
+    Args:
+        url (str): URL of the request.
+        body (dict): Body of the request.
+
+    """
+    async with ClientSession() as session:
+        async with session.post(url=url, json=body) as response:
+            await response.json()
+
+
+async def run(post, url, request_count, concurrency):
+    """Send requests with the specified function, keeping the specified count of them in progress.
+
+    Note: awaitable method.
+
+    Args:
+        post (callable): Awaitable function, that sends a POST request to the url with the body.
+        url (str): URL of the requests.
+        request_count (int): Count of requests to send.
+        concurrency (int): Count of requests to keep in progress.
+
+    Returns:
+        float: Time in seconds, that all requests have taken.
+
+    """
+    remaining = iter(range(request_count))
+
+    async def worker():
+        for i in remaining:
+            await post(url, {'value': i})
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return time.perf_counter() - start
+
+
+async def main(request_count, concurrency_levels):
+    """Run the benchmark and print the results table.
+
+    Note: awaitable method.
+
+    Args:
+        request_count (int): Count of requests to send in each run.
+        concurrency_levels (list): Counts of requests to keep in progress in each run.
+
+    """
+    server = await asyncio.start_server(handle_connection, '127.0.0.1', 0)
+    url = 'http://127.0.0.1:{}/node_group/benchmark'.format(server.sockets[0].getsockname()[1])
+    print(ROW_TEMPLATE.format(mode='mode', concurrency='concurrency', requests='requests', seconds='seconds',
+                              rate='requests/s'))
+    for concurrency in concurrency_levels:
+        resource = Resource(SharedSession(connection_limit=concurrency))
+        for mode, post in (('fresh', post_with_fresh_sessions), ('shared', resource.post)):
+            seconds = await run(post, url, request_count, concurrency)
+            print(ROW_TEMPLATE.format(mode=mode, concurrency=concurrency, requests=request_count,
+                                      seconds='{:.2f}'.format(seconds), rate='{:.0f}'.format(request_count / seconds)))
+        await resource.close()
+    server.close()
+    await server.wait_closed()
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    levels = [int(level) for level in sys.argv[2:]] or [1, 10, 50]
+    asyncio.get_event_loop().run_until_complete(main(count, levels))
@@ -0,0 +1,110 @@
+"""Compare memory usage and throughput of the dict-based NodeGroup with the ColumnarNodeGroup.
+
+Usage: python3 -m benchmarks.node_group_backends [node_count ...]
+
+"""
+import sys
+import time
+import tracemalloc
+
+from alb.business import NodeGroup
+from alb.columnar import ColumnarNodeGroup
+
+
+ATTRIBUTES = ['cpu', 'memory', 'latency', 'distance']
+"""Names of attributes, that each node of the benchmarked group has."""
+ROW_TEMPLATE = '{backend:<20}{nodes:>8}{memory:>12}{build:>10}{update:>10}{nodes_list:>12}{nodes_dict:>12}{weight:>10}'
+"""Template of a row of the results table."""
+
+
+def build(factory, node_count):
+    """Create a node group and fill it with nodes and their attributes.
+
+    Args:
+        factory (callable): Function, that creates an empty node group.
+        node_count (int): Count of nodes to add.
+
+    Returns:
+        object: Filled node group.
+
+    """
+    node_group = factory()
+    for i in range(node_count):
+        name = 'node-{}'.format(i)
+        node_group.add_node(name, 'host-{}'.format(i), 80)
+        for j, attribute in enumerate(ATTRIBUTES):
+            node_group.add_node_attribute(name, attribute, i % 100, j + 1)
+    return node_group
+
+
+def update(node_group, node_count):
+    """Update a value of each attribute of each node of the group once.
+
+    Args:
+        node_group (object): Node group to update.
+        node_count (int): Count of nodes in the group.
+
+    """
+    for i in range(node_count):
+        name = 'node-{}'.format(i)
+        for attribute in ATTRIBUTES:
+            node_group.update_node_attribute(name, attribute, value=i % 7 + 1)
+
+
+def measure(function, *args):
+    """Call the specified function with the specified arguments and return the time it took.
+
+    Args:
+        function (callable): Function to call.
+        *args: Arguments of the function.
+
+    Returns:
+        tuple: Return value of the function and the time in seconds.
+
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark(name, factory, node_count):
+    """Benchmark a node group backend and print a row of results.
+
+    Args:
+        name (str): Name of the backend.
+        factory (callable): Function, that creates an empty node group.
+        node_count (int): Count of nodes in the group.
+
+    """
+    tracemalloc.start()
+    node_group, build_time = measure(build, factory, node_count)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    _, update_time = measure(update, node_group, node_count)
+    _, nodes_list_time = measure(node_group.get_nodes_list)
+    _, nodes_time = measure(node_group.get_nodes)
+    # The first change invalidates cached weights of the columnar backend, so the read below includes computing them.
+    node_group.update_node_attribute('node-0', ATTRIBUTES[0], value=1000)
+    _, weight_time = measure(lambda: node_group.weight)
+    print(ROW_TEMPLATE.format(backend=name, nodes=node_count, memory='{:.1f} MB'.format(memory / 2 ** 20),
+                              build='{:.3f}s'.format(build_time), update='{:.3f}s'.format(update_time),
+                              nodes_list='{:.3f}s'.format(nodes_list_time), nodes_dict='{:.3f}s'.format(nodes_time),
+                              weight='{:.5f}s'.format(weight_time)))
+
+
+def main(node_counts):
+    """Benchmark both backends for each of the specified group sizes.
+
+    Args:
+        node_counts (list): Counts of nodes in the benchmarked group.
+
+    """
+    print(ROW_TEMPLATE.format(backend='backend', nodes='nodes', memory='memory', build='build', update='update',
+                              nodes_list='nodes list', nodes_dict='nodes dict', weight='weight'))
+    for node_count in node_counts:
+        benchmark('NodeGroup', NodeGroup, node_count)
+        benchmark('ColumnarNodeGroup', ColumnarNodeGroup, node_count)
+
+
+if __name__ == '__main__':
+    main([int(count) for count in sys.argv[1:]] or [10000, 100000])
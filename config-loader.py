@@ -1,17 +1,313 @@
 import asyncio
+import ctypes
+import ctypes.util
+import hashlib
 import json
+import os
+import struct
+import sys
+from functools import partial
 
-from core.api import AdvancedLoadbalancerAPI, APIError
+from core.api import AdvancedLoadbalancerAPI, REQUEST_ERRORS
 from core.config import Config
+from core.session import get_session_options
 
 
+IMPORT_LOAD_MODE = 'import'
+"""Mode, in which each node group is imported into the ALB by a single request."""
+SEQUENTIAL_LOAD_MODE = 'sequential'
+"""Mode, in which each node group, node and attribute is created by a separate request."""
+RECONCILE_LOAD_MODE = 'reconcile'
+"""Mode, in which only differences between the configuration and the current state of the ALB are applied."""
+
+IMPORT_FAILURE = "Failed to import the node group '{group}' - {reason}"
+"""Import failure message template."""
+STATE_FAILURE = "Failed to obtain node groups - {reason}"
+"""Failure message template of obtaining the current state of the ALB."""
+CHANGE_FAILURE = "Failed to {change} - {reason}"
+"""Failure message template of a change, made by reconciliation."""
+READ_FAILURE = "Failed to read the configuration - {reason}"
+"""Failure message template of reading the changed configuration file."""
 GROUP_CREATION_FAILURE = "Failed to create a node group '{group}' - {reason}"
 """Group creation failure message template."""
+GROUP_REMOVAL_FAILURE = "Failed to remove a node group '{group}' - {reason}"
+"""Group removal failure message template."""
 NODE_CREATION_FAILURE = "Failed to create a node '{node}' in the group '{group}' - {reason}"
 """Node creation failure message template."""
 ATTRIBUTE_CREATION_FAILURE = "Failed to add an attribute '{attribute}' to the node '{node}' " \
                              "of the group '{group}' - {reason}"
 """Attribute creation failure message template."""
+CHUNK_SIZE = 1 << 16
+"""Count of characters of the configuration file to read at once."""
+INOTIFY_EVENTS = 0x2 | 0x8 | 0x80 | 0x100
+"""Mask of inotify events, that change a file in a directory: IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_TO and IN_CREATE."""
+INOTIFY_EVENT = struct.Struct('iIII')
+"""Structure of the header of an inotify event: watch descriptor, mask, cookie and length of the name."""
+
+
+class NodeGroupReader(object):
+    """Iterable over node groups of the JSON configuration file, that reads and parses the file incrementally.
+
+    Each node group is parsed once the whole of it is read, so only a single node group and a chunk of the file are
+    kept in memory at a time, regardless of the size of the file.
+
+    Attributes:
+        __file (file): The configuration file, opened for reading in the text mode.
+        __chunk_size (int): Count of characters to read at once.
+        __decoder (JSONDecoder): Decoder of JSON values.
+        __buffer (str): Text, that is read but is not parsed yet.
+        __eof (bool): True if the whole file is read.
+
+    """
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        """Constructor of the NodeGroupReader.
+
+        Args:
+            file (file): The configuration file, opened for reading in the text mode.
+            chunk_size (int): Count of characters to read at once.
+
+        """
+        self.__file = file
+        self.__chunk_size = chunk_size
+        self.__decoder = json.JSONDecoder()
+        self.__buffer = ''
+        self.__eof = False
+
+    def __iter__(self):
+        """Yield node groups in the order of the file.
+
+        Yields:
+            tuple: Name of the node group and its description.
+
+        Raises:
+            ValueError: If the file is not a valid JSON object, or anything but whitespaces follows the object.
+
+        """
+        self.__expect('{')
+        if self.__peek() == '}':
+            self.__expect('}')
+            self.__expect_end()
+            return
+        while True:
+            name = self.__decode()
+            self.__expect(':')
+            yield name, self.__decode()
+            if self.__expect(',}') == '}':
+                self.__expect_end()
+                return
+
+    def __read(self, size):
+        """Append the next part of the file to the buffer.
+
+        Args:
+            size (int): Count of characters to read.
+
+        """
+        text = self.__file.read(size)
+        self.__eof = not text
+        self.__buffer += text
+
+    def __peek(self):
+        """Return the next character, that is not a whitespace, without consuming it.
+
+        Returns:
+            str: The character.
+
+        Raises:
+            ValueError: If the file ends.
+
+        """
+        self.__buffer = self.__buffer.lstrip()
+        while not self.__buffer:
+            if self.__eof:
+                raise ValueError('Unexpected end of the configuration file')
+            self.__read(self.__chunk_size)
+            self.__buffer = self.__buffer.lstrip()
+        return self.__buffer[0]
+
+    def __expect(self, characters):
+        """Consume the next character, that is not a whitespace.
+
+        Args:
+            characters (str): Characters, one of which is expected.
+
+        Returns:
+            str: The consumed character.
+
+        Raises:
+            ValueError: If the next character is not expected.
+
+        """
+        character = self.__peek()
+        if character not in characters:
+            raise ValueError("Expected one of '{}' in the configuration file, got '{}'".format(characters,
+                                                                                             character))
+        self.__buffer = self.__buffer[1:]
+        return character
+
+    def __expect_end(self):
+        """Read the rest of the file and check, that it contains only whitespaces.
+
+        Raises:
+            ValueError: If the rest of the file contains anything else.
+
+        """
+        while True:
+            self.__buffer = self.__buffer.lstrip()
+            if self.__buffer:
+                raise ValueError("Expected the end of the configuration file, got '{}'".format(self.__buffer[0]))
+            if self.__eof:
+                return
+            self.__read(self.__chunk_size)
+
+    def __decode(self):
+        """Consume and return the next JSON value. If the buffer does not contain the whole value, the file is read
+        further, doubling the amount of read text each time, so a large value is parsed a few times at most.
+
+        Returns:
+            object: The value.
+
+        Raises:
+            ValueError: If the value is malformed.
+
+        """
+        self.__peek()
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buffer)
+                if end < len(self.__buffer) or self.__eof:
+                    self.__buffer = self.__buffer[end:]
+                    return value
+            except ValueError:
+                if self.__eof:
+                    raise
+            self.__read(max(self.__chunk_size, len(self.__buffer)))
+
+
+class FileWatcher(object):
+    """Waits for changes of a file.
+
+    Changes are detected with inotify, if it is available, by watching the directory of the file, so replacing the
+    file by renaming another one over it is noticed too. Otherwise, the modification time, the size and the inode of
+    the file are polled. A series of changes, that follow each other closer than the debounce time, such as several
+    writes of a single save, is reported as a single change.
+
+    Attributes:
+        __path (str): Path to the file.
+        __debounce (float): Time in seconds without further changes, after which a change is reported.
+        __poll_interval (float): Time in seconds between polls of the file, if inotify is not available.
+        __descriptor (int): File descriptor of the inotify instance. None if the file is polled.
+        __changed (Event): Event, that gets set on each change of the file, detected by inotify.
+        __state (tuple): Modification time, size and inode of the file, when it was polled last time.
+
+    """
+    def __init__(self, path, debounce=0.2, poll_interval=0.5):
+        """Constructor of the FileWatcher.
+
+        Args:
+            path (str): Path to the file.
+            debounce (float): Time in seconds without further changes, after which a change is reported.
+            poll_interval (float): Time in seconds between polls of the file, if inotify is not available.
+
+        """
+        self.__path = os.path.abspath(path)
+        self.__debounce = debounce
+        self.__poll_interval = poll_interval
+        self.__descriptor = None
+        self.__changed = None
+        self.__state = None
+
+    def start(self):
+        """Start watching the file. Changes, that happen after the start, are reported by the following waits."""
+        self.__changed = asyncio.Event()
+        self.__descriptor = self.__watch_directory()
+        if self.__descriptor is None:
+            self.__state = self.__get_state()
+        else:
+            asyncio.get_event_loop().add_reader(self.__descriptor, self.__read_events)
+
+    def close(self):
+        """Stop watching the file."""
+        if self.__descriptor is not None:
+            asyncio.get_event_loop().remove_reader(self.__descriptor)
+            os.close(self.__descriptor)
+            self.__descriptor = None
+
+    async def wait(self):
+        """Wait until the file changes and stops changing for the debounce time.
+
+        Note: awaitable method.
+
+        """
+        if self.__descriptor is None:
+            await self.__poll()
+            return
+        await self.__changed.wait()
+        while self.__changed.is_set():
+            self.__changed.clear()
+            await asyncio.sleep(self.__debounce)
+
+    async def __poll(self):
+        """Poll the file until it changes and stops changing for the debounce time.
+
+        Note: awaitable method.
+
+        """
+        while self.__get_state() == self.__state:
+            await asyncio.sleep(self.__poll_interval)
+        state = None
+        while state != self.__get_state():
+            state = self.__get_state()
+            await asyncio.sleep(self.__debounce)
+        self.__state = state
+
+    def __get_state(self):
+        """Return the modification time, the size and the inode of the file.
+
+        Returns:
+            tuple: State of the file. None if the file does not exist.
+
+        """
+        try:
+            stat = os.stat(self.__path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size, stat.st_ino
+
+    def __watch_directory(self):
+        """Start watching the directory of the file with inotify.
+
+        Returns:
+            int: File descriptor of the inotify instance. None if inotify is not available.
+
+        """
+        path = ctypes.util.find_library('c')
+        try:
+            libc = ctypes.CDLL(path, use_errno=True)
+            descriptor = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (AttributeError, OSError):
+            return None
+        if descriptor < 0:
+            return None
+        if libc.inotify_add_watch(descriptor, os.path.dirname(self.__path).encode(), INOTIFY_EVENTS) < 0:
+            os.close(descriptor)
+            return None
+        return descriptor
+
+    def __read_events(self):
+        """Read pending inotify events and set the changed event, if one of them concerns the file."""
+        name = os.path.basename(self.__path).encode()
+        try:
+            data = os.read(self.__descriptor, 65536)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            if data[offset:offset + length].rstrip(b'\0') == name:
+                self.__changed.set()
+            offset += length
 
 
 class ConfigLoader(object):
@@ -22,6 +318,14 @@ class ConfigLoader(object):
     Attributes:
         __config (Config): Configuration of the application.
         __config_path (str): Path to the JSON configuration file.
+        __load_mode (str): IMPORT_LOAD_MODE, SEQUENTIAL_LOAD_MODE or RECONCILE_LOAD_MODE.
+        __concurrency (int): Maximum count of requests, that the import and reconciliation make simultaneously.
+        __debounce (float): Time in seconds without further changes of the file, after which it gets applied in
+            the watch mode.
+        __poll_interval (float): Time in seconds between polls of the file in the watch mode, if inotify is not
+            available.
+        __resync_interval (float): Time in seconds without changes of the file, after which the ALB gets reconciled
+            with the whole file in the watch mode, e.g. in case it was restarted without a journal.
         __api (AdvancedLoadbalancerAPI): API of the ALB.
 
     """
@@ -29,54 +333,347 @@ class ConfigLoader(object):
         """Constructor of the ConfigLoader."""
         self.__config = Config()
         self.__config_path = self.__config.get_attribute('config_path') or './config.json'
-        self.__api = AdvancedLoadbalancerAPI(self.__config.get_attribute('api_url'))
+        self.__load_mode = self.__config.get_attribute('load_mode') or IMPORT_LOAD_MODE
+        self.__concurrency = int(self.__config.get_attribute('load_concurrency') or 10)
+        self.__debounce = float(self.__config.get_attribute('watch_debounce') or 0.2)
+        self.__poll_interval = float(self.__config.get_attribute('watch_poll_interval') or 0.5)
+        self.__resync_interval = float(self.__config.get_attribute('watch_resync_interval') or 300)
+        self.__api = AdvancedLoadbalancerAPI(self.__config.get_attribute('api_url'),
+                                             get_session_options(self.__config))
 
     async def main(self):
         """Entry-point of the ConfigLoader. Load configuration from the specified file and load it into the ALB
         using its API.
 
+        By default, node groups are imported one by one as soon as they are read from the file, so the ALB applies
+        each of them at once and pushes it to the proxy once. In the sequential load mode, each node group, node and
+        attribute is created by a separate request instead. In the reconcile mode, only differences between the
+        configuration and the current state of the ALB are applied, so the configuration can be applied again and
+        again.
+
+        Note: awaitable method.
+
+        """
+        print("Loading config from '{}'...".format(self.__config_path))
+        try:
+            with open(self.__config_path, 'r') as config:
+                node_groups = NodeGroupReader(config)
+                if self.__load_mode == SEQUENTIAL_LOAD_MODE:
+                    await self.__create(node_groups)
+                elif self.__load_mode == RECONCILE_LOAD_MODE:
+                    await self.__reconcile(dict(node_groups))
+                else:
+                    await self.__import(node_groups)
+        except (OSError, ValueError) as e:
+            print(READ_FAILURE.format(reason=e))
+        finally:
+            await self.__api.close()
+
+    async def watch(self):
+        """Entry-point of the ConfigLoader in the watch mode. Import all node groups of the configuration into the
+        ALB, and then, each time the file changes, import the node groups, that have changed since they were imported
+        last time, and remove the node groups, that were removed from the file. If the file does not change for
+        the resync interval, the ALB is reconciled with the whole file, so it gets back changes, that it lost e.g.
+        after a restart, and changes, that failed, are retried. Runs until it gets interrupted.
+
+        Note: awaitable method.
+
+        """
+        watcher = FileWatcher(self.__config_path, self.__debounce, self.__poll_interval)
+        watcher.start()
+        print("Watching config '{}'...".format(self.__config_path))
+        try:
+            digests = await self.__apply_changes({})
+            while True:
+                try:
+                    await asyncio.wait_for(watcher.wait(), self.__resync_interval)
+                except asyncio.TimeoutError:
+                    digests = await self.__resync(digests)
+                else:
+                    digests = await self.__apply_changes(digests)
+        finally:
+            watcher.close()
+            await self.__api.close()
+
+    async def __apply_changes(self, digests):
+        """Import node groups, that have changed since they were imported last time, and remove node groups, that
+        were removed from the file.
+
+        Node groups are compared by digests of their descriptions, so descriptions of applied groups are not kept in
+        memory. If the file cannot be read to the end, e.g. because it is being written, node groups are not removed.
+
+        Note: awaitable method.
+
+        Args:
+            digests (dict): Digests of descriptions of the applied node groups by their names.
+
+        Returns:
+            dict: Digests of the applied node groups after the changes.
+
+        """
+        semaphore = asyncio.Semaphore(self.__concurrency)
+        imports = {}
+        current = {}
+        complete = False
+        try:
+            with open(self.__config_path, 'r') as config:
+                for group_name, group in NodeGroupReader(config):
+                    current[group_name] = self.__get_digest(group)
+                    if digests.get(group_name) != current[group_name]:
+                        await semaphore.acquire()
+                        imports[group_name] = asyncio.ensure_future(self.__import_node_group(semaphore, group_name,
+                                                                                              group))
+            complete = True
+        except (OSError, ValueError) as e:
+            print(READ_FAILURE.format(reason=e))
+        applied = dict(digests)
+        for group_name, imported in zip(imports, await asyncio.gather(*imports.values())):
+            if imported:
+                applied[group_name] = current[group_name]
+        if complete:
+            for group_name in set(digests) - set(current):
+                try:
+                    print("Removing node group '{}'...".format(group_name))
+                    await self.__api.remove_node_group(group_name)
+                    del applied[group_name]
+                except REQUEST_ERRORS as e:
+                    print(GROUP_REMOVAL_FAILURE.format(group=group_name, reason=e))
+        print("Configuration applied: {} node groups changed, {} removed.".format(len(imports),
+                                                                                 len(set(digests) - set(applied))))
+        return applied
+
+    async def __resync(self, digests):
+        """Reconcile the ALB with the whole file. Only the actual differences are applied, so node groups, that
+        match the file, are neither replaced nor pushed to the proxy, and values of their attributes are kept.
+
         Note: awaitable method.
 
+        Args:
+            digests (dict): Digests of descriptions of the applied node groups by their names.
+
+        Returns:
+            dict: Digests of the node groups, that match the file after the reconciliation.
+
+        """
+        print("Reconciling node groups with the configuration...")
+        try:
+            with open(self.__config_path, 'r') as config:
+                node_groups = dict(NodeGroupReader(config))
+        except (OSError, ValueError) as e:
+            print(READ_FAILURE.format(reason=e))
+            return digests
+        failed = await self.__reconcile(node_groups)
+        if failed is None:
+            return digests
+        return {group_name: self.__get_digest(group) for group_name, group in node_groups.items()
+                if group_name not in failed}
+
+    @staticmethod
+    def __get_digest(group):
+        """Return the digest of the description of the node group.
+
+        Args:
+            group (dict): Description of the group.
+
+        Returns:
+            str: The digest.
+
+        """
+        return hashlib.sha1(json.dumps(group, sort_keys=True).encode()).hexdigest()
+
+    async def __import(self, node_groups):
+        """Import node groups into the ALB by a request per group, as soon as each of them is read. Up to the
+        specified count of requests are made at a time, and reading waits while all of them are in progress, so
+        the count of node groups in memory stays bounded. If reading fails part way, imports, that are in progress,
+        are completed before the error is raised.
+
+        Note: awaitable method.
+
+        Args:
+            node_groups (iterable): Pairs of names and descriptions of node groups.
+
         """
-        print("Loading config...")
-        config = self.__load_config()
-        print("Loaded config successfully!")
+        semaphore = asyncio.Semaphore(self.__concurrency)
+        imports = []
+        try:
+            for group_name, group in node_groups:
+                await semaphore.acquire()
+                imports.append(asyncio.ensure_future(self.__import_node_group(semaphore, group_name, group)))
+        finally:
+            results = await asyncio.gather(*imports)
+            print("Configuration applied: {} node groups imported, {} failed.".format(results.count(True),
+                                                                                      results.count(False)))
+
+    async def __import_node_group(self, semaphore, group_name, group):
+        """Import the node group into the ALB and release the semaphore.
+
+        Note: awaitable method.
+
+        Args:
+            semaphore (Semaphore): Semaphore, that limits the count of simultaneous requests.
+            group_name (str): Name of the group.
+            group (dict): Description of the group.
+
+        Returns:
+            bool: True if the group was imported, False otherwise.
+
+        """
+        try:
+            print("Importing node group '{}'...".format(group_name))
+            await self.__api.import_node_groups({group_name: group})
+            return True
+        except REQUEST_ERRORS as e:
+            print(IMPORT_FAILURE.format(group=group_name, reason=e))
+            return False
+        finally:
+            semaphore.release()
+
+    async def __reconcile(self, config):
+        """Obtain the current state of the ALB and apply only the changes, that make it match the configuration.
+
+        Changes are applied in stages, so node groups exist before their nodes are created, and nodes exist before
+        their attributes are created. Changes within a stage are applied concurrently, up to the specified count at
+        a time.
+
+        Note: awaitable method.
+
+        Args:
+            config (dict): Configuration of the ALB.
+
+        Returns:
+            set: Names of the node groups, changes of which failed, or None if the current state was not obtained.
+
+        """
+        try:
+            print("Obtaining node groups...")
+            node_groups = await self.__api.get_node_groups()
+        except REQUEST_ERRORS as e:
+            print(STATE_FAILURE.format(reason=e))
+            return None
+        stages = self.__diff(config, node_groups)
+        print("Applying {} changes...".format(sum(len(stage) for stage in stages)))
+        semaphore = asyncio.Semaphore(self.__concurrency)
+        failed = set()
+        failures = 0
+        for stage in stages:
+            results = await asyncio.gather(*[self.__apply(semaphore, change, request) for _, change, request in stage])
+            failed.update(group_name for (group_name, _, _), applied in zip(stage, results) if not applied)
+            failures += results.count(False)
+        print("Configuration reconciled with {} failed changes.".format(failures))
+        return failed
+
+    def __diff(self, config, node_groups):
+        """Return changes, that make the node groups match the configuration.
+
+        Values of existing attributes are left as they are, since they are collected at runtime. Only their weights
+        are compared. Node groups without 'nodes' and nodes without 'attributes' are accepted, like by an import.
+
+        Args:
+            config (dict): Configuration of the ALB.
+            node_groups (dict): Current node groups of the ALB.
+
+        Returns:
+            list: Stages of changes, each of which is a list of triples of the name of the changed group,
+                a description of the change and a function, that returns a coroutine, which makes the change.
+
+        """
+        groups, nodes, attributes, removed_groups = [], [], [], []
         for group_name, group in config.items():
+            if group_name not in node_groups:
+                groups.append((group_name, "create the node group '{}'".format(group_name),
+                               partial(self.__api.create_node_group, group_name)))
+            current_nodes = node_groups.get(group_name, {}).get('nodes', {})
+            for node_name, node in group.get('nodes', {}).items():
+                current_node = current_nodes.get(node_name)
+                location = "the node '{}' of the group '{}'".format(node_name, group_name)
+                if current_node is None:
+                    nodes.append((group_name, 'create ' + location,
+                                  partial(self.__api.create_node, group_name, node_name, node['host'], node['port'])))
+                elif current_node['host'] != node['host'] or int(current_node['port']) != int(node['port']):
+                    nodes.append((group_name, 'update ' + location,
+                                  partial(self.__api.update_node, group_name, node_name, node['host'], node['port'])))
+                current_attributes = current_node.get('attributes', {}) if current_node is not None else {}
+                for attribute_name, attribute in node.get('attributes', {}).items():
+                    current_attribute = current_attributes.get(attribute_name)
+                    description = "the attribute '{}' of {}".format(attribute_name, location)
+                    if current_attribute is None:
+                        attributes.append((group_name, 'create ' + description,
+                                           partial(self.__api.create_attribute, group_name, node_name, attribute_name,
+                                                   attribute['value'], attribute['weight'])))
+                    elif float(current_attribute['weight']) != float(attribute['weight']):
+                        attributes.append((group_name, 'update ' + description,
+                                           partial(self.__api.update_attribute, group_name, node_name,
+                                                   attribute_name, weight=attribute['weight'])))
+                for attribute_name in set(current_attributes) - set(node.get('attributes', {})):
+                    attributes.append((group_name, "remove the attribute '{}' of {}".format(attribute_name, location),
+                                       partial(self.__api.remove_attribute, group_name, node_name, attribute_name)))
+            for node_name in set(current_nodes) - set(group.get('nodes', {})):
+                nodes.append((group_name, "remove the node '{}' of the group '{}'".format(node_name, group_name),
+                              partial(self.__api.remove_node, group_name, node_name)))
+        for group_name in set(node_groups) - set(config):
+            removed_groups.append((group_name, "remove the node group '{}'".format(group_name),
+                                   partial(self.__api.remove_node_group, group_name)))
+        return [groups, nodes, attributes, removed_groups]
+
+    async def __apply(self, semaphore, change, request):
+        """Make the change, once the semaphore allows it.
+
+        Note: awaitable method.
+
+        Args:
+            semaphore (Semaphore): Semaphore, that limits the count of simultaneous requests.
+            change (str): Description of the change.
+            request (callable): Function, that returns a coroutine, which makes the change.
+
+        Returns:
+            bool: True if the change was made, False otherwise.
+
+        """
+        async with semaphore:
+            try:
+                await request()
+            except REQUEST_ERRORS as e:
+                print(CHANGE_FAILURE.format(change=change, reason=e))
+                return False
+        print("Applied: {}.".format(change))
+        return True
+
+    async def __create(self, node_groups):
+        """Create each node group, node and attribute of the configuration in the ALB by a separate request.
+
+        Note: awaitable method.
+
+        Args:
+            node_groups (iterable): Pairs of names and descriptions of node groups.
+
+        """
+        for group_name, group in node_groups:
             try:
                 print("Adding node group '{}'...".format(group_name))
                 await self.__api.create_node_group(group_name)
-            except APIError as e:
+            except REQUEST_ERRORS as e:
                 print(GROUP_CREATION_FAILURE.format(group=group_name, reason=e))
                 continue
-            for node_name, node in group['nodes'].items():
+            for node_name, node in group.get('nodes', {}).items():
                 try:
                     print("Adding node '{}' to the group '{}'...".format(node_name, group_name))
                     await self.__api.create_node(group_name, node_name, node['host'], node['port'])
-                except APIError as e:
+                except REQUEST_ERRORS as e:
                     print(NODE_CREATION_FAILURE.format(node=node_name, group=group_name, reason=e))
                     continue
-                for attribute_name, attribute in node['attributes'].items():
+                for attribute_name, attribute in node.get('attributes', {}).items():
                     try:
                         print("Adding attribute '{}' to the node '{}' of the group '{}'".format(attribute_name,
                                                                                                 node_name, group_name))
                         await self.__api.create_attribute(group_name, node_name, attribute_name,
                                                           attribute['value'], attribute['weight'])
-                    except APIError as e:
+                    except REQUEST_ERRORS as e:
                         print(ATTRIBUTE_CREATION_FAILURE.format(attribute=attribute_name, node=node_name,
                                                                 group=group_name, reason=e))
                         continue
         print("Configuration applied.")
 
-    def __load_config(self):
-        """Return configuration, that should be loaded into the ALB.
-
-        Returns:
-            dict: Configuration of the ALB.
-
-        """
-        with open(self.__config_path, 'r') as config:
-            return json.load(config)
-
 
 if __name__ == '__main__':
-    asyncio.get_event_loop().run_until_complete(ConfigLoader().main())
+    loader = ConfigLoader()
+    asyncio.get_event_loop().run_until_complete(loader.watch() if '--watch' in sys.argv[1:] else loader.main())
@@ -1,4 +1,16 @@
-from aiohttp import ClientSession
+import asyncio
+from collections import deque
+from urllib.parse import urlencode
+
+from aiohttp import ClientError
+
+from core.session import SharedSession
+
+
+RESYNC = 'resync'
+"""Type of the change, that tells that some changes were missed and node groups should be loaded anew."""
+LONG_POLL_MARGIN = 10
+"""Time in seconds a long-poll request may take in addition to the time, it waits for changes on the server."""
 
 
 class APIError(Exception):
@@ -6,28 +18,77 @@ class APIError(Exception):
     pass
 
 
+REQUEST_ERRORS = (APIError, ClientError, OSError, asyncio.TimeoutError)
+"""Errors, that a request to the API may fail with: an error response, a network error or a timeout."""
+
+
 class Resource(object):
-    """An interface to the REST API."""
-    async def get(self, url):
+    """An interface to the REST API.
+
+    Responses to GET requests, that come with an ETag, are cached. Subsequent requests to the same url send the ETag
+    in the If-None-Match header, and if the server responds with a 304 Not Modified, the cached body is returned.
+
+    All requests share a single session with a pool of keep-alive connections.
+
+    Attributes:
+        __session (SharedSession): HTTP client session, shared by all requests.
+        __cache (dict): ETags and bodies of the latest responses by urls of their requests.
+
+    """
+    def __init__(self, session=None):
+        """Constructor of the Resource.
+
+        Args:
+            session (SharedSession): HTTP client session, shared by all requests. A session with default options is
+                used, if not specified.
+
+        """
+        self.__session = session or SharedSession()
+        self.__cache = {}
+
+    async def close(self):
+        """Close the session of the Resource.
+
+        Note: awaitable method.
+
+        """
+        await self.__session.close()
+
+    async def get(self, url, cache=True, timeout=None):
         """Execute a GET request on the specified url.
 
         Note: awaitable method.
 
         Args:
             url (str): URL of the request.
+            cache (bool): False to neither use nor update the cache for this request.
+            timeout (float): Maximum time in seconds the request may take, e.g. a long-poll one. The timeout of
+                the session is used, if not specified.
 
         Returns:
-            dict: Body of the response.
+            dict: Body of the response. If it was taken from the cache, the same instance is returned on each call, so
+                it should not be modified.
 
         Raises:
             APIError: If remote server responds with a non-200 OK code.
 
         """
-        async with ClientSession() as session:
-            async with session.get(url=url) as response:
-                if response.status < 200 or response.status > 399:
-                    raise APIError(await response.text())
-                return await response.json()
+        cached = self.__cache.get(url) if cache else None
+        headers = {'If-None-Match': cached[0]} if cached is not None else None
+        timeout = self.__session.timeout if timeout is None else timeout
+        async with self.__session.get().get(url=url, headers=headers, timeout=timeout) as response:
+            if response.status == 304 and cached is not None:
+                return cached[1]
+            if response.status < 200 or response.status > 399:
+                raise APIError(await response.text())
+            body = await response.json()
+            if cache:
+                etag = response.headers.get('ETag')
+                if etag is not None:
+                    self.__cache[url] = (etag, body)
+                else:
+                    self.__cache.pop(url, None)
+            return body
 
     async def post(self, url, body):
         """Execute a POST request on the specified url with a specified body.
@@ -38,14 +99,18 @@ class Resource(object):
             url (str): URL of the request.
             body (dict): Body of the request.
 
+        Returns:
+            object: Body of the response, if the server has responded with a JSON, None otherwise.
+
         Raises:
             APIError: If remote server responds with a non-200 OK code.
 
         """
-        async with ClientSession() as session:
-            async with session.post(url=url, json=body) as response:
-                if response.status < 200 or response.status > 399:
-                    raise APIError(await response.text())
+        async with self.__session.get().post(url=url, json=body, timeout=self.__session.timeout) as response:
+            if response.status < 200 or response.status > 399:
+                raise APIError(await response.text())
+            if response.content_type == 'application/json':
+                return await response.json()
 
     async def put(self, url, body):
         """Execute a PUT request on the specified url with a specified body.
@@ -60,10 +125,9 @@ class Resource(object):
             APIError: If remote server responds with a non-200 OK code.
 
         """
-        async with ClientSession() as session:
-            async with session.put(url=url, json=body) as response:
-                if response.status < 200 or response.status > 399:
-                    raise APIError(await response.text())
+        async with self.__session.get().put(url=url, json=body, timeout=self.__session.timeout) as response:
+            if response.status < 200 or response.status > 399:
+                raise APIError(await response.text())
 
     async def delete(self, url):
         """Execute a DELETE request on the specified url.
@@ -77,10 +141,58 @@ class Resource(object):
             APIError: If remote server responds with a non-200 OK code.
 
         """
-        async with ClientSession() as session:
-            async with session.delete(url=url) as response:
-                if response.status < 200 or response.status > 399:
-                    raise APIError(await response.text())
+        async with self.__session.get().delete(url=url, timeout=self.__session.timeout) as response:
+            if response.status < 200 or response.status > 399:
+                raise APIError(await response.text())
+
+
+class ChangeStream(object):
+    """Asynchronous iterator over changes of node groups in the ALB.
+
+    Long-polls the ALB for changes, made after the latest seen version, and yields them one by one. Each change is
+    a dict with a 'type', a 'group', a 'version' and details specific to the type. If the ALB does not know some of
+    the changes anymore, a change of the RESYNC type is yielded, after which node groups should be loaded anew.
+
+    Attributes:
+        version (int): Version of node groups, up to which changes were received.
+        __resource (Resource): REST communication channel.
+        __url (str): URL to access all node groups.
+        __timeout (float): Maximum time in seconds a single long-poll request waits for changes.
+        __changes (deque): Received changes, that were not yielded yet.
+
+    """
+    def __init__(self, resource, url, since, timeout):
+        """Constructor of the ChangeStream.
+
+        Args:
+            resource (Resource): REST communication channel.
+            url (str): URL to access all node groups.
+            since (int): Version of node groups, after which changes should be yielded. If not specified, only
+                changes, made after the first request, are yielded.
+            timeout (float): Maximum time in seconds a single long-poll request waits for changes.
+
+        """
+        self.version = since
+        self.__resource = resource
+        self.__url = url
+        self.__timeout = timeout
+        self.__changes = deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.__changes:
+            query = {'watch': 'true', 'timeout': self.__timeout}
+            if self.version is not None:
+                query['since'] = self.version
+            response = await self.__resource.get('{}?{}'.format(self.__url, urlencode(query)), cache=False,
+                                                 timeout=self.__timeout + LONG_POLL_MARGIN)
+            if response['resync']:
+                self.__changes.append({'type': RESYNC, 'version': response['version']})
+            self.__changes.extend(response['changes'])
+            self.version = response['version']
+        return self.__changes.popleft()
 
 
 class AdvancedLoadbalancerAPI(object):
@@ -88,8 +200,11 @@ class AdvancedLoadbalancerAPI(object):
 
     Attributes:
         __url (str): A base URL to the remote API.
+        __flush (str): URL to push all node groups with pending changes to the proxy.
+        __batch (str): URL to execute a list of operations in a single request.
         __node_group (str): URL to access all node groups.
         __node_groups (str): URL to access a specific node group.
+        __node_group_flush (str): URL to push a specific node group to the proxy.
         __nodes (str): URL to access all nodes of the specific group.
         __node (str): URL to access specific node of the specific group.
         __attributes (str): URL to access all attributes of the specific node.
@@ -97,21 +212,54 @@ class AdvancedLoadbalancerAPI(object):
         __resource (Resource): REST communication channel.
 
     """
-    def __init__(self, url=None):
+    def __init__(self, url=None, session_options=None):
         """Constructor of the AdvancedLoadbalancerAPI.
 
         Args:
             url (str): Base URL of the remote API.
+            session_options (dict): Keyword arguments of the SharedSession, that is used for all requests to the API,
+                e.g. returned by get_session_options().
 
         """
         self.__url = url + '{}' if url is not None else 'http://localhost:5000{}'
+        self.__flush = self.__url.format('/flush')
+        self.__batch = self.__url.format('/batch')
         self.__node_groups = self.__url.format('/node_group')
         self.__node_group = self.__url.format('/node_group/{group_name}')
+        self.__node_group_flush = self.__url.format('/node_group/{group_name}/flush')
         self.__nodes = self.__url.format('/node_group/{group_name}/node')
         self.__node = self.__url.format('/node_group/{group_name}/node/{node_name}')
         self.__attributes = self.__url.format('/node_group/{group_name}/node/{node_name}/attribute')
         self.__attribute = self.__url.format('/node_group/{group_name}/node/{node_name}/attribute/{attribute_name}')
-        self.__resource = Resource()
+        self.__resource = Resource(SharedSession(**(session_options or {})))
+
+    async def close(self):
+        """Close all connections to the API.
+
+        Note: awaitable method.
+
+        """
+        await self.__resource.close()
+
+    async def batch(self, operations):
+        """Execute a list of operations in a single request. Each node group, changed by the operations, is pushed
+        to the proxy once.
+
+        Note: awaitable method.
+
+        Args:
+            operations (list): Operations to execute. Each operation is a dict with the 'method', the 'path' (relative
+                to the base URL of the API, e.g. '/node_group/{group_name}') and an optional 'body' of the request.
+
+        Returns:
+            list: Results of the operations in the same order. Each result is a dict with the response 'code' and
+                either a 'body' or an 'error'.
+
+        Raises:
+            APIError: If remote server responds with a non-200 OK code.
+
+        """
+        return await self.__resource.post(url=self.__batch, body=operations)
 
     async def get_node_groups(self):
         """Return all node groups.
@@ -127,6 +275,38 @@ class AdvancedLoadbalancerAPI(object):
         """
         return await self.__resource.get(url=self.__node_groups)
 
+    async def import_node_groups(self, node_groups):
+        """Replace the specified node groups with their descriptions at once. The ALB validates all of them before
+        applying any and pushes each group to the proxy once.
+
+        Note: awaitable method.
+
+        Args:
+            node_groups (dict): Named list of node groups in the same format, as get_node_groups() returns.
+
+        Raises:
+            APIError: If remote server responds with a non-200 OK code.
+
+        """
+        await self.__resource.post(url=self.__node_groups, body=node_groups)
+
+    def watch(self, since=None, timeout=30):
+        """Return an asynchronous iterator over changes of node groups.
+
+        Iteration raises APIError if remote server responds with a non-200 OK code.
+
+        Args:
+            since (int): Version of node groups, after which changes should be yielded, e.g. the ETag of the
+                response with all node groups. If not specified, only changes, made after the start of the iteration,
+                are yielded.
+            timeout (float): Maximum time in seconds a single long-poll request waits for changes.
+
+        Returns:
+            ChangeStream: Asynchronous iterator over changes.
+
+        """
+        return ChangeStream(self.__resource, self.__node_groups, since, timeout)
+
     async def get_node_group(self, group_name):
         """Return a node group with the specified name.
 
@@ -172,6 +352,31 @@ class AdvancedLoadbalancerAPI(object):
         """
         await self.__resource.delete(url=self.__node_group.format(group_name=group_name))
 
+    async def flush_node_groups(self):
+        """Push all node groups with pending changes to the proxy right away and wait until they are delivered.
+
+        Note: awaitable method.
+
+        Raises:
+            APIError: If remote server responds with a non-200 OK code.
+
+        """
+        await self.__resource.post(url=self.__flush, body={})
+
+    async def flush_node_group(self, group_name):
+        """Push the node group with the specified name to the proxy right away and wait until it is delivered.
+
+        Note: awaitable method.
+
+        Args:
+            group_name (str): Name of the group.
+
+        Raises:
+            APIError: If remote server responds with a non-200 OK code.
+
+        """
+        await self.__resource.post(url=self.__node_group_flush.format(group_name=group_name), body={})
+
     async def get_nodes(self, group_name):
         """Return all nodes of the specified group.
 
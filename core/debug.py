@@ -0,0 +1,176 @@
+import asyncio
+import io
+import signal
+
+
+DEFAULT_PROFILE_SECONDS = 10
+"""Default duration of a profiling session in seconds."""
+MAX_PROFILE_SECONDS = 60
+"""Maximum duration of a profiling session in seconds."""
+BAD_REQUEST = 400
+"""HTTP response code for the 'bad request' reason constant."""
+CONFLICT = 409
+"""HTTP response code for the 'conflict' reason constant."""
+
+
+class StackSampler(object):
+    """Statistical profiler, that periodically samples the stack of the main thread.
+
+    Samples are taken by a SIGPROF handler, driven by an interval timer of the CPU time of the process, so the stack
+    is captured exactly where the interpreter is running and the time the event loop spends idle waiting for events
+    is not sampled at all. The overhead is a single signal delivery and a walk over the stack per sample. Samples are
+    aggregated into collapsed stacks, that are accepted by flamegraph.pl, speedscope and similar tools.
+
+    Only one sampler may run in a process at a time, and it should be started from the main thread.
+
+    Attributes:
+        __interval (float): CPU time in seconds between samples.
+        __counts (dict): Counts of samples by stacks, each of which is a tuple of code objects and line numbers of its
+            frames from the innermost to the outermost.
+        __labels (dict): Labels of frames by their code objects and line numbers.
+
+    """
+    running = False
+    """True if a sampler is running in the process."""
+
+    def __init__(self, interval=0.005):
+        """Constructor of the StackSampler.
+
+        Args:
+            interval (float): CPU time in seconds between samples.
+
+        """
+        self.__interval = interval
+        self.__counts = {}
+        self.__labels = {}
+
+    async def profile(self, seconds):
+        """Sample the stack for the specified time without blocking the event loop.
+
+        Note: awaitable method.
+
+        Args:
+            seconds (float): Duration of sampling in seconds.
+
+        Returns:
+            str: Collapsed stacks, one per line: frames from the outermost to the innermost, separated by semicolons,
+                followed by the count of samples.
+
+        Raises:
+            RuntimeError: If another sampler is running.
+
+        """
+        if StackSampler.running:
+            raise RuntimeError('Profiling is already in progress')
+        StackSampler.running = True
+        handler = signal.signal(signal.SIGPROF, self.__sample)
+        signal.setitimer(signal.ITIMER_PROF, self.__interval, self.__interval)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, handler)
+            StackSampler.running = False
+        lines = ['{} {}'.format(';'.join(self.__get_label(*frame) for frame in reversed(stack)), count)
+                 for stack, count in self.__counts.items()]
+        return '\n'.join(sorted(lines)) + '\n'
+
+    def __sample(self, signal_number, frame):
+        """Count the stack of the interrupted frame.
+
+        Args:
+            signal_number (int): Number of the received signal.
+            frame (frame): The interrupted frame.
+
+        """
+        stack = []
+        while frame is not None:
+            stack.append((frame.f_code, frame.f_lineno))
+            frame = frame.f_back
+        stack = tuple(stack)
+        self.__counts[stack] = self.__counts.get(stack, 0) + 1
+
+    def __get_label(self, code, line):
+        """Return a label of the frame in the collapsed stacks.
+
+        Args:
+            code (code): Code object of the frame.
+            line (int): Number of the line, the frame is executing.
+
+        Returns:
+            str: The label.
+
+        """
+        label = self.__labels.get((code, line))
+        if label is None:
+            label = '{} ({}:{})'.format(code.co_name, code.co_filename, line).replace(';', ':')
+            self.__labels[(code, line)] = label
+        return label
+
+
+def dump_tasks(loop=None):
+    """Return a textual dump of pending tasks of the event loop.
+
+    The dump starts with counts of tasks by their coroutines, so piling up tasks are easy to notice, and is followed
+    by the stack each task is suspended at.
+
+    Args:
+        loop (AbstractEventLoop): The event loop. The current event loop is used, if not specified.
+
+    Returns:
+        str: The dump.
+
+    """
+    loop = loop or asyncio.get_event_loop()
+    all_tasks = getattr(asyncio, 'all_tasks', None) or asyncio.Task.all_tasks
+    tasks = [task for task in all_tasks(loop) if not task.done()]
+    stacks = io.StringIO()
+    counts = {}
+    for task in tasks:
+        coroutine = task.get_coro() if hasattr(task, 'get_coro') else task._coro
+        name = getattr(coroutine, '__qualname__', repr(coroutine))
+        counts[name] = counts.get(name, 0) + 1
+        task.print_stack(file=stacks)
+    summary = ''.join('{:>8} {}\n'.format(count, name)
+                      for name, count in sorted(counts.items(), key=lambda item: -item[1]))
+    return '{} pending tasks\n{}\n{}'.format(len(tasks), summary, stacks.getvalue())
+
+
+async def handle_profile(request):
+    """Profile the service for the time, specified in the 'seconds' parameter of the query string of the request, and
+    respond with collapsed stacks. Only CPU time is sampled, so the count of samples of each stack is proportional
+    to the CPU time, spent in it.
+
+    Note: awaitable method.
+
+    Args:
+        request (Request): Instance of the HTTP request.
+
+    Returns:
+        Response: HTTP response to the specified request.
+
+    """
+    try:
+        seconds = float(request.query.get('seconds', DEFAULT_PROFILE_SECONDS))
+    except ValueError:
+        seconds = 0
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        return request.Response(code=BAD_REQUEST,
+                                text="'seconds' should be a number between 0 and {}".format(MAX_PROFILE_SECONDS))
+    try:
+        return request.Response(text=await StackSampler().profile(seconds))
+    except RuntimeError as e:
+        return request.Response(code=CONFLICT, text=str(e))
+
+
+def handle_tasks(request):
+    """Respond with a dump of pending tasks of the event loop of the service.
+
+    Args:
+        request (Request): Instance of the HTTP request.
+
+    Returns:
+        Response: HTTP response to the specified request.
+
+    """
+    return request.Response(text=dump_tasks())
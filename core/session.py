@@ -0,0 +1,76 @@
+from aiohttp import ClientSession, TCPConnector
+
+
+def get_session_options(config):
+    """Return options of a SharedSession, taken from the configuration of the application.
+
+    Supported options are HTTP_CONNECTION_LIMIT, HTTP_KEEPALIVE_TIMEOUT, HTTP_DNS_CACHE_TTL and HTTP_TIMEOUT.
+
+    Args:
+        config (Config): Configuration of the application.
+
+    Returns:
+        dict: Keyword arguments of the SharedSession constructor.
+
+    """
+    return {
+        'connection_limit': int(config.get_attribute('http_connection_limit') or 100),
+        'keepalive_timeout': float(config.get_attribute('http_keepalive_timeout') or 30),
+        'dns_cache_ttl': int(config.get_attribute('http_dns_cache_ttl') or 10),
+        'timeout': float(config.get_attribute('http_timeout') or 10)
+    }
+
+
+class SharedSession(object):
+    """Long-lived HTTP client session, shared by all requests of its owner.
+
+    The session keeps a pool of keep-alive connections and caches DNS lookups, so consecutive requests to the same
+    server reuse connections instead of opening new ones. It gets created on the first request, so it is bound to
+    the event loop, that runs requests, and should be closed once it is not needed anymore.
+
+    Attributes:
+        timeout (float): Maximum time in seconds a single request may take.
+        __connection_limit (int): Maximum count of simultaneously open connections.
+        __keepalive_timeout (float): Time in seconds an idle connection is kept open for.
+        __dns_cache_ttl (int): Time in seconds a resolved host name is cached for.
+        __session (ClientSession): The session. None if it was not created yet or was closed.
+
+    """
+    def __init__(self, connection_limit=100, keepalive_timeout=30, dns_cache_ttl=10, timeout=10):
+        """Constructor of the SharedSession.
+
+        Args:
+            connection_limit (int): Maximum count of simultaneously open connections.
+            keepalive_timeout (float): Time in seconds an idle connection is kept open for.
+            dns_cache_ttl (int): Time in seconds a resolved host name is cached for.
+            timeout (float): Maximum time in seconds a single request may take.
+
+        """
+        self.timeout = timeout
+        self.__connection_limit = connection_limit
+        self.__keepalive_timeout = keepalive_timeout
+        self.__dns_cache_ttl = dns_cache_ttl
+        self.__session = None
+
+    def get(self):
+        """Return the session, creating it on the first call.
+
+        Returns:
+            ClientSession: The session.
+
+        """
+        if self.__session is None or self.__session.closed:
+            connector = TCPConnector(limit=self.__connection_limit, keepalive_timeout=self.__keepalive_timeout,
+                                     use_dns_cache=True, ttl_dns_cache=self.__dns_cache_ttl)
+            self.__session = ClientSession(connector=connector)
+        return self.__session
+
+    async def close(self):
+        """Close the session along with all its connections.
+
+        Note: awaitable method.
+
+        """
+        if self.__session is not None:
+            session, self.__session = self.__session, None
+            await session.close()
@@ -66,18 +66,41 @@ func put(apiUrl, group, node, attribute string, value int) error {
 	return err
 }
 
+// ETag of the latest response with node groups.
+var nodeGroupsETag string
+
+// Node groups from the latest response.
+var cachedNodeGroups map[string]NodeGroup
+
 // Return all node groups. Return an error, if such has occurred.
+// If node groups have not changed since the previous call, the ALB responds with a 304 Not Modified and
+// node groups from the previous response are returned.
 func GetNodeGroups(apiUrl string) (nodeGroups map[string]NodeGroup, err error){
 	url := fmt.Sprintf("%s/node_group", apiUrl)
-	response, err := http.Get(url)
+	req, err := http.NewRequest("GET", url, nil)
+	if err != nil {
+		return nodeGroups, err
+	}
+	if nodeGroupsETag != "" {
+		req.Header.Set("If-None-Match", nodeGroupsETag)
+	}
+	client := &http.Client{}
+	response, err := client.Do(req)
 	if err != nil {
 		return nodeGroups, err
 	}
 	defer response.Body.Close()
+	if response.StatusCode == http.StatusNotModified {
+		return cachedNodeGroups, nil
+	}
 	body, err := ioutil.ReadAll(response.Body)
 	if err != nil {
 		return nodeGroups, err
 	}
 	err = json.Unmarshal(body, &nodeGroups)
+	if err == nil {
+		nodeGroupsETag = response.Header.Get("ETag")
+		cachedNodeGroups = nodeGroups
+	}
 	return nodeGroups, err
 }
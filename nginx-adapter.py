@@ -6,6 +6,7 @@ from japronto import Application
 from nginx import dumps, Upstream, Key, loads
 
 from core.config import Config
+from core.debug import handle_profile, handle_tasks
 
 
 class Nginx(object):
@@ -67,15 +68,32 @@ class Nginx(object):
         subprocess.Popen(self.__reload_command.split(' '))
 
 
+class ResyncRequiredError(Exception):
+    """Delta of the node group cannot be applied to the state of the group, that the adapter has."""
+    def __init__(self, name, reason):
+        """Constructor of the ResyncRequiredError.
+
+        Args:
+            name (str): Name of the node group.
+            reason (str): Reason, why the delta cannot be applied.
+
+        """
+        message = "Node group '{}' {}, full resync required".format(name, reason)
+        super(ResyncRequiredError, self).__init__(message)
+
+
 class NginxAdapter(object):
     """nginx-adapter service root class.
 
     Listens to incoming HTTP requests, transforms received node groups into upstreams and passes them to Nginx.
+    Node groups can be received either as a whole or as a delta against a previous version of the group.
 
     Attributes:
         __config (Config): Configuration of the application.
         __nginx (Nginx): Interface of the Nginx server.
         __application (Application): HTTP server.
+        __node_groups (dict): Named list of received node groups, each of which has a 'version' and a named list of
+            'nodes'.
 
     """
     def __init__(self):
@@ -85,6 +103,7 @@ class NginxAdapter(object):
         notify_nginx_command = self.__config.get_attribute('notify_nginx_command') or 'service nginx reload'
         self.__nginx = Nginx(reload_command=notify_nginx_command, upstream_path=upstream_path)
         self.__application = Application()
+        self.__node_groups = {}
 
     def __handle_error(self, request, exception):
         """Respond to the request with a 500 Internal server error and a reason, taken from the specified exception
@@ -100,6 +119,19 @@ class NginxAdapter(object):
         """
         return request.Response(code=500, text=str(exception))
 
+    def __handle_resync(self, request, exception):
+        """Respond to the request with a 409 Conflict, that tells the sender to submit the whole node group.
+
+        Args:
+            request (Request): Instance of the HTTP request.
+            exception (ResyncRequiredError): The original error.
+
+        Returns:
+            Response: HTTP response to the specified request.
+
+        """
+        return request.Response(code=409, text=str(exception))
+
     async def __handle_request(self, request):
         """Process incoming HTTP request and return a response to it.
 
@@ -112,32 +144,81 @@ class NginxAdapter(object):
         """
         group_name = request.match_dict['group_name']
         nodes = request.json['nodes']
-        await self.__handle_update(group_name, nodes)
+        self.__node_groups[group_name] = {
+            'version': request.json.get('version'),
+            'nodes': {node.get('name', i): node for i, node in enumerate(nodes)}
+        }
+        await self.__handle_update(group_name, nodes, request.json.get('ordered', False))
         return request.Response()
 
-    async def __handle_update(self, name, nodes):
+    async def __handle_delta_request(self, request):
+        """Apply the delta of the node group from the incoming HTTP request and return a response to it.
+
+        If the delta has the resulting 'order' of names of nodes, the nodes are put in that order, so the upstream
+        matches the order of the sender even for nodes with equal weights, and the response confirms it as 'ordered'.
+        Otherwise they are sorted by weights.
+
+        Args:
+            request (Request): Instance of the HTTP request.
+
+        Returns:
+            Response: HTTP response to the specified request.
+
+        Raises:
+            ResyncRequiredError: If the adapter does not have the version of the group, the delta is based on, or
+                the order does not match the nodes of the group.
+
+        """
+        group_name = request.match_dict['group_name']
+        delta = request.json
+        node_group = self.__node_groups.get(group_name)
+        version = node_group['version'] if node_group is not None else None
+        if version is None or version != delta['base_version']:
+            raise ResyncRequiredError(group_name, "has version {}, but the delta is based on {}".format(
+                version, delta['base_version']))
+        nodes = dict(node_group['nodes'])
+        for name in delta['removed']:
+            nodes.pop(name, None)
+        for node in delta['added'] + delta['updated']:
+            nodes[node['name']] = node
+        order = delta.get('order')
+        if order is None:
+            node_list = list(nodes.values())
+        elif len(order) != len(nodes) or set(order) != set(nodes):
+            raise ResyncRequiredError(group_name, "does not have the nodes of the order of the delta")
+        else:
+            node_list = [nodes[name] for name in order]
+        node_group['nodes'] = nodes
+        node_group['version'] = delta['version']
+        await self.__handle_update(group_name, node_list, order is not None)
+        return request.Response(json={'ordered': order is not None})
+
+    async def __handle_update(self, name, nodes, ordered=False):
         """Transform specified node group into the upstream and pass it to the Nginx.
 
         Args:
             name (str): Name of the node group.
             nodes (list): List of the nodes and their weights.
+            ordered (bool): True if the nodes are already in the ascending order of their weights.
 
         """
-        servers = self.__adapt_nodes_list(nodes)
+        servers = self.__adapt_nodes_list(nodes, ordered)
         await self.__nginx.update_upstream(name, servers)
 
-    def __adapt_nodes_list(self, nodes):
+    def __adapt_nodes_list(self, nodes, ordered=False):
         """Return an upstream representation of the specified list of nodes.
 
         Args:
             nodes (list): List of nodes to transform.
+            ordered (bool): True if the nodes are already in the ascending order of their weights.
 
         Returns:
             list: List of upstream nodes.
 
         """
         size = len(nodes)
-        nodes = sorted(nodes, key=lambda k: k['weight'])
+        if not ordered:
+            nodes = sorted(nodes, key=lambda k: k['weight'])
         return [self.__adapt_node(node, i, size) for i, node in enumerate(nodes)]
 
     def __adapt_node(self, node, position, list_size):
@@ -160,12 +241,21 @@ class NginxAdapter(object):
     def main(self):
         """Entry-point of the NginxAdapter. Setup and run the HTTP server."""
         self.__application.add_error_handler(Exception, self.__handle_error)
+        self.__application.add_error_handler(ResyncRequiredError, self.__handle_resync)
 
         async def handler(request):
             return await self.__handle_request(request)
 
+        async def delta_handler(request):
+            return await self.__handle_delta_request(request)
+
         self.__application.router.add_route(pattern='/node_group/{group_name}',
                                             handler=handler, method='POST')
+        self.__application.router.add_route(pattern='/node_group/{group_name}',
+                                            handler=delta_handler, method='PATCH')
+        if self.__config.get_attribute('debug_endpoints'):
+            self.__application.router.add_route(pattern='/debug/profile', handler=handle_profile, method='GET')
+            self.__application.router.add_route(pattern='/debug/tasks', handler=handle_tasks, method='GET')
         host = self.__config.get_attribute('host') or '0.0.0.0'
         port = self.__config.get_attribute('port') or 5001
         self.__application.run(host=host, port=port)
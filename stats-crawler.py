@@ -1,6 +1,14 @@
 import asyncio
+import signal
 
 from statscrawler import StatsCrawler
 
 if __name__ == '__main__':
-    asyncio.get_event_loop().run_until_complete(StatsCrawler().main())
+    loop = asyncio.get_event_loop()
+    crawling = asyncio.ensure_future(StatsCrawler().main())
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, crawling.cancel)
+    try:
+        loop.run_until_complete(crawling)
+    except asyncio.CancelledError:
+        print("Stopped.")
@@ -1,8 +1,11 @@
 import asyncio
+import signal
 
-from core.api import AdvancedLoadbalancerAPI
+from core.api import AdvancedLoadbalancerAPI, REQUEST_ERRORS
 from core.config import Config
-from statscrawler.collector import CPULoad, MemoryLoad, CollectingError
+from core.debug import dump_tasks
+from core.session import get_session_options
+from statscrawler.collector import CPULoad, MemoryLoad, CompositeCollector, CollectingError
 from statscrawler.remote import CommandExecutor
 
 
@@ -19,63 +22,128 @@ class StatsCrawler(object):
         __config (Config): Configuration of the application.
         __api (AdvancedLoadbalancerAPI): API of the ALB service.
         __interval (int): An interval between crawling attempts.
-        __collectors (dict): Map, where each key corresponds to a specific attribute name and the value is a
-            corresponding Collector instance, that can crawl specified attribute.
+        __command_executor (CommandExecutor): Executor of remote commands, that keeps a pool of SSH connections.
+        __collector (CompositeCollector): Collector of all supported attributes, that collects attributes of a node
+            with a single remote script.
+        __collections (dict): Tasks, that collect attributes and submit them to the ALB, by hosts.
 
     """
     def __init__(self):
         self.__config = Config()
-        self.__api = AdvancedLoadbalancerAPI(self.__config.get_attribute('api_url'))
+        self.__api = AdvancedLoadbalancerAPI(self.__config.get_attribute('api_url'),
+                                             get_session_options(self.__config))
         self.__interval = int(self.__config.get_attribute('interval') or 10)
-        command_executor = CommandExecutor(self.__config.get_attribute('username'),
-                                           self.__config.get_attribute('password'))
-        self.__collectors = {
-            'cpu': CPULoad(command_executor),
-            'memory': MemoryLoad(command_executor)
-        }
+        self.__command_executor = CommandExecutor(self.__config.get_attribute('username'),
+                                                  self.__config.get_attribute('password'),
+                                                  max_connections=int(
+                                                      self.__config.get_attribute('ssh_max_connections') or 500),
+                                                  idle_timeout=float(self.__config.get_attribute('ssh_idle_timeout')
+                                                                     or 60),
+                                                  connect_timeout=float(
+                                                      self.__config.get_attribute('ssh_connect_timeout') or 10),
+                                                  max_channels=int(self.__config.get_attribute('ssh_max_channels')
+                                                                   or 10),
+                                                  command_timeout=float(
+                                                      self.__config.get_attribute('ssh_command_timeout') or 30))
+        self.__collector = CompositeCollector(self.__command_executor, {
+            'cpu': CPULoad(self.__command_executor),
+            'memory': MemoryLoad(self.__command_executor)
+        })
+        self.__collections = {}
 
     async def main(self):
         """Entry-point of the StatsCrawler. Get all node groups from the ALB, try to find nodes with known attribute
-        names, try to collect their values using a corresponding collector and supply collected values back to the ALB.
-        Repeat after a specified interval of time.
+        names and group them by hosts of the nodes. Collect the values once per host with a single remote script,
+        even if the host is referenced by nodes of several groups, and supply the values back to every referencing
+        attribute in the ALB in a single request per host. Repeat after a specified interval of time. A host, whose
+        previous collection is still in progress, e.g. because the host is slow to respond, is skipped, so
+        collections of a host never pile up.
+
+        Sending SIGUSR1 to the process prints a dump of its pending tasks. Once the crawling is cancelled, collections
+        in progress are cancelled too, and SSH connections and the session of the API get closed.
 
         Note: awaitable method.
 
         """
-        while True:
-            print("Trying to obtain node groups...")
-            node_groups = await self.__api.get_node_groups()
-            print("Obtained node groups successfully!")
-            for group_name, group in node_groups.items():
-                for node_name, node in group['nodes'].items():
-                    for attribute_name, attribute in node['attributes'].items():
-                        collector = self.__collectors.get(attribute_name, None)
-                        if self.__collectors.get(attribute_name, None) is not None:
-                            print("Will try to collect '{}' of the '{}' from group '{}'.".format(attribute_name,
-                                                                                                 node_name, group_name))
-                            collection_task = self.__collect(collector, group_name, node_name, attribute_name,
-                                                             node['host'])
-                            asyncio.ensure_future(collection_task)
-            await asyncio.sleep(self.__interval)
-
-    async def __collect(self, collector, group, node, attribute, host):
-        """Collect a value of the specified attribute for the specified host and submit it to the ALB
-        In case of failure an error message will be printed.
+        asyncio.get_event_loop().add_signal_handler(signal.SIGUSR1, lambda: print(dump_tasks()))
+        try:
+            while True:
+                print("Trying to obtain node groups...")
+                try:
+                    node_groups = await self.__api.get_node_groups()
+                except REQUEST_ERRORS as e:
+                    print("Failed to obtain node groups - {}".format(e))
+                    await asyncio.sleep(self.__interval)
+                    continue
+                print("Obtained node groups successfully!")
+                self.__collections = {host: collection for host, collection in self.__collections.items()
+                                      if not collection.done()}
+                for host, attributes in self.__index_attributes(node_groups).items():
+                    if host in self.__collections:
+                        print("Skipping the '{}', since its previous collection is still in progress.".format(host))
+                        continue
+                    print("Will try to collect '{}' of the '{}' for {} attributes.".format(
+                        "', '".join(sorted(set(attribute for _, _, attribute in attributes))), host, len(attributes)))
+                    self.__collections[host] = asyncio.ensure_future(self.__collect(host, attributes))
+                await asyncio.sleep(self.__interval)
+        finally:
+            for collection in self.__collections.values():
+                collection.cancel()
+            self.__command_executor.close()
+            await self.__api.close()
+
+    def __index_attributes(self, node_groups):
+        """Return attributes, that can be collected, grouped by hosts of their nodes.
+
+        Args:
+            node_groups (dict): Descriptions of node groups by their names.
+
+        Returns:
+            dict: Lists of tuples of the name of the group, the name of the node and the name of the attribute by
+                hosts of the nodes.
+
+        """
+        index = {}
+        for group_name, group in node_groups.items():
+            for node_name, node in group['nodes'].items():
+                for attribute_name in node['attributes']:
+                    if self.__collector.supports(attribute_name):
+                        index.setdefault(node['host'], []).append((group_name, node_name, attribute_name))
+        return index
+
+    async def __collect(self, host, attributes):
+        """Collect values of the specified attributes for the specified host once and submit each value to every
+        attribute, that references it, in a single request. In case of failure, including a network error or
+        a timeout of the request, an error message will be printed.
 
         Note: awaitable method.
 
         Args:
-            collector (Collector): Instance of the Collector to collect the specified attribute.
-            group (str): Name of the group.
-            node (str): Name of the node.
-            attribute (str): Name of the attribute.
-            host (str): Host of the remote node.
+            host (str): Host of the remote nodes.
+            attributes (list): Tuples of the name of the group, the name of the node and the name of the attribute.
 
         """
         try:
-            print("Trying to collect '{}' of the '{}' from group '{}'...".format(attribute, node, group))
-            value = await collector.collect(host)
-            await self.__api.update_attribute(group, node, attribute, value=value)
-            print("Successfully collected '{}' of the '{}' from group '{}'.".format(attribute, node, group))
+            names = sorted(set(attribute for _, _, attribute in attributes))
+            print("Trying to collect '{}' of the '{}'...".format("', '".join(names), host))
+            values, errors = await self.__collector.collect(host, names)
+            for error in errors:
+                print(error)
+            attributes = [(group, node, name) for group, node, name in attributes if name in values]
+            if not attributes:
+                return
+            results = await self.__api.batch([{
+                'method': 'PUT',
+                'path': '/node_group/{}/node/{}/attribute/{}'.format(group, node, name),
+                'body': {'value': values[name]}
+            } for group, node, name in attributes])
+            for (group, node, name), result in zip(attributes, results):
+                if result['code'] == 200:
+                    print("Successfully collected '{}' of the '{}' from group '{}'.".format(name, node, group))
+                else:
+                    print("Failed to submit '{}' of the '{}' from group '{}' - {}".format(name, node, group,
+                                                                                       result.get('error')))
         except CollectingError as e:
             print(e)
+        except REQUEST_ERRORS as e:
+            print("Failed to submit attributes of the '{}' - {}".format(host, e))
@@ -57,6 +57,95 @@ class Collector(object):
         except Exception as e:
             raise CollectingError(self._metric_name, host, e)
 
+    def get_metric_name(self):
+        """Return a name of the metric, that is measured by the collector.
+
+        Returns:
+            str: Name of the metric.
+
+        """
+        return self._metric_name
+
+    def get_script(self, key):
+        """Return a shell command, that prints a value of the attribute in a 'key=value' line.
+
+        Args:
+            key (str): Key of the value in the printed line.
+
+        Returns:
+            str: The command.
+
+        """
+        return 'echo "{}=$({})"'.format(key, self._command)
+
+
+class CompositeCollector(object):
+    """A collector of several attributes of a host at once.
+
+    Commands of collectors of the attributes are composed into a single script, that prints a 'key=value' line per
+    attribute with the name of the attribute as a key, so collecting all attributes of a host costs a single remote
+    execution.
+
+    Attributes:
+        __executor (CommandExecutor): A command executor, that is used to execute scripts remotely.
+        __collectors (dict): Collectors by names of attributes, they collect.
+
+    """
+    def __init__(self, executor, collectors):
+        """Constructor of the CompositeCollector.
+
+        Args:
+            executor (CommandExecutor): A command executor, that will be used to execute scripts remotely.
+            collectors (dict): Collectors by names of attributes, they collect.
+
+        """
+        self.__executor = executor
+        self.__collectors = collectors
+
+    def supports(self, attribute_name):
+        """Check whether the attribute can be collected.
+
+        Args:
+            attribute_name (str): Name of the attribute.
+
+        Returns:
+            bool: True if there is a collector of the attribute, False otherwise.
+
+        """
+        return attribute_name in self.__collectors
+
+    async def collect(self, host, attribute_names):
+        """Collect values of the specified attributes of the specified host.
+
+        Note: awaitable method.
+
+        Args:
+            host (str): Host of the remote node.
+            attribute_names (list): Names of the attributes to collect.
+
+        Returns:
+            tuple: Values of the collected attributes by their names and a list of CollectingErrors of the attributes,
+                that the script printed no value of.
+
+        Raises:
+            CollectingError: If the script fails to execute.
+
+        """
+        collectors = [(name, self.__collectors[name]) for name in attribute_names]
+        script = '; '.join(collector.get_script(name) for name, collector in collectors)
+        try:
+            output = await self.__executor.execute(host, script)
+        except Exception as e:
+            raise CollectingError(', '.join(collector.get_metric_name() for _, collector in collectors), host, e)
+        values = {}
+        for line in output.splitlines():
+            name, separator, value = line.partition('=')
+            if separator and name in self.__collectors and value.strip():
+                values[name] = value.strip()
+        errors = [CollectingError(collector.get_metric_name(), host, 'no value was printed')
+                  for name, collector in collectors if name not in values]
+        return values, errors
+
 
 class CPULoad(Collector):
     """A collector of the CPU load.
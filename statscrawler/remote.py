@@ -1,3 +1,8 @@
+import asyncio
+import time
+from collections import OrderedDict
+from functools import partial
+
 import asyncssh
 
 
@@ -15,14 +20,80 @@ class CommandExecutionError(Exception):
         super(CommandExecutionError, self).__init__(message)
 
 
+class PooledClient(asyncssh.SSHClient):
+    """Client of a pooled SSH connection, that notifies the pool once the connection is lost, so a broken connection
+    is never handed out again.
+
+    Attributes:
+        __host (str): Host of the connection.
+        __listener (callable): Function, that gets called with the host and the connection once it is lost.
+        __connection (SSHClientConnection): The connection. None until it is made.
+
+    """
+    def __init__(self, host, listener):
+        """Constructor of the PooledClient.
+
+        Args:
+            host (str): Host of the connection.
+            listener (callable): Function, that gets called with the host and the connection once it is lost.
+
+        """
+        self.__host = host
+        self.__listener = listener
+        self.__connection = None
+
+    def connection_made(self, connection):
+        self.__connection = connection
+
+    def connection_lost(self, exc):
+        if self.__connection is not None:
+            self.__listener(self.__host, self.__connection)
+
+
 class CommandExecutor(object):
-    """A command executor, that executes commands remotely via SSH."""
-    def __init__(self, username, password):
+    """A command executor, that executes commands remotely via SSH.
+
+    Connections are kept in a pool, one per host, and each command is executed in its own channel of the connection to
+    its host, so consecutive commands on a host cost a channel open instead of a TCP and SSH handshake. Concurrent
+    commands on a host, that has no connection yet, share a single handshake. Up to the maximum count of channels are
+    open on a connection at a time, so the limit of sessions per connection of the SSH server (MaxSessions of OpenSSH,
+    10 by default) is not exceeded. If a pooled connection turns out to be broken, it is dropped and the command is
+    retried once over a new connection. A failure to open a channel on a working connection fails only the command.
+    A command, that does not complete within the command timeout, fails, and its connection is dropped, since
+    the host may have stopped responding.
+
+    Whenever a new connection is needed, connections, that have been idle for the idle timeout, are closed. If the
+    maximum count of connections is still reached, the least recently used idle connection is closed, or the command
+    waits until a connection becomes idle.
+
+    Attributes:
+        __username (str): Name of the SSH user.
+        __password (str): Password of the SSH user.
+        __max_connections (int): Maximum count of simultaneously open connections.
+        __idle_timeout (float): Time in seconds an idle connection is kept open for.
+        __connect_timeout (float): Maximum time in seconds establishing a connection may take.
+        __max_channels (int): Maximum count of simultaneously open channels of a connection.
+        __command_timeout (float): Maximum time in seconds a command may take.
+        __connections (OrderedDict): Established connections by hosts, from the least to the most recently used.
+        __connecting (dict): Tasks, that establish connections, by hosts.
+        __usages (dict): Counts of commands, that are being executed, by hosts.
+        __channels (dict): Semaphores, that limit counts of open channels, by hosts, that execute commands.
+        __last_used (dict): Times the established connections were used last time by hosts.
+        __released (Event): Event, that gets set when a connection becomes idle or gets closed.
+
+    """
+    def __init__(self, username, password, max_connections=500, idle_timeout=60, connect_timeout=10,
+                 max_channels=10, command_timeout=30):
         """Constructor of the CommandExecutor.
 
         Args:
             username (str): Name of the SSH user.
             password (str): Password of the SSH user.
+            max_connections (int): Maximum count of simultaneously open connections.
+            idle_timeout (float): Time in seconds an idle connection is kept open for.
+            connect_timeout (float): Maximum time in seconds establishing a connection may take.
+            max_channels (int): Maximum count of simultaneously open channels of a connection.
+            command_timeout (float): Maximum time in seconds a command may take.
 
         Raises:
             Exception: If username or password were not specified.
@@ -34,6 +105,17 @@ class CommandExecutor(object):
             raise Exception("PASSWORD parameter was not specified")
         self.__username = username
         self.__password = password
+        self.__max_connections = max_connections
+        self.__idle_timeout = idle_timeout
+        self.__connect_timeout = connect_timeout
+        self.__max_channels = max_channels
+        self.__command_timeout = command_timeout
+        self.__connections = OrderedDict()
+        self.__connecting = {}
+        self.__usages = {}
+        self.__channels = {}
+        self.__last_used = {}
+        self.__released = asyncio.Event()
 
     async def execute(self, host, command):
         """Execute specified command on the specified host and return the STDOUT of it.
@@ -49,11 +131,137 @@ class CommandExecutor(object):
 
         Raises:
             CommandExecutionError: If command exited with a non-0 exit code.
+            TimeoutError: If command did not complete within the command timeout.
 
         """
-        async with asyncssh.connect(host, username=self.__username, password=self.__password) as connection:
-            result = await connection.run(command)
+        for attempt in range(2):
+            self.__usages[host] = self.__usages.get(host, 0) + 1
+            if host not in self.__channels:
+                self.__channels[host] = asyncio.Semaphore(self.__max_channels)
+            try:
+                async with self.__channels[host]:
+                    connection, reused = await self.__acquire(host)
+                    try:
+                        result = await asyncio.wait_for(connection.run(command), self.__command_timeout)
+                    except asyncio.TimeoutError:
+                        self.__drop(host, connection)
+                        raise
+                    except asyncssh.ChannelOpenError:
+                        if reused and attempt == 0 and self.__connections.get(host) is not connection:
+                            continue
+                        raise
+                    except (OSError, asyncssh.Error):
+                        self.__drop(host, connection)
+                        if reused and attempt == 0:
+                            continue
+                        raise
+            finally:
+                self.__release(host)
             if result.exit_status == 0:
                 return result.stdout
             else:
                 raise CommandExecutionError(result.exit_status, result.stderr)
+
+    def close(self):
+        """Close all established connections."""
+        for connection in list(self.__connections.values()):
+            connection.close()
+        self.__connections.clear()
+        self.__last_used.clear()
+
+    async def __acquire(self, host):
+        """Return a connection to the host, establishing it if there is none.
+
+        Note: awaitable method.
+
+        Args:
+            host (str): The host.
+
+        Returns:
+            tuple: The connection and True if it was established before, False otherwise.
+
+        """
+        while True:
+            connection = self.__connections.get(host)
+            if connection is not None:
+                self.__connections.move_to_end(host)
+                return connection, True
+            if host in self.__connecting:
+                return await asyncio.shield(self.__connecting[host]), False
+            if self.__make_room():
+                self.__connecting[host] = asyncio.ensure_future(self.__connect(host))
+            else:
+                self.__released.clear()
+                await self.__released.wait()
+
+    async def __connect(self, host):
+        """Establish a connection to the host and add it to the pool.
+
+        Note: awaitable method.
+
+        Args:
+            host (str): The host.
+
+        Returns:
+            SSHClientConnection: The connection.
+
+        """
+        try:
+            connection = await asyncio.wait_for(asyncssh.connect(host, username=self.__username,
+                                                                 password=self.__password,
+                                                                 client_factory=partial(PooledClient, host,
+                                                                                        self.__drop)),
+                                                self.__connect_timeout)
+        finally:
+            del self.__connecting[host]
+            self.__released.set()
+        self.__connections[host] = connection
+        self.__last_used[host] = time.monotonic()
+        return connection
+
+    def __make_room(self):
+        """Close connections, that have been idle for the idle timeout, and, if the maximum count of connections is
+        still reached, the least recently used idle connection.
+
+        Returns:
+            bool: True if another connection may be established, False otherwise.
+
+        """
+        now = time.monotonic()
+        for host, connection in list(self.__connections.items()):
+            if host in self.__usages:
+                continue
+            full = len(self.__connections) + len(self.__connecting) >= self.__max_connections
+            if not full and now - self.__last_used[host] < self.__idle_timeout:
+                break
+            self.__drop(host, connection)
+        return len(self.__connections) + len(self.__connecting) < self.__max_connections
+
+    def __drop(self, host, connection):
+        """Close the connection and remove it from the pool, if it is still there.
+
+        Args:
+            host (str): Host of the connection.
+            connection (SSHClientConnection): The connection.
+
+        """
+        if self.__connections.get(host) is connection:
+            del self.__connections[host]
+            del self.__last_used[host]
+            self.__released.set()
+        connection.close()
+
+    def __release(self, host):
+        """Mark the end of a command on the host.
+
+        Args:
+            host (str): The host.
+
+        """
+        self.__usages[host] -= 1
+        if self.__usages[host] == 0:
+            del self.__usages[host]
+            del self.__channels[host]
+            if host in self.__connections:
+                self.__last_used[host] = time.monotonic()
+            self.__released.set()
@@ -0,0 +1,18 @@
+import asyncio
+
+
+def run(coroutine):
+    """Run the coroutine in a new event loop and return its result.
+
+    Args:
+        coroutine (coroutine): The coroutine.
+
+    Returns:
+        object: Result of the coroutine.
+
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
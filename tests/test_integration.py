@@ -0,0 +1,112 @@
+import json
+
+from alb.integration import Proxy, RANK_PROJECTION
+from tests import run
+
+
+class Response(object):
+    """Response of the fake proxy."""
+    def __init__(self, status, body):
+        self.status = status
+        self.__body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def text(self):
+        return self.__body
+
+    async def json(self, content_type='application/json'):
+        return json.loads(self.__body) if self.__body else None
+
+
+class Session(object):
+    """Session, that records requests to the proxy and answers them with the queued responses or 200 OK."""
+    timeout = 1
+
+    def __init__(self, ordered=True):
+        self.requests = []
+        self.responses = []
+        self.__ordered = ordered
+
+    def get(self):
+        return self
+
+    def request(self, method, url, json=None, timeout=None):
+        self.requests.append((method, json))
+        if self.responses:
+            return Response(*self.responses.pop(0))
+        if method == 'patch' and self.__ordered:
+            return Response(200, '{"ordered": true}')
+        return Response(200, '')
+
+    async def close(self):
+        pass
+
+
+def node(name, weight):
+    return {'name': name, 'host': name, 'port': 80, 'weight': weight}
+
+
+def test_delta_carries_the_order_of_tied_nodes():
+    session = Session()
+    proxy = Proxy('http://proxy/{}', RANK_PROJECTION, session)
+    run(proxy.submit_node_group('g', [node('a', 0), node('b', 0)], 1))
+    run(proxy.submit_node_group('g', [node('a', 0), node('c', 0), node('b', 0)], 2))
+    method, delta = session.requests[-1]
+    assert method == 'patch'
+    assert delta['order'] == ['a', 'c', 'b']
+    assert [added['name'] for added in delta['added']] == ['c']
+
+
+def test_reordered_ties_are_pushed_after_a_delta():
+    session = Session()
+    proxy = Proxy('http://proxy/{}', RANK_PROJECTION, session)
+    run(proxy.submit_node_group('g', [node('a', 0), node('b', 0)], 1))
+    run(proxy.submit_node_group('g', [node('a', 0), node('c', 0), node('b', 0)], 2))
+    run(proxy.submit_node_group('g', [node('a', 0), node('b', 0), node('c', 0)], 3))
+    method, delta = session.requests[-1]
+    assert len(session.requests) == 3
+    assert method == 'patch'
+    assert not delta['added'] and not delta['updated'] and not delta['removed']
+    assert delta['order'] == ['a', 'b', 'c']
+
+
+def test_confirmed_order_of_a_delta_allows_suppression():
+    session = Session()
+    proxy = Proxy('http://proxy/{}', RANK_PROJECTION, session)
+    run(proxy.submit_node_group('g', [node('a', 0), node('b', 0)], 1))
+    run(proxy.submit_node_group('g', [node('a', 0), node('c', 0), node('b', 0)], 2))
+    run(proxy.submit_node_group('g', [node('a', 0), node('c', 0.5), node('b', 0.5)], 3))
+    assert len(session.requests) == 2
+    assert proxy.get_stats()['suppressed'] == 1
+
+
+def test_unconfirmed_order_of_a_delta_prevents_suppression():
+    session = Session(ordered=False)
+    proxy = Proxy('http://proxy/{}', RANK_PROJECTION, session)
+    run(proxy.submit_node_group('g', [node('a', 0), node('b', 0)], 1))
+    run(proxy.submit_node_group('g', [node('a', 0), node('c', 0), node('b', 0)], 2))
+    run(proxy.submit_node_group('g', [node('a', 0), node('c', 0.5), node('b', 0.5)], 3))
+    assert len(session.requests) == 3
+    assert proxy.get_stats()['suppressed'] == 0
+
+
+def test_rejected_delta_is_followed_by_a_full_resync():
+    session = Session()
+    proxy = Proxy('http://proxy/{}', RANK_PROJECTION, session)
+    run(proxy.submit_node_group('g', [node('a', 0), node('b', 1)], 1))
+    session.responses.append((409, ''))
+    nodes = [node('a', 0), node('b', 1), node('c', 2)]
+    run(proxy.submit_node_group('g', nodes, 2))
+    assert [method for method, body in session.requests] == ['post', 'patch', 'post']
+    assert session.requests[1][1]['base_version'] == 1
+    assert session.requests[2][1] == {'version': 2, 'nodes': nodes, 'ordered': True}
+    run(proxy.submit_node_group('g', nodes + [node('d', 3)], 3))
+    method, delta = session.requests[-1]
+    assert method == 'patch'
+    assert delta['base_version'] == 2
+    assert [added['name'] for added in delta['added']] == ['d']
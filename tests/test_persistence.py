@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+from alb.persistence import Journal, SEGMENT_TEMPLATE, SNAPSHOT_FILE
+from tests import run
+
+
+async def append(journal, records):
+    await asyncio.gather(*[journal.append(record) for record in records])
+
+
+async def snapshot(journal, directory, version, node_groups):
+    journal.take_snapshot(version, node_groups)
+    while SEGMENT_TEMPLATE.format(1) in os.listdir(directory):
+        await asyncio.sleep(0.01)
+
+
+def test_records_round_trip(tmp_path):
+    directory = str(tmp_path)
+    journal = Journal(directory)
+    assert journal.load() == (None, [])
+    records = [[1, 'add', 'g'], [2, 'add', 'g', 'n', 'h', 80], [3, 'remove', 'g']]
+    run(append(journal, records))
+    assert Journal(directory).load() == (None, records)
+
+
+def test_snapshot_drops_preceding_segments(tmp_path):
+    directory = str(tmp_path)
+    journal = Journal(directory, snapshot_interval=2)
+    journal.load()
+    run(append(journal, [[1, 'add', 'g'], [2, 'add', 'h']]))
+    assert journal.is_snapshot_due()
+    run(snapshot(journal, directory, 2, {'g': [], 'h': []}))
+    assert not journal.is_snapshot_due()
+    run(append(journal, [[3, 'remove', 'h']]))
+    assert sorted(os.listdir(directory)) == [SEGMENT_TEMPLATE.format(3), SNAPSHOT_FILE]
+    assert Journal(directory).load() == ({'version': 2, 'node_groups': {'g': [], 'h': []}}, [[3, 'remove', 'h']])
+
+
+def test_truncated_record_is_recovered(tmp_path):
+    directory = str(tmp_path)
+    journal = Journal(directory)
+    journal.load()
+    records = [[1, 'add', 'g'], [2, 'add', 'h'], [3, 'remove', 'g']]
+    run(append(journal, records))
+    path = os.path.join(directory, SEGMENT_TEMPLATE.format(1))
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        f.truncate(size - 4)
+    assert Journal(directory).load() == (None, records[:2])
+    assert os.path.getsize(path) == size - len(b'[3, "remove", "g"]\n')
+    journal = Journal(directory)
+    journal.load()
+    run(append(journal, [[3, 'remove', 'h']]))
+    assert Journal(directory).load() == (None, records[:2] + [[3, 'remove', 'h']])
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+import alb.service
+from alb.service import ServiceLayer
+from tests import run
+
+
+class Router(object):
+    """Router, that records routes of the service."""
+    def __init__(self):
+        self.handlers = {}
+
+    def add_route(self, url, handler, method=None):
+        self.handlers[(method, url)] = handler
+
+
+class Application(object):
+    """HTTP server, that only records routes and error handlers of the service."""
+    def __init__(self):
+        self.router = Router()
+        self.error_handlers = {}
+
+    def add_error_handler(self, error, handler):
+        self.error_handlers[error] = handler
+
+
+class Request(object):
+    """Request with a raw body, that is parsed on access to json like the HTTP server does."""
+    def __init__(self, body):
+        self.match_dict = {}
+        self.query = {}
+        self.headers = {}
+        self.__body = body
+
+    @property
+    def json(self):
+        return json.loads(self.__body)
+
+    def Response(self, code=200, text=None, body=None, mime_type=None, headers=None):
+        return {'code': code, 'text': text, 'body': body}
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    monkeypatch.setattr(alb.service, 'Application', Application)
+    service = ServiceLayer(None, None)
+    service.map_business_error(KeyError, 404)
+
+    async def get_node_group(group_name):
+        if group_name != 'g':
+            raise KeyError(group_name)
+        return {'nodes': {}}
+
+    service.map_business_process('GET', '/node_group/{group_name}', get_node_group)
+    service.map_batch_process('/batch')
+    handle = service._ServiceLayer__application.router.handlers[('POST', '/batch')]
+    return lambda body: run(handle(Request(body)))
+
+
+def test_malformed_body_is_rejected(batch):
+    response = batch('[{"method": ')
+    assert response['code'] == 400
+    assert response['text'].startswith('Request body is malformed')
+
+
+def test_body_should_be_a_list(batch):
+    response = batch('{"method": "GET", "path": "/node_group/g"}')
+    assert response['code'] == 400
+    assert response['text'] == 'Request body should be a list of operations'
+
+
+@pytest.mark.parametrize('operation', [
+    'GET /node_group/g',
+    None,
+    {'method': 'GET'},
+    {'path': '/node_group/g'},
+    {'method': 'GET', 'path': 1},
+    {'method': ['GET'], 'path': '/node_group/g'},
+])
+def test_malformed_operation_gets_a_bad_request_result(batch, operation):
+    response = batch(json.dumps([operation, {'method': 'GET', 'path': '/node_group/g'}]))
+    assert response['code'] == 200
+    results = json.loads(response['body'].decode())
+    assert results[0]['code'] == 400
+    assert 'error' in results[0]
+    assert results[1] == {'code': 200, 'body': {'nodes': {}}}
+
+
+def test_operations_get_results_in_their_order(batch):
+    response = batch(json.dumps([
+        {'method': 'GET', 'path': '/node_group/g'},
+        {'method': 'GET', 'path': '/node_group/h'},
+        {'method': 'DELETE', 'path': '/node_group/g'},
+    ]))
+    assert response['code'] == 200
+    assert [result['code'] for result in json.loads(response['body'].decode())] == [200, 404, 404]
@@ -0,0 +1,70 @@
+import math
+import random
+
+import pytest
+
+import alb.business
+from alb.business import UnknownNodeError, WeightIndex
+
+
+def check(index, keys):
+    """Compare the index with a reference sort of (weight, sequence, name) keys."""
+    ordered = sorted(keys.values())
+    names = [key[2] for key in ordered]
+    assert index.get_names() == names
+    assert len(index) == len(names)
+    for name in names:
+        assert index.get_rank(name) == names.index(name)
+    for count in (-1, 0, 1, len(names) // 2, len(names), len(names) + 1):
+        assert index.get_top(count) == names[::-1][:max(count, 0)]
+    for percent in (0, 1, 50, 99.9, 100):
+        position = min(max(int(math.ceil(len(ordered) * percent / 100)) - 1, 0), len(ordered) - 1)
+        assert index.get_percentile(percent) == (ordered[position][0] if ordered else None)
+
+
+@pytest.mark.parametrize('bucket_size', [1, 2, 3, 1000])
+def test_order_and_rank_match_a_reference_sort(monkeypatch, bucket_size):
+    monkeypatch.setattr(alb.business, 'INDEX_BUCKET_SIZE', bucket_size)
+    generator = random.Random(bucket_size)
+    weights = [('i{}'.format(i), float(generator.randint(0, 20))) for i in range(30)]
+    index = WeightIndex(weights)
+    keys = {name: (weight, sequence, name) for sequence, (name, weight) in enumerate(weights)}
+    sequence = len(weights)
+    check(index, keys)
+    for step in range(2000):
+        operation = generator.random()
+        weight = float(generator.randint(0, 20))
+        if operation < 0.35 or not keys:
+            name = 'n{}'.format(step)
+            index.add(name, weight)
+            keys[name] = (weight, sequence, name)
+            sequence += 1
+        elif operation < 0.55:
+            name = generator.choice(sorted(keys))
+            index.remove(name)
+            del keys[name]
+        else:
+            name = generator.choice(sorted(keys))
+            index.update(name, weight)
+            keys[name] = (weight, keys[name][1], name)
+        if step % 100 == 0:
+            check(index, keys)
+    check(index, keys)
+
+
+def test_equal_weights_keep_the_order_of_addition():
+    index = WeightIndex([('a', 1.0), ('b', 1.0)])
+    index.add('c', 1.0)
+    index.update('a', 2.0)
+    index.update('a', 1.0)
+    assert index.get_names() == ['a', 'b', 'c']
+
+
+def test_empty_index():
+    index = WeightIndex()
+    assert len(index) == 0
+    assert index.get_names() == []
+    assert index.get_top(3) == []
+    assert index.get_percentile(50) is None
+    with pytest.raises(UnknownNodeError):
+        index.get_rank('a')